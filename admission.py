@@ -0,0 +1,327 @@
+"""
+Admission control: per-client token buckets, per-route-class concurrency
+limits and early load shedding.
+
+``install(app)`` adds a pure ASGI middleware in front of everything else.
+For each request it
+
+1. identifies the client by its peer address and charges one token from
+   that client's bucket (429 + Retry-After when empty). ``X-API-Key``, then
+   ``X-Client-Id``, name the client instead only when the peer is in
+   ``AI_DAE_TRUSTED_PROXIES`` (a gateway that has authenticated them):
+   anyone else could send a new value per request to get a fresh bucket;
+2. sheds work-creating requests with 503 + Retry-After while the
+   background backlog (decode pipelines, pending feedback writes, ...)
+   is above its watermark;
+3. admits the request into its route class if the class is under its
+   concurrency limit, otherwise queues it FIFO; a request that would join a
+   queue already at its watermark, or that waits longer than the class
+   timeout, is answered 503 + Retry-After instead of adding to the tail.
+   Long-lived responses (``STREAMING_PATHS``: progress event streams,
+   streamed speech, artifact downloads) skip this step: a slot held for the
+   life of a stream would starve the short requests of its class, so they
+   are bounded by the client's token bucket alone.
+
+Buckets refill lazily from a monotonic clock, so the hot path is a dict
+lookup and a little arithmetic; there is no background timer. At most
+``max_clients`` buckets are kept, least recently used evicted first.
+Rejected requests are recorded in the per-route HTTP metrics as well, since
+they never reach the metrics middleware.
+"""
+import asyncio
+import collections
+import contextvars
+import ipaddress
+import math
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, OrderedDict, Tuple
+
+from fastapi import FastAPI
+from starlette.routing import Match
+
+DEFAULT_RATE = float(os.environ.get("AI_DAE_RATE_LIMIT", "50"))  # requests/second per client
+DEFAULT_BURST = float(os.environ.get("AI_DAE_RATE_BURST", "100"))
+DEFAULT_BACKLOG_WATERMARK = int(os.environ.get("AI_DAE_BACKLOG_WATERMARK", "64"))
+DEFAULT_TRUSTED_PROXIES = os.environ.get("AI_DAE_TRUSTED_PROXIES", "")  # comma-separated addresses/CIDRs
+EXEMPT_PATHS = frozenset(("/metrics", "/admin/profile", "/docs", "/redoc", "/openapi.json"))
+STREAMING_PATHS = re.compile(r"^/archives/content/status/[^/]+/events$|^/enhancements/text-to-speech/stream$"
+                             r"|^/artifacts/")
+
+# Client identity of the request being handled, for per-tenant accounting further down the stack.
+current_client: contextvars.ContextVar[str] = contextvars.ContextVar("current_client", default="anonymous")
+
+
+@dataclass
+class RouteClass:
+    name: str
+    max_concurrency: int
+    queue_watermark: int  # waiters beyond which new arrivals are shed
+    queue_timeout: float  # seconds a request may wait for a slot
+    sheddable: bool = False  # shed while the background backlog is over its watermark
+    in_flight: int = 0
+    waiters: Deque[asyncio.Future] = field(default_factory=collections.deque)
+
+
+def default_route_classes() -> List[Tuple[str, Tuple[str, ...], RouteClass]]:
+    """(path prefix, methods, class) rules, first match wins."""
+    ingest = RouteClass("ingest", max_concurrency=64, queue_watermark=128, queue_timeout=1.0, sheddable=True)
+    enhancement = RouteClass("enhancement", max_concurrency=16, queue_watermark=32, queue_timeout=2.0, sheddable=True)
+    write = RouteClass("write", max_concurrency=128, queue_watermark=256, queue_timeout=1.0)
+    read = RouteClass("read", max_concurrency=512, queue_watermark=1024, queue_timeout=0.5)
+    return [
+        ("/content/ingest", ("POST",), ingest),
+        ("/archives/content/ingest", ("POST",), ingest),
+        ("/enhancements/", ("POST",), enhancement),
+        ("/documents/", ("POST",), enhancement),
+        ("/", ("GET", "HEAD"), read),
+        ("/", (), write),
+    ]
+
+
+class Rejected(Exception):
+    def __init__(self, status: int, retry_after: float, detail: str, reason: str):
+        self.status = status
+        self.retry_after = retry_after
+        self.detail = detail
+        self.reason = reason
+
+
+class AdmissionController:
+    def __init__(self, rate: float = DEFAULT_RATE, burst: float = DEFAULT_BURST,
+                 backlog_watermark: int = DEFAULT_BACKLOG_WATERMARK,
+                 route_classes: Optional[List[Tuple[str, Tuple[str, ...], RouteClass]]] = None,
+                 max_clients: int = 100_000, trusted_proxies: str = DEFAULT_TRUSTED_PROXIES,
+                 streaming_paths: re.Pattern = STREAMING_PATHS):
+        self.rate = rate
+        self.burst = burst
+        self.backlog_watermark = backlog_watermark
+        self.rules = route_classes if route_classes is not None else default_route_classes()
+        self.classes = {rule[2].name: rule[2] for rule in self.rules}
+        self.max_clients = max_clients
+        self.trusted = [ipaddress.ip_network(p.strip(), strict=False) for p in trusted_proxies.split(",") if p.strip()]
+        self.streaming_paths = streaming_paths
+        self.streams = 0  # admitted long-lived responses in progress, outside the class limits
+        self.backlog_probes: List[Callable[[], int]] = []
+        # client -> [tokens, last refill], least recently used first
+        self.buckets: OrderedDict[str, List[float]] = collections.OrderedDict()
+        self.evicted_clients = 0
+        self.admitted: Dict[str, int] = dict.fromkeys(self.classes, 0)
+        self.rejected: Dict[Tuple[str, str], int] = {}
+
+    def route_class(self, method: str, path: str) -> RouteClass:
+        for prefix, methods, route_class in self.rules:
+            if path.startswith(prefix) and (not methods or method in methods):
+                return route_class
+        return self.rules[-1][2]
+
+    # Token buckets
+    def take_token(self, client: str, now: float) -> float:
+        """Charge one token; returns 0 when allowed, else seconds until a token is available."""
+        bucket = self.buckets.get(client)
+        if bucket is None:
+            if len(self.buckets) >= self.max_clients:
+                self._prune(now)
+            self.buckets[client] = [self.burst - 1, now]
+            return 0.0
+        self.buckets.move_to_end(client)
+        tokens = bucket[0] + (now - bucket[1]) * self.rate
+        if tokens > self.burst:
+            tokens = self.burst
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return 0.0
+        bucket[0] = tokens
+        return (1 - tokens) / self.rate
+
+    def _prune(self, now: float):
+        """
+        Forget clients whose buckets have refilled (they would be recreated
+        full anyway), then, if still full, the least recently seen ones.
+        """
+        full_after = self.burst / self.rate
+        for client in [c for c, (_, last) in self.buckets.items() if now - last >= full_after]:
+            del self.buckets[client]
+        while len(self.buckets) >= self.max_clients:
+            self.buckets.popitem(last=False)
+            self.evicted_clients += 1
+
+    def trusts(self, peer: str) -> bool:
+        if not self.trusted:
+            return False
+        try:
+            address = ipaddress.ip_address(peer)
+        except ValueError:
+            return False
+        return any(address in network for network in self.trusted)
+
+    # Backlog
+    def backlog(self) -> int:
+        return sum(probe() for probe in self.backlog_probes)
+
+    # Concurrency
+    async def acquire(self, route_class: RouteClass):
+        if route_class.in_flight < route_class.max_concurrency and not route_class.waiters:
+            route_class.in_flight += 1
+            return
+        if len(route_class.waiters) >= route_class.queue_watermark:
+            raise Rejected(503, self._retry_after(route_class), "Server is at capacity", "queue_full")
+        waiter = asyncio.get_running_loop().create_future()
+        route_class.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, route_class.queue_timeout)
+        except asyncio.TimeoutError:
+            self._abandon(route_class, waiter)
+            raise Rejected(503, self._retry_after(route_class), "Server is at capacity", "queue_timeout")
+        except BaseException:
+            self._abandon(route_class, waiter)
+            raise
+        # The releasing request handed its slot straight to us, so in_flight is unchanged.
+
+    def _abandon(self, route_class: RouteClass, waiter: asyncio.Future):
+        if waiter.done() and not waiter.cancelled():
+            self.release(route_class)  # a slot was handed over just as we gave up; pass it on
+        else:
+            try:
+                route_class.waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def release(self, route_class: RouteClass):
+        waiters = route_class.waiters
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        route_class.in_flight -= 1
+
+    @staticmethod
+    def _retry_after(route_class: RouteClass) -> float:
+        # Rough time for the current queue to drain, bounded to something a client will honour.
+        return min(30.0, max(1.0, route_class.queue_timeout * (1 + len(route_class.waiters) / route_class.max_concurrency)))
+
+    def reject(self, route_class: RouteClass, reason: str):
+        key = (route_class.name, reason)
+        self.rejected[key] = self.rejected.get(key, 0) + 1
+
+
+def client_key(scope, trusts: Callable[[str], bool] = lambda peer: False) -> str:
+    """
+    The peer address, or the client a trusted peer names in ``X-API-Key`` /
+    ``X-Client-Id``.
+    """
+    peer = scope.get("client")
+    address = peer[0] if peer else "unknown"
+    if not trusts(address):
+        return "addr:" + address
+    api_key = client_id = None
+    for name, value in scope["headers"]:
+        if name == b"x-api-key":
+            api_key = value
+        elif name == b"x-client-id":
+            client_id = value
+    if api_key is not None:
+        return "key:" + api_key.decode("latin-1")
+    if client_id is not None:
+        return "client:" + client_id.decode("latin-1")
+    return "addr:" + address
+
+
+async def _send_rejection(send, rejected: Rejected) -> int:
+    body = b'{"detail":"' + rejected.detail.encode() + b'"}'
+    await send({"type": "http.response.start", "status": rejected.status, "headers": [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (b"retry-after", str(math.ceil(rejected.retry_after)).encode()),
+    ]})
+    await send({"type": "http.response.body", "body": body})
+    return len(body)
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, controller: AdmissionController, metrics=None, router=None):
+        self.app = app
+        self.controller = controller
+        self.metrics = metrics  # metrics.HttpMetrics, to record rejections per route
+        self.router = router
+
+    def _route_path(self, scope) -> str:
+        for route in getattr(self.router, "routes", ()):
+            if hasattr(route, "path") and route.matches(scope)[0] == Match.FULL:
+                return route.path
+        return "<unmatched>"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+        controller = self.controller
+        route_class = controller.route_class(scope["method"], scope["path"])
+        client = client_key(scope, controller.trusts)
+        current_client.set(client)
+        start = time.perf_counter_ns()
+        wait = controller.take_token(client, time.monotonic())
+        try:
+            if wait:
+                raise Rejected(429, wait, "Rate limit exceeded", "rate_limited")
+            if (route_class.sheddable and controller.backlog_probes
+                    and controller.backlog() >= controller.backlog_watermark):
+                raise Rejected(503, 5.0, "Background backlog is too deep", "backlog")
+            streaming = controller.streaming_paths.match(scope["path"]) is not None
+            if not streaming:
+                await controller.acquire(route_class)
+        except Rejected as rejected:
+            controller.reject(route_class, rejected.reason)
+            size = await _send_rejection(send, rejected)
+            if self.metrics is not None:
+                self.metrics.observe(scope["method"], self._route_path(scope), rejected.status,
+                                     time.perf_counter_ns() - start, 0, size)
+            return
+        controller.admitted[route_class.name] += 1
+        if streaming:
+            controller.streams += 1
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                controller.streams -= 1
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(route_class)
+
+
+def install(app: FastAPI, backlog_probes: Optional[List[Callable[[], int]]] = None,
+            controller: Optional[AdmissionController] = None) -> AdmissionController:
+    """Put admission control in front of ``app``; ``backlog_probes`` report background queue depth."""
+    controller = controller or AdmissionController()
+    controller.backlog_probes.extend(backlog_probes or ())
+    app.state.admission = controller
+    metrics = getattr(app.state, "metrics", None)
+    app.add_middleware(AdmissionMiddleware, controller=controller, metrics=metrics, router=app.router)
+
+    def metric_samples():
+        return [
+            ("aidae_admission_admitted_total", "counter", "Requests admitted, by route class.",
+             [({"class": name}, n) for name, n in sorted(controller.admitted.items())]),
+            ("aidae_admission_rejected_total", "counter", "Requests rejected, by route class and reason.",
+             [({"class": name, "reason": reason}, n) for (name, reason), n in sorted(controller.rejected.items())]),
+            ("aidae_admission_in_flight", "gauge", "Admitted requests in progress, by route class.",
+             [({"class": name}, c.in_flight) for name, c in sorted(controller.classes.items())]),
+            ("aidae_admission_queued", "gauge", "Requests waiting for a slot, by route class.",
+             [({"class": name}, len(c.waiters)) for name, c in sorted(controller.classes.items())]),
+            ("aidae_admission_streams", "gauge", "Admitted streaming responses in progress (outside class limits).",
+             [({}, controller.streams)]),
+            ("aidae_admission_tracked_clients", "gauge", "Clients with a live token bucket.",
+             [({}, len(controller.buckets))]),
+            ("aidae_admission_evicted_clients_total", "counter",
+             "Token buckets evicted to stay within the client limit.", [({}, controller.evicted_clients)]),
+        ]
+
+    if metrics is not None:
+        metrics.collectors.append(metric_samples)
+    return controller
@@ -0,0 +1,103 @@
+"""
+The AI-DAE API, built by one app factory from a router per subsystem.
+
+``create_app()`` returns the full API; ``create_app(["books"])`` and other
+subsets import only the routers they name. The ``main*.py`` modules are
+entry points onto this factory (``uvicorn main5:app``), so every route and
+model is defined exactly once, in ``ai_dae/<subsystem>.py``.
+
+Routers import the numpy- and httpx-backed modules through ``ai_dae.lazy``,
+so building the app and serving its first request loads FastAPI and the
+light stores only; see ``benchmarks/bench_startup.py``. With the
+enhancements router, models named in ``AI_DAE_MODEL_WARMUP`` are loaded
+before the app starts serving, and with the archives and compliance routers
+each worker starts its archive batch and compliance report runners; the
+webhook and source fetch clients are closed at shutdown. With
+``AI_DAE_SNAPSHOT_PATH`` set, in-process state is restored from a snapshot
+at startup and snapshotted periodically (see ``snapshots``).
+"""
+import contextlib
+import importlib
+from typing import Sequence
+
+from fastapi import FastAPI
+
+import admission
+import artifact_store
+import coalescing
+import compliance_reports
+import conditional
+import fast_json
+import feedback_log
+import idempotency
+import job_scheduler
+import metrics
+import model_registry
+import profiler
+import progress_stream
+import shared_state
+import snapshots
+from ai_dae import lazy
+
+archive_batches = lazy.module("archive_batches")
+source_fetch = lazy.module("source_fetch")
+webhooks = lazy.module("webhooks")
+
+SUBSYSTEMS = ("books", "content", "enhancements", "documents", "compliance", "archives", "communication")
+
+
+def create_app(subsystems: Sequence[str] = SUBSYSTEMS) -> FastAPI:
+    unknown = set(subsystems) - set(SUBSYSTEMS)
+    if unknown:
+        raise ValueError(f"Unknown subsystems: {', '.join(sorted(unknown))}")
+    sections = [snapshots.Section("result_cache", coalescing.coalescer.dump, coalescing.coalescer.load),
+                lazy.section("image_hashing", "alt_text"), lazy.section("source_fetch", "fetch_validators")]
+    if shared_state.state.in_memory:  # a database file is durable already
+        sections.append(snapshots.Section("state", shared_state.state.image, shared_state.state.restore_image,
+                                          lock=shared_state.state.lock))
+    snapshotter = snapshots.Snapshotter(sections)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        async with snapshotter.running():
+            if "enhancements" in subsystems:
+                await model_registry.warm_configured()
+            if "archives" in subsystems:
+                archive_batches.runner.start()
+            if "compliance" in subsystems:
+                compliance_reports.runner.start()
+            try:
+                yield
+            finally:
+                if "archives" in subsystems:
+                    await archive_batches.runner.stop()
+                if "compliance" in subsystems:
+                    await compliance_reports.runner.stop()
+                # Close their connection pools while the loop they belong to is running.
+                if webhooks.loaded:
+                    await webhooks.dispatcher.aclose()
+                if source_fetch.loaded:
+                    await source_fetch.fetcher.aclose()
+
+    app = FastAPI(title="AI-DAE API Mock", description="Mock API for AI-Driven Accessibility Enabler (AI-DAE)",
+                  version="1.0", lifespan=lifespan)
+    metrics.instrument(app, collectors=[
+        lazy.collector("media_pipeline"), feedback_log.metric_samples, lazy.collector("sign_rendering"),
+        lazy.collector("image_hashing"), job_scheduler.metric_samples, artifact_store.metric_samples,
+        coalescing.metric_samples, lazy.collector("archive_batches"), lazy.collector("webhooks"),
+        progress_stream.metric_samples, compliance_reports.metric_samples, fast_json.metric_samples,
+        conditional.metric_samples, model_registry.metric_samples, snapshotter.metric_samples,
+        lazy.collector("speech_streaming"), lazy.collector("source_fetch"), lazy.metric_samples])
+    profiler.install(app)
+    artifact_store.install(app)
+    idempotency.install(app)
+    admission.install(app, backlog_probes=[lazy.probe("media_pipeline", lambda m: m.pipeline_stats["active"]),
+                                           lambda: feedback_log.feedback_log.pending,
+                                           lambda: len(job_scheduler.scheduler.queue)])
+    for name in subsystems:
+        # Added to the app's own route list rather than through include_router (which newer FastAPI keeps
+        # as a nested node), so metrics, the profiler and the load test see every APIRoute directly.
+        router_module = importlib.import_module(f"ai_dae.{name}")
+        app.router.routes.extend(router_module.router.routes)
+        snapshotter.sections.extend(getattr(router_module, "snapshot_sections", ()))
+    return app
@@ -0,0 +1,89 @@
+import asyncio
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, Body, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, HttpUrl
+
+import conditional
+import fast_json
+import progress_stream
+import shared_state
+from ai_dae import lazy
+
+archive_batches = lazy.module("archive_batches")
+source_fetch = lazy.module("source_fetch")
+
+router = APIRouter(tags=["archives"])
+
+
+class ArchiveIngestPayload(BaseModel):
+    archive_id: str = Field(..., description="Identifier for the archive.")
+    content_type: str = Field(..., description="Type of content being ingested (e.g., document, image, video).")
+    source: str = Field(..., description="Source of the archive content.")
+    callback_url: Optional[HttpUrl] = Field(None, description="URL to POST a completion event to when the job finishes.")
+
+class ArchiveIngestResponse(BaseModel):
+    batch_process_id: str = Field(..., description="Unique identifier for the batch process.")
+
+class ArchiveContentStatusResponse(BaseModel):
+    status: str = Field(..., description="Current status of the batch process (e.g., processing, completed).")
+    percentage_completed: int = Field(..., description="Percentage of the batch process completed.")
+    manual_review_needed: list[str] = Field(..., description="List of content IDs requiring manual review.")
+    items_total: int = Field(0, description="Items in the batch.")
+    items_completed: int = Field(0, description="Items processed so far.")
+
+_status = fast_json.Serializer(ArchiveContentStatusResponse)
+
+@router.post("/archives/content/ingest", response_model=ArchiveIngestResponse,
+             summary="Archive Content Ingestion",
+             description="Specifically designed for bulk ingestion of archival content, facilitating large-scale processing.")
+async def archive_content_ingest(payload: ArchiveIngestPayload = Body(...)):
+    batch_process_id = uuid.uuid4().hex
+    try:
+        source = await source_fetch.local_source(payload.source)
+    except source_fetch.FetchError as e:
+        raise HTTPException(status_code=502, detail=f"Could not fetch archive source: {e}")
+    items = archive_batches.archive_items(payload.archive_id, source)
+    callback_url = str(payload.callback_url) if payload.callback_url else None
+    await asyncio.to_thread(shared_state.state.create_batch, batch_process_id, payload.archive_id,
+                            payload.content_type, payload.source, items, callback_url=callback_url)
+    archive_batches.runner.notify()
+    return {"batch_process_id": batch_process_id}
+
+@router.get("/archives/content/status/{batchProcessId}", response_model=ArchiveContentStatusResponse,
+            summary="Check Archive Processing Status",
+            description="Checks the status of bulk processing for archival content, useful for large datasets.")
+async def archive_content_status(batchProcessId: str, request: Request, response: Response):
+    """
+    Sends the batch's version as ETag; a request with a matching If-None-Match gets 304 Not Modified without the
+    review list being read.
+    """
+    version = await asyncio.to_thread(shared_state.state.batch_version, batchProcessId)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Batch process not found")
+
+    async def build():
+        batch = await asyncio.to_thread(shared_state.state.batch_status, batchProcessId)
+        total, completed, review = batch["total"], batch["completed"], batch["manual_review_needed"]
+        return fast_json.respond(_status, {"status": "completed" if completed >= total else "processing",
+                                           "percentage_completed": completed * 100 // total if total else 100,
+                                           "manual_review_needed": review,
+                                           "items_total": total, "items_completed": completed},
+                                 key=("archive_status", batchProcessId), token=version[0])
+
+    return await conditional.respond_async(request, response, conditional.etag("batch", version[0]), version[1],
+                                           build)
+
+@router.get("/archives/content/status/{batchProcessId}/events", response_class=StreamingResponse,
+            summary="Stream Archive Processing Progress",
+            description="Server-Sent Events stream of progress for a batch: percentage, item counts and newly flagged items, at most max_rate events per second, ending when the batch completes.")
+async def archive_content_events(batchProcessId: str,
+                                 max_rate: float = Query(progress_stream.DEFAULT_MAX_RATE, gt=0, le=20,
+                                                         description="Maximum events per second.")):
+    source = await progress_stream.hub.open(batchProcessId)
+    if source is None:
+        raise HTTPException(status_code=404, detail="Batch process not found")
+    return StreamingResponse(progress_stream.hub.subscribe(source, max_rate), media_type="text/event-stream",
+                             headers={"cache-control": "no-cache", "x-accel-buffering": "no"})
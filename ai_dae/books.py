@@ -0,0 +1,130 @@
+import asyncio
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Path, Query, HTTPException, Request, Response
+from pydantic import BaseModel, ConfigDict, Field
+from starlette import status
+
+import conditional
+import fast_json
+import shared_state
+
+router = APIRouter(tags=["books"])
+
+
+class Book:
+    id: int
+    title: str
+    author: str
+    description: str
+    rating: int
+    published_date: int
+
+    def __init__(self, id, title, author, description, rating, published_date):
+        self.id = id
+        self.title = title
+        self.author = author
+        self.description = description
+        self.rating = rating
+        self.published_date = published_date
+
+
+class BookRequest(BaseModel):
+    id: Optional[int] = Field(title='id is not needed')
+    title: str = Field(min_length=3)
+    author: str = Field(min_length=1)
+    description: str = Field(min_length=1, max_length=100)
+    rating: int = Field(gt=0, lt=6)
+    published_date: int = Field(gt=1999, lt=2031)
+
+    model_config = ConfigDict(json_schema_extra={
+        'example': {
+            'title': 'A new book',
+            'author': 'codingwithroby',
+            'description': 'A new description of a book',
+            'rating': 5,
+            'published_date': 2029
+        }
+    })
+
+
+BOOK_FIELDS = ("id", "title", "author", "description", "rating", "published_date")
+MAX_TOMBSTONES = int(os.environ.get("AI_DAE_BOOK_TOMBSTONES", "10000"))
+_book = fast_json.Serializer(BOOK_FIELDS)
+
+# The catalogue lives in shared_state, so every worker serves the same books, versions and deltas. The catalogue
+# version goes up on every change to a book; each book and each deleted book's tombstone records the version of its
+# last change, so "changed since N" is exact while N is at least the version of the newest tombstone dropped.
+SEED_BOOKS = [
+    Book(1, 'Computer Science Pro', 'codingwithroby', 'A very nice book!', 5, 2030),
+    Book(2, 'Be Fast with FastAPI', 'codingwithroby', 'A great book!', 5, 2030),
+    Book(3, 'Master Endpoints', 'codingwithroby', 'A awesome book!', 5, 2029),
+    Book(4, 'HP1', 'Author 1', 'Book Description', 2, 2028),
+    Book(5, 'HP2', 'Author 2', 'Book Description', 3, 2027),
+    Book(6, 'HP3', 'Author 3', 'Book Description', 1, 2026)
+]
+shared_state.state.seed_books([tuple(getattr(book, field) for field in BOOK_FIELDS) for book in SEED_BOOKS])
+
+
+async def _delta(since: int) -> dict:
+    delta = await asyncio.to_thread(shared_state.state.book_delta, since)
+    delta["changed"] = [_book.to_dict(book) for book in delta["changed"]]
+    return delta
+
+
+@router.get("/books", status_code=status.HTTP_200_OK)
+async def read_all_books(request: Request, response: Response,
+                         since: Optional[int] = Query(None, ge=0, description="Catalogue version the client holds; "
+                                                      "returns only the books changed and deleted after it.")):
+    """
+    The catalogue, with its version as ETag. With ``since``: ``{version, reset, changed, deleted}``, where
+    ``reset`` means the changes since that version are no longer known and ``changed`` is the whole catalogue.
+    """
+    version, modified = await asyncio.to_thread(shared_state.state.catalogue)
+    etag = conditional.etag("books", version)
+    if since is not None:
+        return await conditional.respond_async(request, response, etag, modified, lambda: _delta(since))
+
+    async def build():
+        books = await asyncio.to_thread(shared_state.state.books)
+        return fast_json.respond(_book, books, key=("books",), token=version, many=True)
+
+    return await conditional.respond_async(request, response, etag, modified, build)
+
+
+@router.get("/books/{book_id}", status_code=status.HTTP_200_OK)
+async def read_book(request: Request, response: Response, book_id: int = Path(gt=0)):
+    book = await asyncio.to_thread(shared_state.state.book, book_id)
+    if book is None:
+        raise HTTPException(status_code=404, detail='Item not found')
+    version = book["version"]
+    return conditional.respond(request, response, conditional.etag("book", version), book["modified"],
+                               lambda: fast_json.respond(_book, book, key=("book", book_id), token=version))
+
+
+@router.get("/books/", status_code=status.HTTP_200_OK)
+async def read_book_by_rating(book_rating: int = Query(gt=0, lt=6)):
+    return await asyncio.to_thread(shared_state.state.books, rating=book_rating)
+
+
+@router.get("/books/publish/", status_code=status.HTTP_200_OK)
+async def read_books_by_publish_date(published_date: int = Query(gt=1999, lt=2031)):
+    return await asyncio.to_thread(shared_state.state.books, published_date=published_date)
+
+
+@router.post("/create-book", status_code=status.HTTP_201_CREATED)
+async def create_book(book_request: BookRequest):
+    await asyncio.to_thread(shared_state.state.add_book, book_request.model_dump())
+
+
+@router.put("/books/update_book", status_code=status.HTTP_204_NO_CONTENT)
+async def update_book(book: BookRequest):
+    if book.id is None or not await asyncio.to_thread(shared_state.state.update_book, book.id, book.model_dump()):
+        raise HTTPException(status_code=404, detail='Item not found')
+
+
+@router.delete("/books/{book_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_book(book_id: int = Path(gt=0)):
+    if not await asyncio.to_thread(shared_state.state.delete_book, book_id, MAX_TOMBSTONES):
+        raise HTTPException(status_code=404, detail='Item not found')
@@ -0,0 +1,70 @@
+import asyncio
+
+from fastapi import APIRouter, Body, HTTPException
+from pydantic import BaseModel, Field
+
+import feedback_log
+
+router = APIRouter(tags=["communication"])
+
+
+class RealTimeTextRequest(BaseModel):
+    client_id: str = Field(..., description="Identifier for the client initiating the communication.")
+    inquiry: str = Field(..., description="The inquiry or message content for real-time text communication.")
+
+class RealTimeTextResponse(BaseModel):
+    response_text: str = Field(..., description="Real-time text responses or updates.")
+
+class FeedbackRequest(BaseModel):
+    content_id: str = Field(..., description="Unique identifier for the content related to the feedback.")
+    user_feedback: str = Field(..., description="User feedback detailing their experience and suggestions.")
+    satisfaction_rating: int = Field(..., ge=feedback_log.MIN_RATING, le=feedback_log.MAX_RATING,
+                                     description="User satisfaction rating on a scale of 1 to 5.")
+
+class FeedbackResponse(BaseModel):
+    message: str = Field(..., description="Acknowledgment message confirming the receipt of feedback.")
+
+class FeedbackSummaryResponse(BaseModel):
+    content_id: str = Field(..., description="Unique identifier for the content.")
+    count: int = Field(..., description="Number of feedback entries received.")
+    average_rating: float = Field(..., description="Mean satisfaction rating.")
+    rating_histogram: dict[str, int] = Field(..., description="Number of entries per satisfaction rating.")
+
+@router.post("/communication/real-time-text", response_model=RealTimeTextResponse,
+             summary="Real-Time Text Communication",
+             description="Facilitates real-time text-based communication, ensuring clients with hearing impairments can interact and receive updates effectively.")
+async def real_time_text(request: RealTimeTextRequest = Body(...)):
+    """
+    Facilitates real-time text-based communication, ensuring clients with hearing impairments can interact and receive updates effectively.
+    """
+    # Placeholder for real implementation
+    return {"response_text": "Real-time text response to the inquiry"}
+
+@router.post("/communication/accessibility-feedback", response_model=FeedbackResponse,
+             summary="Submit Accessibility Feedback",
+             description="Collects user feedback on the accessibility features, serving as a crucial part of the continuous improvement loop.")
+async def accessibility_feedback(request: FeedbackRequest = Body(...)):
+    """
+    Collects user feedback on the accessibility features.
+    """
+    await feedback_log.feedback_log.append(request.content_id, request.user_feedback, request.satisfaction_rating)
+    return {"message": "Your accessibility feedback has been recorded"}
+
+@router.post("/feedback", response_model=FeedbackResponse,
+             summary="Submit General Feedback",
+             description="Allows users to submit feedback on any aspect of the service.")
+async def submit_feedback(request: FeedbackRequest = Body(...)):
+    """
+    Allows users to submit general feedback.
+    """
+    await feedback_log.feedback_log.append(request.content_id, request.user_feedback, request.satisfaction_rating)
+    return {"message": "Feedback received"}
+
+@router.get("/feedback/summary/{content_id}", response_model=FeedbackSummaryResponse,
+            summary="Feedback Rating Summary",
+            description="Returns running satisfaction rating aggregates for a piece of content without rescanning the feedback log.")
+async def feedback_summary(content_id: str):
+    summary = await asyncio.to_thread(feedback_log.feedback_log.summary, content_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="No feedback for content")
+    return summary
@@ -0,0 +1,123 @@
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Body, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+import compliance_reports
+import shared_state
+
+router = APIRouter(tags=["compliance"])
+
+
+class ComplianceCheckRequest(BaseModel):
+    content_id: str = Field(None, description="Unique identifier for the content or service to be reviewed.")
+    service_id: str = Field(None, description="Unique identifier for the service to be reviewed.")
+    standards: list[str] = Field(..., description="List of standards to check against (e.g., WCAG 2.1 Level AA, ADA).")
+
+class ComplianceReportResponse(BaseModel):
+    compliance_report: str = Field(..., description="Comprehensive report outlining compliance adherence and improvement recommendations.")
+    report_id: str = Field(..., description="Identifier of the stored report; findings are read from /compliance/reports/{report_id}/findings.")
+    subject: str = Field(..., description="Content, service or batch the report covers.")
+    status: str = Field(..., description="running, completed or failed.")
+    standards: list[str] = Field(..., description="Standards checked against.")
+    items_total: int = Field(..., description="Items to check.")
+    items_checked: int = Field(..., description="Items checked so far.")
+    items_failing: int = Field(..., description="Items with at least one finding.")
+    findings_total: int = Field(..., description="Findings recorded so far.")
+    by_severity: dict[str, int] = Field(..., description="Findings per severity (critical, serious, moderate, minor).")
+    by_rule: dict[str, int] = Field(..., description="Findings per rule ID.")
+    checker: str = Field(..., description="Checker that produced the findings; \"placeholder\" until the accessibility analysers are wired in.")
+    compliant: Optional[bool] = Field(None, description="No critical or serious findings; null until the report completes, and always null for placeholder findings.")
+
+class ComplianceFinding(BaseModel):
+    seq: int = Field(..., description="Position of the finding in the report.")
+    item_id: str = Field(..., description="Content item the finding applies to.")
+    rule_id: str = Field(..., description="Rule that failed (e.g. WCAG-1.2.2).")
+    severity: str = Field(..., description="critical, serious, moderate or minor.")
+    message: str = Field(..., description="What failed and where.")
+
+class ComplianceFindingsPage(BaseModel):
+    report_id: str = Field(..., description="Identifier of the report.")
+    findings: list[ComplianceFinding] = Field(..., description="Findings in report order.")
+    next_cursor: Optional[int] = Field(None, description="Pass as cursor to get the next page; null on the last page.")
+
+class ArchiveVerifyPayload(BaseModel):
+    batch_process_id: str = Field(..., description="Identifier for the batch process of the digital archive.")
+    standards: list[str] = Field(..., description="Standards to verify the digital archive against.")
+
+@router.post("/compliance/check", response_model=ComplianceReportResponse,
+             summary="Accessibility Compliance Check",
+             description="Submits content or service details for an accessibility compliance review against standards like WCAG and ADA.")
+async def compliance_check(request: ComplianceCheckRequest = Body(...)):
+    """
+    Submits content or service for accessibility compliance review.
+    """
+    standards = _compliance_standards(request.standards)
+    if request.content_id:
+        content = (await asyncio.to_thread(shared_state.state.get_content, int(request.content_id))
+                   if request.content_id.isdigit() else None)
+        if content is None:
+            raise HTTPException(status_code=404, detail="Content not found")
+        subject, item_id, content_type = f"content:{request.content_id}", request.content_id, content["content_type"]
+    elif request.service_id:
+        subject, item_id, content_type = f"service:{request.service_id}", request.service_id, "service"
+    else:
+        raise HTTPException(status_code=400, detail="content_id or service_id is required")
+    return compliance_reports.summary(
+        await asyncio.to_thread(compliance_reports.runner.check, subject, item_id, content_type, standards))
+
+@router.post("/compliance/archive/verify", response_model=ComplianceReportResponse,
+             summary="Verify Archive Compliance",
+             description="Verifies the accessibility compliance of the digital archive against ADA and other international regulations.")
+async def archive_compliance_verify(payload: ArchiveVerifyPayload = Body(...)):
+    """
+    Verifies the accessibility compliance of the digital archive.
+    """
+    standards = _compliance_standards(payload.standards)
+    batch = await asyncio.to_thread(shared_state.state.batch, payload.batch_process_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch process not found")
+    return compliance_reports.summary(await compliance_reports.runner.verify_batch(batch, standards))
+
+def _compliance_standards(standards: list[str]) -> list[str]:
+    try:
+        return compliance_reports.resolve_standards(standards)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+async def _compliance_report(report_id: str) -> dict:
+    report = await asyncio.to_thread(shared_state.state.report, report_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return report
+
+@router.get("/compliance/reports/{report_id}", response_model=ComplianceReportResponse,
+            summary="Compliance Report Summary",
+            description="Headline numbers of a compliance report (findings per severity and rule, items failing), precomputed as findings are recorded.")
+async def compliance_report(report_id: str):
+    return compliance_reports.summary(await _compliance_report(report_id))
+
+@router.get("/compliance/reports/{report_id}/findings", response_model=ComplianceFindingsPage,
+            summary="Compliance Report Findings",
+            description="Per-item findings of a compliance report, a page at a time, optionally filtered by severity or rule.")
+async def compliance_report_findings(report_id: str,
+                                     cursor: int = Query(0, ge=0, description="next_cursor from the previous page."),
+                                     limit: int = Query(100, ge=1, le=1000, description="Findings per page."),
+                                     severity: Optional[str] = Query(None, description="Only findings of this severity."),
+                                     rule_id: Optional[str] = Query(None, description="Only findings for this rule.")):
+    await _compliance_report(report_id)
+    findings = await asyncio.to_thread(shared_state.state.findings, report_id, cursor, limit, severity, rule_id)
+    next_cursor = findings[-1]["seq"] if len(findings) == limit else None
+    return {"report_id": report_id, "findings": findings, "next_cursor": next_cursor}
+
+@router.get("/compliance/reports/{report_id}/findings.ndjson", response_class=StreamingResponse,
+            summary="Export Compliance Report Findings",
+            description="Every finding of a compliance report as newline-delimited JSON, streamed from the stored findings.")
+async def compliance_report_export(report_id: str,
+                                   severity: Optional[str] = Query(None, description="Only findings of this severity."),
+                                   rule_id: Optional[str] = Query(None, description="Only findings for this rule.")):
+    await _compliance_report(report_id)
+    return StreamingResponse(compliance_reports.ndjson(report_id, severity, rule_id),
+                             media_type="application/x-ndjson")
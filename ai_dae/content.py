@@ -0,0 +1,110 @@
+import asyncio
+from enum import Enum
+from typing import Optional
+
+from fastapi import APIRouter, BackgroundTasks, Body, HTTPException, Request, Response
+from pydantic import BaseModel, Field, HttpUrl
+
+import conditional
+import fast_json
+import shared_state
+from ai_dae import lazy
+
+image_hashing = lazy.module("image_hashing")
+source_fetch = lazy.module("source_fetch")
+webhooks = lazy.module("webhooks")
+
+router = APIRouter(tags=["content"])
+
+
+class ContentType(str, Enum):
+    document = "document"
+    image = "image"
+    video = "video"
+
+class ContentIngestRequest(BaseModel):
+    content_type: str = Field(..., description="Type of the content (document, image, video).")
+    source_url: HttpUrl = Field(None, description="URL of the content to be ingested.")
+    callback_url: Optional[HttpUrl] = Field(None, description="URL to POST a completion event to when the job finishes.")
+    # Assuming direct file upload will be handled separately via FastAPI's File upload mechanism
+
+class ContentIngestResponse(BaseModel):
+    message: str = Field(..., description="Acknowledgment message of the ingestion process start.")
+    content_id: int = Field(..., description="Unique identifier for the ingested content.")
+
+class ContentStatusResponse(BaseModel):
+    status: str = Field(..., description="Current processing status of the content (processing, completed, error).")
+    contentId: int = Field(..., description="Unique identifier for the content.")
+
+class AnalysisResult(BaseModel):
+    content_id: int = Field(..., description="Unique identifier for the analyzed content.")
+    accessibility_issues: str = Field(..., description="Detected accessibility issues.")
+    suggested_actions: str = Field(..., description="Recommended actions for improving accessibility.")
+
+_status = fast_json.Serializer(ContentStatusResponse)
+
+# Mock data, kept in the shared state store so every worker process sees the same records
+shared_state.state.seed_contents([
+    (1, ContentType.document.value, "http://example.com/doc1"),
+    (2, ContentType.image.value, "http://example.com/image1"),
+    (3, ContentType.video.value, "http://example.com/video1"),
+])
+
+async def process_content(content_id: int, content_type: str, source_url: Optional[str], callback_url):
+    # Placeholder ingestion until the analysis backends are wired in: fetch the source, index image alt text,
+    # then mark it done
+    if source_url:
+        try:
+            await source_fetch.local_source(source_url)
+        except source_fetch.FetchError:
+            await asyncio.to_thread(shared_state.state.set_content_status, content_id, "error")
+            if callback_url:
+                webhooks.dispatcher.emit(callback_url, "content.completed",
+                                         {"content_id": content_id, "status": "error"})
+            return
+    if content_type == ContentType.image:
+        await asyncio.to_thread(image_hashing.alt_text_for_src, source_url)
+    await asyncio.to_thread(shared_state.state.set_content_status, content_id, "completed")
+    if callback_url:
+        webhooks.dispatcher.emit(callback_url, "content.completed", {"content_id": content_id, "status": "completed"})
+
+@router.post("/content/ingest", response_model=ContentIngestResponse)
+async def ingest_content(background_tasks: BackgroundTasks, content: ContentIngestRequest = Body(...)):
+    """
+    Initiates the ingestion of digital content for subsequent analysis and enhancement, preparing it for accessibility improvements.
+    """
+    source_url = str(content.source_url) if content.source_url else None
+    new_content_id = await asyncio.to_thread(shared_state.state.add_content, content.content_type, source_url)
+    background_tasks.add_task(process_content, new_content_id, content.content_type, source_url, content.callback_url)
+    return {"message": "Content ingestion started", "content_id": new_content_id}
+
+@router.get("/content/status/{contentId}", response_model=ContentStatusResponse)
+async def get_content_status(contentId: int, request: Request, response: Response):
+    """
+    Retrieves the current processing status of the ingested content, providing insights into its analysis or enhancement progress.
+
+    Sends the record's version as ETag; a request with a matching If-None-Match gets 304 Not Modified.
+    """
+    content = await asyncio.to_thread(shared_state.state.get_content, contentId)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Content not found")
+    version = content["version"]
+    return conditional.respond(
+        request, response, conditional.etag("content", version), content["modified"],
+        lambda: fast_json.respond(_status, {"status": content["status"], "contentId": contentId},
+                                  key=("content_status", contentId), token=version))
+
+@router.post("/content/analysis", response_model=AnalysisResult)
+async def analyze_content(content_id: int = Body(..., embed=True)):
+    """
+    Analyzes the content to identify accessibility barriers and recommends enhancements to make the content compliant with accessibility standards.
+    """
+    content = await asyncio.to_thread(shared_state.state.get_content, content_id)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Content not found")
+    if content['content_type'] == ContentType.image:
+        alt_text = await asyncio.to_thread(image_hashing.alt_text_for_src, content['source_url'])
+        return {"content_id": content_id, "accessibility_issues": "Image has no verified alternative text",
+                "suggested_actions": f"Add alt text: {alt_text}"}
+    # Placeholder for actual analysis logic
+    return {"content_id": content_id, "accessibility_issues": "None", "suggested_actions": "None"}
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Body
+from pydantic import BaseModel, Field, HttpUrl
+
+from ai_dae import lazy
+
+placeholder_artifacts = lazy.module("placeholder_artifacts")
+
+router = APIRouter(tags=["documents"])
+
+
+# Assuming ConvertToAccessibleRequest is similar for both document conversion endpoints
+class ConvertToAccessibleRequest(BaseModel):
+    document_ids: list[str] = Field(..., description="List of document identifiers to be converted.")
+    desired_format: str = Field(None, description="The desired accessible format (e.g., braille, tagged PDF).")
+
+class ConvertToAccessibleResponse(BaseModel):
+    accessible_document_urls: list[HttpUrl] = Field(..., description="Links to download the documents in accessible formats.")
+
+@router.post("/documents/convert-to-accessible", response_model=ConvertToAccessibleResponse,
+             summary="Convert Documents to Accessible Formats",
+             description="Converts compliance certificates, instructional content, and other documents into formats accessible for various disabilities.")
+async def convert_to_accessible(request: ConvertToAccessibleRequest = Body(...)):
+    """
+    Converts compliance certificates, instructional content, and other documents into formats accessible for various disabilities.
+    """
+    # Placeholder documents until a conversion backend is wired in
+    accessible_document_urls = await placeholder_artifacts.accessible_documents(request.document_ids,
+                                                                                request.desired_format)
+    return {"accessible_document_urls": accessible_document_urls}
+
+@router.post("/documents/convert-to-accessible-format", response_model=ConvertToAccessibleResponse,
+             summary="Convert Documents to Specific Accessible Formats",
+             description="Converts documents into specific formats accessible for various disabilities, based on the requested format.")
+async def convert_to_accessible_format(request: ConvertToAccessibleRequest = Body(...)):
+    """
+    Converts documents into specific formats accessible for various disabilities, based on the requested format.
+    """
+    # Implementation logic is assumed to be similar to convert_to_accessible
+    accessible_document_urls = await placeholder_artifacts.accessible_documents(request.document_ids,
+                                                                                request.desired_format)
+    return {"accessible_document_urls": accessible_document_urls}
@@ -0,0 +1,354 @@
+from enum import Enum
+from typing import List, Optional
+
+from fastapi import APIRouter, Body, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, HttpUrl
+
+import coalescing
+import html_rewriter
+import job_scheduler
+import model_registry
+from ai_dae import lazy
+
+image_hashing = lazy.module("image_hashing")
+media_pipeline = lazy.module("media_pipeline")
+placeholder_artifacts = lazy.module("placeholder_artifacts")
+sign_rendering = lazy.module("sign_rendering")
+source_fetch = lazy.module("source_fetch")
+speech_streaming = lazy.module("speech_streaming")
+webhooks = lazy.module("webhooks")
+
+router = APIRouter(tags=["enhancements"])
+
+
+async def _local(url) -> str:
+    """Where to read an input URL from (``source_fetch.local_source``); 502 if it cannot be fetched."""
+    try:
+        return await source_fetch.local_source(str(url))
+    except source_fetch.FetchError as e:
+        raise HTTPException(status_code=502, detail=f"Could not fetch input: {e}")
+
+
+class LanguageType(str, Enum):
+    en = "English"
+    es = "Spanish"
+    fr = "French"
+
+class TextToSpeechRequest(BaseModel):
+    content_id: str = Field(..., description="The unique identifier of the content to be converted to speech.")
+    language: str = Field(default="en", description="The language of the text to be converted.")
+    voice_type: str = Field(default="default", description="The type of voice to use for the speech synthesis.")
+    callback_url: Optional[HttpUrl] = Field(None, description="URL to POST a completion event to when the job finishes.")
+
+class TextToSpeechResponse(BaseModel):
+    audio_url: str = Field(..., description="URL to the generated audio file.")
+
+class TextToSpeechStreamRequest(BaseModel):
+    text: str = Field(..., description="The text to speak; paragraphs are separated by blank lines.")
+    language: str = Field(default="en", description="The language of the text to be converted.")
+    voice_type: str = Field(default="default", description="The type of voice to use for the speech synthesis.")
+
+class VideoCaptioningRequest(BaseModel):
+    video_file_url: str
+    language: LanguageType
+    callback_url: Optional[HttpUrl] = None  # Completion event is POSTed here
+
+class DescriptiveAudioRequest(BaseModel):
+    video_file_url: HttpUrl = Field(..., description="URL of the audio or video file for which descriptive audio is requested.")
+    specificity: str = Field(..., description="The level of detail for the audio description required (e.g., detailed, summary).")
+    callback_url: Optional[HttpUrl] = Field(None, description="URL to POST a completion event to when the job finishes.")
+
+class DescriptiveAudioResponse(BaseModel):
+    descriptive_audio_url: HttpUrl = Field(..., description="URL to access the enhanced audio/video with descriptions.")
+
+class InstructionalAccessibilityRequest(BaseModel):
+    video_file_url: HttpUrl
+    sign_language: str  # Example: "ASL", "BSL"
+    descriptive_audio_details: dict  # Example: {"level_of_detail": "high", "areas_of_focus": ["main_concepts", "visuals"]}
+    callback_url: Optional[HttpUrl] = None  # Completion event is POSTed here
+
+class InstructionalAccessibilityResponse(BaseModel):
+    sign_language_video_url: HttpUrl
+    descriptive_audio_url: HttpUrl
+
+class SignLanguageRequest(BaseModel):
+    video_file_url: HttpUrl = Field(..., description="URL of the video file for which sign language interpretation is requested.")
+    targeted_sign_language: str = Field(..., description="The sign language (e.g., ASL) for the interpretation.")
+    callback_url: Optional[HttpUrl] = Field(None, description="URL to POST a completion event to when the job finishes.")
+
+class SignLanguageResponse(BaseModel):
+    sign_language_video_url: HttpUrl = Field(..., description="URL to the video featuring sign language interpretation.")
+
+class SpeechToTextPayload(BaseModel):
+    audio_file_url: HttpUrl = Field(..., description="URL of the audio file to be transcribed.")
+    language: str = Field(..., description="Language of the audio content.")
+
+class SpeechToTextResponse(BaseModel):
+    transcript: str = Field(..., description="Transcribed text from the audio content.")
+
+class ScreenReaderOptimizationPayload(BaseModel):
+    content_id: str = Field(..., description="Unique identifier for the content.")
+    specific_enhancements: dict = Field(..., description="Details of the specific enhancements requested for screen reader optimization.")
+
+class ScreenReaderOptimizationResponse(BaseModel):
+    message: str = Field(..., description="Confirmation of the optimization process.")
+
+class SignLanguageCacheStatsResponse(BaseModel):
+    entries: int = Field(..., description="Gloss clips and transition blends currently cached.")
+    bytes: int = Field(..., description="Memory held by cached pose tracks.")
+    max_bytes: int = Field(..., description="Size bound of the clip cache.")
+    hits: int = Field(..., description="Clip and transition lookups served from the cache.")
+    misses: int = Field(..., description="Clip and transition lookups that had to be rendered.")
+    evictions: int = Field(..., description="Entries evicted to stay within the size bound.")
+    hit_rate: float = Field(..., description="Fraction of lookups served from the cache.")
+    render_seconds: float = Field(..., description="Time spent rendering clips and transitions.")
+    render_seconds_saved: float = Field(..., description="Render time avoided by cache hits.")
+
+class ResultCacheStatsResponse(BaseModel):
+    entries: int = Field(..., description="Completed enhancement results currently cached.")
+    max_entries: int = Field(..., description="Size bound of the result cache.")
+    in_flight: int = Field(..., description="Distinct enhancement computations running now.")
+    executions: int = Field(..., description="Requests that started a computation.")
+    coalesced: int = Field(..., description="Requests that attached to an identical in-flight computation.")
+    cache_hits: int = Field(..., description="Requests served from the result cache.")
+    evictions: int = Field(..., description="Results evicted to stay within the size bound.")
+    duplicate_work_avoided_ratio: float = Field(..., description="Fraction of requests that did not start a computation.")
+    seconds_saved: float = Field(..., description="Computation time avoided by coalescing and cache hits.")
+
+class AltTextCacheStatsResponse(BaseModel):
+    images_indexed: int = Field(..., description="Distinct perceptual hashes with stored alt text.")
+    max_distance: int = Field(..., description="Hamming distance (bits) under which images count as near-duplicates.")
+    lookups: int = Field(..., description="Images looked up in the index.")
+    generation_calls: int = Field(..., description="Alt texts that had to be generated.")
+    generation_calls_avoided: int = Field(..., description="Alt texts reused from a near-duplicate image.")
+    reuse_rate: float = Field(..., description="Fraction of lookups served by reuse.")
+
+class ResidentModel(BaseModel):
+    kind: str = Field(..., description="Model kind (text_to_speech, video_captioning, speech_to_text, sign_language).")
+    variant: str = Field(..., description="Language, voice or sign language the model serves.")
+    size_bytes: int = Field(..., description="Memory the model holds.")
+    in_use: int = Field(..., description="Requests holding the model now.")
+
+class ModelRegistryStatsResponse(BaseModel):
+    resident: List[ResidentModel] = Field(..., description="Resident models, least recently used first.")
+    resident_bytes: int = Field(..., description="Memory held by resident models.")
+    max_bytes: int = Field(..., description="Model memory budget.")
+    loading: int = Field(..., description="Models loading now.")
+    hits: int = Field(..., description="Lookups served by a resident model.")
+    waits: int = Field(..., description="Lookups that joined a load already in progress.")
+    loads: int = Field(..., description="Models loaded.")
+    evictions: int = Field(..., description="Models evicted to stay within the memory budget.")
+    load_failures: int = Field(..., description="Model loads that failed.")
+    over_budget_loads: int = Field(..., description="Loads made over budget because every resident model was in use.")
+
+@router.post("/enhancements/text-to-speech",
+             response_model=TextToSpeechResponse,
+             summary="Text to Speech Conversion",
+             description="Converts text within documents or web content to spoken audio, facilitating auditory access for users with visual impairments.")
+async def text_to_speech(request: TextToSpeechRequest = Body(...)):
+    """
+    Converts text within documents or web content to spoken audio, facilitating auditory access for users with visual impairments.
+
+    - **content_id**: The unique identifier of the content to be converted to speech.
+    - **language**: The language of the text to be converted (default is "en").
+    - **voice_type**: The type of voice to use for the speech synthesis (default is "default").
+    """
+    # Placeholder audio until a speech synthesis backend is wired in
+    language = model_registry.normalize_language(request.language)
+
+    async def synthesize():
+        return await job_scheduler.scheduler.run("text_to_speech", lambda: model_registry.registry.holding(
+            "text_to_speech", f"{language}/{request.voice_type}",
+            lambda: placeholder_artifacts.text_to_speech(request.content_id, language, request.voice_type)))
+
+    audio_url = await webhooks.dispatcher.run_with_callback(
+        request.callback_url, "enhancement.completed", {"operation": "text_to_speech", "content_id": request.content_id},
+        coalescing.coalescer.run(
+            "text_to_speech", {"content_id": request.content_id, "language": language,
+                               "voice_type": request.voice_type}, synthesize))
+    return {"audio_url": audio_url}
+
+@router.post("/enhancements/text-to-speech/stream", response_class=StreamingResponse,
+             summary="Streaming Text to Speech",
+             description="Speaks text chunk by chunk and streams the audio as one WAV, so playback can start as soon as the first sentence is synthesized.")
+async def text_to_speech_stream(request: TextToSpeechStreamRequest = Body(...)):
+    """
+    The text is split at paragraph and sentence boundaries and the chunks are synthesized concurrently; the
+    response carries them in order. Chunks already synthesized for any earlier request are reused.
+    """
+    try:
+        chunks, audio = await speech_streaming.streamer.open(request.text, request.language, request.voice_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(audio, media_type="audio/wav", headers={"X-Speech-Chunks": str(chunks)})
+
+@router.post("/enhancements/video-captioning")
+async def video_captioning(request: VideoCaptioningRequest):
+    async def caption():
+        source = await _local(request.video_file_url)
+        info = media_pipeline.probe(source)
+        return await job_scheduler.scheduler.run(
+            "video_captioning", lambda: model_registry.registry.holding(
+                "video_captioning", model_registry.normalize_language(request.language),
+                lambda: placeholder_artifacts.video_captions(source, request.language.value)),
+            duration=info.duration, size_bytes=info.size_bytes)
+
+    captions_url = await webhooks.dispatcher.run_with_callback(
+        request.callback_url, "enhancement.completed",
+        {"operation": "video_captioning", "video_file_url": request.video_file_url},
+        coalescing.coalescer.run(
+            "video_captioning", request.model_dump(exclude={"callback_url"}), caption))
+    return {"captioned_video_url": captions_url}
+
+async def _describe(request: DescriptiveAudioRequest) -> str:
+    video_file_url = str(request.video_file_url)
+
+    async def describe():
+        source = await _local(video_file_url)
+        info = media_pipeline.probe(source)
+        return await job_scheduler.scheduler.run(
+            "descriptive_audio", lambda: media_pipeline.descriptive_audio(source, request.specificity),
+            duration=info.duration, size_bytes=info.size_bytes)
+
+    return await webhooks.dispatcher.run_with_callback(
+        request.callback_url, "enhancement.completed",
+        {"operation": "descriptive_audio", "video_file_url": video_file_url}, describe())
+
+@router.post("/enhancements/video/descriptive-audio")
+async def descriptive_audio(request: DescriptiveAudioRequest):
+    return {"descriptive_audio_url": await _describe(request)}
+
+
+@router.post("/enhancements/video/instructional-accessibility",
+             response_model=InstructionalAccessibilityResponse,
+             summary="Enhance Instructional Videos",
+             description="Enhances instructional videos with AI-generated sign language interpretation and descriptive audio tracks to ensure comprehensive accessibility.")
+async def enhance_instructional_videos(request: InstructionalAccessibilityRequest = Body(...)):
+    """
+    Enhances instructional videos with AI-generated sign language interpretation and descriptive audio tracks to ensure comprehensive accessibility.
+
+    - **video_file_url**: URL to the video file.
+    - **sign_language**: Options for sign language, e.g., ASL, BSL.
+    - **descriptive_audio_details**: Details for the descriptive audio track, including level of detail and specific areas of focus.
+    """
+    video_file_url = str(request.video_file_url)
+    sign_language = sign_rendering.normalize_sign_language(request.sign_language)
+
+    async def enhance():
+        source = await _local(video_file_url)
+        info = media_pipeline.probe(source)
+        sign_language_video_url, descriptive_audio_url = await job_scheduler.scheduler.run(
+            "instructional_accessibility", lambda: model_registry.registry.holding(
+                "sign_language", sign_language,
+                lambda: media_pipeline.instructional_accessibility(source, sign_language,
+                                                                   request.descriptive_audio_details)),
+            duration=info.duration, size_bytes=info.size_bytes)
+        return {
+            "sign_language_video_url": sign_language_video_url,
+            "descriptive_audio_url": descriptive_audio_url
+        }
+
+    return await webhooks.dispatcher.run_with_callback(
+        request.callback_url, "enhancement.completed",
+        {"operation": "instructional_accessibility", "video_file_url": video_file_url}, enhance())
+
+
+@router.post("/enhancements/sign-language", response_model=SignLanguageResponse,
+             summary="Sign Language Interpretation",
+             description="Provides sign language interpretation for video content through AI-generated avatars, catering to users who rely on sign language.")
+async def sign_language_video(request: SignLanguageRequest = Body(...)):
+    """
+    Provides sign language interpretation for video content through AI-generated avatars, catering to users who rely on sign language.
+    """
+    video_file_url = str(request.video_file_url)
+    sign_language = sign_rendering.normalize_sign_language(request.targeted_sign_language)
+
+    async def render():
+        source = await _local(video_file_url)
+        info = media_pipeline.probe(source)
+        return await job_scheduler.scheduler.run(
+            "sign_language", lambda: model_registry.registry.holding(
+                "sign_language", sign_language,
+                lambda: media_pipeline.sign_language_video(source, sign_language)),
+            duration=info.duration, size_bytes=info.size_bytes)
+
+    sign_language_video_url = await webhooks.dispatcher.run_with_callback(
+        request.callback_url, "enhancement.completed",
+        {"operation": "sign_language", "video_file_url": video_file_url, "sign_language": sign_language},
+        coalescing.coalescer.run(
+            "sign_language", {"video_file_url": video_file_url, "sign_language": sign_language}, render))
+    return {"sign_language_video_url": sign_language_video_url}
+
+@router.get("/enhancements/sign-language/cache-stats", response_model=SignLanguageCacheStatsResponse,
+            summary="Sign Language Clip Cache Statistics",
+            description="Reports hit rate and render time saved by the gloss-to-animation clip cache.")
+async def sign_language_cache_stats():
+    return sign_rendering.clip_cache.stats()
+
+@router.get("/enhancements/result-cache/stats", response_model=ResultCacheStatsResponse,
+            summary="Enhancement Result Cache Statistics",
+            description="Reports how many identical enhancement requests were coalesced or served from the result cache.")
+async def result_cache_stats():
+    return coalescing.coalescer.stats()
+
+@router.post("/enhancements/audio-description", response_model=DescriptiveAudioResponse,
+             summary="Audio Description for Archived Content",
+             description="Generates audio descriptions for archived audio and video content, aiding users with hearing impairments.")
+async def audio_description(request: DescriptiveAudioRequest = Body(...)):
+    """
+    Generates audio descriptions for archived audio and video content, aiding users with hearing impairments.
+    """
+    return {"descriptive_audio_url": await _describe(request)}
+
+@router.post("/enhancements/speech-to-text", response_model=SpeechToTextResponse,
+             summary="Speech to Text Conversion",
+             description="Transcribes audio content to text, supporting content accessibility for hearing-impaired users.")
+async def speech_to_text(payload: SpeechToTextPayload = Body(...)):
+    # Placeholder transcript until a speech recognition backend is wired in
+    info = media_pipeline.probe(await _local(payload.audio_file_url))
+    return await job_scheduler.scheduler.run(
+        "speech_to_text", lambda: model_registry.registry.holding(
+            "speech_to_text", model_registry.normalize_language(payload.language),
+            lambda: {"transcript": "Transcribed text goes here"}),
+        duration=info.duration, size_bytes=info.size_bytes)
+
+@router.post("/enhancements/screen-reader-optimization", response_model=ScreenReaderOptimizationResponse,
+             summary="Screen Reader Content Optimization",
+             description="Applies screen-reader-friendly tags and alternative text to content, enhancing accessibility for visually impaired users.")
+async def screen_reader_optimization(payload: ScreenReaderOptimizationPayload = Body(...)):
+    try:
+        enhancements = html_rewriter.parse_enhancements(payload.specific_enhancements)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": f"Screen reader optimization applied successfully: {', '.join(sorted(enhancements))}"}
+
+@router.post("/enhancements/screen-reader-optimization/html", response_class=html_rewriter.RewriteStreamingResponse,
+             summary="Stream Screen Reader Optimized HTML",
+             description="Rewrites an uploaded HTML document in a single streaming pass, adding ARIA roles, landmarks, normalized headings and alt text.")
+async def screen_reader_optimization_html(request: Request, enhancements: List[str] = Query(None)):
+    """
+    The request body is the HTML document; the rewritten document is streamed back as it is produced.
+
+    - **enhancements**: Any of aria_roles, landmarks, heading_normalization, alt_text (default: all).
+    """
+    try:
+        enabled = html_rewriter.parse_enhancements(dict.fromkeys(enhancements or (), True))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    rewriter = html_rewriter.HtmlRewriter(enabled, alt_text=image_hashing.alt_text_for_src)
+    return html_rewriter.RewriteStreamingResponse(rewriter)
+
+
+@router.get("/enhancements/alt-text/cache-stats", response_model=AltTextCacheStatsResponse,
+            summary="Alt Text Reuse Statistics",
+            description="Reports how many alt-text generation calls were avoided by reusing text from near-duplicate images.")
+async def alt_text_cache_stats():
+    return image_hashing.alt_text_index.stats()
+
+
+@router.get("/enhancements/models", response_model=ModelRegistryStatsResponse,
+            summary="Resident Model Statistics",
+            description="Lists the speech, captioning and sign language models in memory and reports loads and evictions under the memory budget.")
+async def model_registry_stats():
+    return model_registry.registry.stats()
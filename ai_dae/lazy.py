@@ -0,0 +1,85 @@
+"""
+Deferred imports for the heavy subsystems.
+
+The media pipeline, placeholder PDF/braille/audio generation, sign
+rendering and perceptual image hashing all pull in numpy, and webhook
+delivery and source fetching pull in httpx. Routers reach them through ``module(name)``, a
+stand-in that imports the real module the first time one of its
+attributes is read, so a freshly started worker serves its first request
+without loading any of them and only ever loads the ones its traffic uses.
+
+Collectors and probes for lazy modules report nothing until the module has
+been loaded, and their snapshot sections are left out of snapshots until
+then; ``metric_samples`` reports how long each load took.
+"""
+import importlib
+import sys
+import time
+from typing import Callable, Dict, Iterable
+
+import snapshots
+
+_proxies: Dict[str, "LazyModule"] = {}
+load_seconds: Dict[str, float] = {}
+
+
+class LazyModule:
+    """Stands in for module ``name``; the first attribute read imports it."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            start = time.perf_counter()
+            module = self._module = importlib.import_module(self._name)
+            load_seconds.setdefault(self._name, time.perf_counter() - start)
+        return module
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None or self._name in sys.modules
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        return f"<lazy module {self._name!r}{'' if self.loaded else ' (not loaded)'}>"
+
+
+def module(name: str) -> LazyModule:
+    """The shared stand-in for module ``name``."""
+    proxy = _proxies.get(name)
+    if proxy is None:
+        proxy = _proxies[name] = LazyModule(name)
+    return proxy
+
+
+def collector(name: str) -> Callable[[], Iterable]:
+    """``name.metric_samples`` once the module is loaded, without loading it for a scrape."""
+    proxy = module(name)
+    return lambda: proxy.metric_samples() if proxy.loaded else []
+
+
+def probe(name: str, read: Callable[[LazyModule], int]) -> Callable[[], int]:
+    """``read(module)`` once the module is loaded, else 0."""
+    proxy = module(name)
+    return lambda: read(proxy) if proxy.loaded else 0
+
+
+def section(name: str, section_name: str) -> snapshots.Section:
+    """``name.snapshot_section`` once the module is loaded; restoring the section loads the module."""
+    proxy = module(name)
+    return snapshots.Section(section_name, lambda: proxy.snapshot_section.dump() if proxy.loaded else None,
+                             lambda payload: proxy.snapshot_section.load(payload))
+
+
+def metric_samples():
+    return [
+        ("aidae_lazy_module_loaded", "gauge", "Whether a lazily imported module has been loaded.",
+         [({"module": name}, int(proxy.loaded)) for name, proxy in sorted(_proxies.items())]),
+        ("aidae_lazy_module_load_seconds", "gauge", "Time spent importing a lazily imported module.",
+         [({"module": name}, seconds) for name, seconds in sorted(load_seconds.items())]),
+    ]
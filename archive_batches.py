@@ -0,0 +1,158 @@
+"""
+Archive batch processing on the shared job queue.
+
+``POST /archives/content/ingest`` lists the archive's items and enqueues
+one job per item in ``shared_state``; every worker process runs a
+``BatchRunner`` that claims jobs from the shared queue, processes them in a
+thread and records the result, so a batch is spread over all workers and
+``/archives/content/status`` reads the same progress from any of them.
+When the last item of a batch completes, the worker that completed it
+posts ``archive.completed`` to the batch's callback URL, if any.
+
+Each worker starts its runner when the app starts (``create_app``'s
+lifespan), so jobs queued by any worker, or left unfinished by one that
+died, are picked up without waiting for a request. When the queue is empty
+a runner sleeps until a local enqueue wakes it or ``poll_interval`` passes
+(to notice jobs enqueued by other workers). Store calls run in threads,
+off the event loop. ``AI_DAE_BATCH_CONCURRENCY=0`` makes a process
+API-only: it enqueues and reports but never claims jobs.
+"""
+import asyncio
+import hashlib
+import os
+import socket
+from typing import Dict, List, Optional
+
+import progress_stream
+from ai_dae import lazy
+from artifact_store import store
+from shared_state import StateStore, state
+
+# numpy and httpx load with the first item processed or webhook sent, not when the runner starts with the worker
+placeholder_artifacts = lazy.module("placeholder_artifacts")
+webhooks = lazy.module("webhooks")
+
+DEFAULT_CONCURRENCY = int(os.environ.get("AI_DAE_BATCH_CONCURRENCY", "2"))
+DEFAULT_POLL_INTERVAL = float(os.environ.get("AI_DAE_BATCH_POLL_INTERVAL", "0.2"))
+DEFAULT_LEASE = float(os.environ.get("AI_DAE_BATCH_LEASE", "60"))
+JOB_COUNTS_INTERVAL = 1.0  # seconds between refreshes of the queue counts reported as metrics
+
+
+def _fraction(key: str) -> float:
+    return int.from_bytes(hashlib.sha256(key.encode()).digest()[:4], "little") / 2 ** 32
+
+
+def archive_items(archive_id: str, source: str) -> List[str]:
+    """
+    Placeholder archive listing until archive connectors are wired in: 20-200
+    items per archive. ``source`` is the archive's manifest, a local path
+    once it has been fetched (``source_fetch.local_source``).
+    """
+    count = 20 + int(_fraction(f"{archive_id}|{source}") * 181)
+    return [f"{archive_id}-{n:05d}" for n in range(1, count + 1)]
+
+
+def process_item(item_id: str) -> bool:
+    """
+    Placeholder item processing until archive connectors are wired in: render
+    the item's text as braille and a tagged PDF. Returns whether the item
+    needs manual review.
+    """
+    text = " ".join(f"Page {page} of archived item {item_id}." for page in range(1, 121))
+    store.put(placeholder_artifacts.braille_ready(text), ".brf")
+    store.put(placeholder_artifacts.tagged_pdf(item_id, text), ".pdf")
+    return _fraction(item_id) < 0.05
+
+
+class BatchRunner:
+    def __init__(self, shared: StateStore = state, concurrency: int = DEFAULT_CONCURRENCY,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL, lease: float = DEFAULT_LEASE):
+        self.shared = shared
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.processed = 0
+        self.flagged = 0
+        self.failed = 0
+        self.job_counts: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    @property
+    def worker(self) -> str:
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def start(self):
+        """Start claiming jobs on the running loop (once per loop)."""
+        if self.concurrency <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._wake = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    async def stop(self):
+        """Stop claiming; jobs claimed but not completed are claimed again once their lease runs out."""
+        task, self._task = self._task, None
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def notify(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self):
+        worker = self.worker
+        loop = asyncio.get_running_loop()
+        counts_due = 0.0
+        while True:
+            if loop.time() >= counts_due:
+                self.job_counts = await asyncio.to_thread(self.shared.job_counts)
+                counts_due = loop.time() + JOB_COUNTS_INTERVAL
+            jobs = await asyncio.to_thread(self.shared.claim_jobs, worker, self.concurrency, self.lease)
+            if not jobs:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            results = await asyncio.gather(
+                *(asyncio.to_thread(process_item, item_id) for _, _, item_id in jobs),
+                return_exceptions=True)
+            for (job_id, _, _), result in zip(jobs, results):
+                if isinstance(result, Exception):
+                    self.failed += 1
+                    result = True  # a human has to look at items that could not be processed
+                batch = await asyncio.to_thread(self.shared.complete_job, job_id, worker, manual_review=result)
+                if batch is not None:
+                    self.processed += 1
+                    self.flagged += bool(result)
+                    if batch["completed"] == batch["total"]:
+                        await self._batch_completed(batch)
+
+    async def _batch_completed(self, batch: dict):
+        # Exactly one worker sees the last item complete, so the event is emitted once.
+        progress_stream.hub.notify(batch["batch_id"])
+        status = await asyncio.to_thread(self.shared.batch_status, batch["batch_id"])
+        webhooks.dispatcher.emit(batch["callback_url"], "archive.completed", {
+            "batch_process_id": batch["batch_id"], "status": "completed", "items_total": batch["total"],
+            "manual_review_needed": status["manual_review_needed"]})
+
+
+runner = BatchRunner()
+
+
+def metric_samples():
+    counts = runner.job_counts  # refreshed by the runner; counting the queue is a store read
+    return [
+        ("aidae_batch_jobs", "gauge", "Archive batch jobs in the shared queue, by state.",
+         [({"state": s}, counts.get(s, 0)) for s in ("queued", "running", "done")]),
+        ("aidae_batch_items_processed_total", "counter", "Archive items processed by this worker.",
+         [({}, runner.processed)]),
+        ("aidae_batch_items_flagged_total", "counter", "Processed items flagged for manual review by this worker.",
+         [({}, runner.flagged)]),
+        ("aidae_batch_items_failed_total", "counter", "Items whose processing raised, by this worker.",
+         [({}, runner.failed)]),
+    ]
@@ -0,0 +1,152 @@
+"""
+Local content-addressed artifact store and its download endpoint.
+
+Artifacts (generated audio, video, captions, converted documents) are
+stored under their SHA-256, sharded two levels deep
+(``root/ab/cd/abcd....mp3``) so no directory grows unboundedly. Writers
+stream into a temporary file in the same filesystem, fsync it, then
+``os.replace`` it into place, so readers only ever see complete files and
+identical content is stored once.
+
+``GET /artifacts/{artifact_id}`` serves files without reading them into
+memory: a full response is handed to the server as a path (ASGI
+``pathsend``) when supported, Range requests stream only the requested
+bytes, and the content hash doubles as a strong ETag so conditional GETs
+and If-Range work without touching the file. Behind nginx, set
+``AI_DAE_ARTIFACT_ACCEL_REDIRECT`` to let it ``sendfile`` the bytes instead.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+from typing import BinaryIO, Iterable, Optional
+
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+
+import conditional
+
+DEFAULT_ROOT = os.environ.get("AI_DAE_ARTIFACT_DIR", "artifacts")
+PUBLIC_BASE_URL = os.environ.get("AI_DAE_PUBLIC_BASE_URL", "http://127.0.0.1:8000").rstrip("/")
+ACCEL_REDIRECT_PREFIX = os.environ.get("AI_DAE_ARTIFACT_ACCEL_REDIRECT")
+ARTIFACT_ID = re.compile(r"^([0-9a-f]{64})((?:\.[a-z0-9]{1,8}){0,2})$")
+CACHE_CONTROL = "public, max-age=31536000, immutable"  # content-addressed: a URL never changes meaning
+
+mimetypes.add_type("text/vtt", ".vtt")
+mimetypes.add_type("application/x-braille-ready", ".brf")
+mimetypes.add_type("application/x-npy", ".npy")
+
+
+class ArtifactStore:
+    def __init__(self, root: str = DEFAULT_ROOT, fsync: bool = True):
+        self.root = root
+        self.fsync = fsync
+        self.writes = 0
+        self.deduplicated = 0
+        self.bytes_written = 0
+
+    def path(self, artifact_id: str) -> str:
+        match = ARTIFACT_ID.match(artifact_id)
+        if match is None:
+            raise ValueError(f"Invalid artifact id: {artifact_id!r}")
+        digest = match.group(1)
+        return os.path.join(self.root, digest[:2], digest[2:4], artifact_id)
+
+    def exists(self, artifact_id: str) -> bool:
+        return os.path.exists(self.path(artifact_id))
+
+    def put(self, data: bytes, extension: str) -> str:
+        return self.put_stream((data,), extension)
+
+    @property
+    def temp_dir(self) -> str:
+        """Spool directory on the store's filesystem, for files on their way in."""
+        temp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(temp_dir, exist_ok=True)
+        return temp_dir
+
+    def put_stream(self, chunks: Iterable[bytes], extension: str) -> str:
+        """Store the concatenation of ``chunks``; returns its artifact id (``<sha256><extension>``)."""
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=self.temp_dir)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+                if self.fsync:
+                    out.flush()
+                    os.fsync(out.fileno())
+            return self.adopt(temp_path, digest.hexdigest(), size, extension)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def adopt(self, temp_path: str, hexdigest: str, size: int, extension: str) -> str:
+        """
+        Move a complete, already synced spool file under ``temp_dir`` into
+        place as ``<hexdigest><extension>``; returns the artifact id.
+        """
+        artifact_id = hexdigest + extension
+        final_path = self.path(artifact_id)
+        if os.path.exists(final_path):
+            self.deduplicated += 1
+            os.unlink(temp_path)
+            return artifact_id
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(temp_path, final_path)
+        self.writes += 1
+        self.bytes_written += size
+        return artifact_id
+
+    def put_file(self, source: BinaryIO, extension: str, chunk_size: int = 1 << 20) -> str:
+        return self.put_stream(iter(lambda: source.read(chunk_size), b""), extension)
+
+    def url(self, artifact_id: str) -> str:
+        return f"{PUBLIC_BASE_URL}/artifacts/{artifact_id}"
+
+
+class ArtifactResponse(FileResponse):
+    chunk_size = 256 * 1024
+
+
+store = ArtifactStore()
+
+
+def install(app: FastAPI, artifact_store: ArtifactStore = store):
+    """Add ``GET/HEAD /artifacts/{artifact_id}`` serving from ``artifact_store``."""
+
+    @app.api_route("/artifacts/{artifact_id}", methods=["GET", "HEAD"], response_class=ArtifactResponse,
+                   summary="Download Artifact",
+                   description="Serves a generated artifact with Range, ETag and conditional GET support.")
+    async def download_artifact(artifact_id: str, request: Request):
+        try:
+            path = artifact_store.path(artifact_id)
+            stat = os.stat(path)
+        except (ValueError, FileNotFoundError):
+            raise HTTPException(status_code=404, detail="Artifact not found")
+        etag = f'"{artifact_id.split(".", 1)[0]}"'
+        headers = {"etag": etag, "cache-control": CACHE_CONTROL}
+        if conditional.not_modified(request, etag, stat.st_mtime):
+            return Response(status_code=304, headers=headers)
+        media_type = mimetypes.guess_type(artifact_id)[0] or "application/octet-stream"
+        if ACCEL_REDIRECT_PREFIX:
+            # nginx serves the file (sendfile, ranges) from an internal location mapped to the store root.
+            relative = os.path.relpath(path, artifact_store.root).replace(os.sep, "/")
+            headers["x-accel-redirect"] = ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + relative
+            return Response(media_type=media_type, headers=headers)
+        return ArtifactResponse(path, media_type=media_type, headers=headers, stat_result=stat)
+
+
+def metric_samples():
+    return [
+        ("aidae_artifacts_written_total", "counter", "Artifacts written to the store.", [({}, store.writes)]),
+        ("aidae_artifacts_deduplicated_total", "counter", "Artifact writes that matched stored content.",
+         [({}, store.deduplicated)]),
+        ("aidae_artifact_bytes_written_total", "counter", "Bytes written to the artifact store.",
+         [({}, store.bytes_written)]),
+    ]
@@ -0,0 +1,180 @@
+"""
+Source fetching against local stand-in origins: naive per-request downloads vs. ``SourceFetcher``.
+
+Each origin is a small ASGI app under uvicorn on its own loopback port (so
+each is a separate host to the fetcher), in the same event loop. It serves
+``--files`` media files of ``--size-kib`` KiB spread over ``--hosts``
+origins. Responses carry an ``ETag``, ``Last-Modified`` and
+``Cache-Control: max-age``, and the origin honours ``Range``/``If-Range`` and
+``If-None-Match``. A ``--drop-rate`` fraction of responses is cut off
+halfway through the body. The runs are:
+
+* naive: a new client per URL, the whole body read into memory, and a retry
+  from the first byte when the connection drops;
+* pooled: ``SourceFetcher``, streaming into the store and resuming drops;
+* revalidated: every URL again once ``max-age`` has passed (304s);
+* fresh: every URL again within ``max-age`` (no requests).
+
+The report gives wall time, body bytes the origins sent, the most
+concurrent requests any one origin saw, and the fetcher's counters.
+
+    python benchmarks/bench_fetch.py --files 200 --size-kib 2048 --hosts 4 --drop-rate 0.2
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import socket
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+os.environ.setdefault("AI_DAE_ARTIFACT_DIR", tempfile.mkdtemp(prefix="aidae-fetch-"))
+
+import httpx
+import uvicorn
+
+import artifact_store
+import source_fetch
+
+LAST_MODIFIED = "Mon, 05 Oct 2026 09:00:00 GMT"
+_RANGE = re.compile(r"^bytes=(\d+)-$")
+
+
+class Origin:
+    def __init__(self, blob: bytes, drop_rate: float, seed: int):
+        self.blob = blob
+        self.drop_rate = drop_rate
+        self.max_age = 0
+        self.rng = random.Random(seed)
+        self.reset()
+
+    def reset(self):
+        self.active = 0
+        self.peak = 0
+        self.requests = 0
+        self.bytes_sent = 0
+
+    def body(self, n: int) -> bytes:
+        return n.to_bytes(8, "little") + self.blob[8:]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        self.requests += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await self._respond(scope, send)
+        finally:
+            self.active -= 1
+
+    async def _respond(self, scope, send):
+        n = int(scope["path"].rsplit("/", 1)[-1].split(".")[0])
+        headers = dict(scope["headers"])
+        etag = f'"v1-{n}"'.encode()
+        common = [(b"etag", etag), (b"last-modified", LAST_MODIFIED.encode()),
+                  (b"cache-control", b"max-age=%d" % self.max_age), (b"accept-ranges", b"bytes")]
+        if headers.get(b"if-none-match") == etag:
+            await send({"type": "http.response.start", "status": 304, "headers": common})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        body = self.body(n)
+        status, start = 200, 0
+        match = _RANGE.match(headers.get(b"range", b"").decode())
+        if match and headers.get(b"if-range", etag) == etag and int(match.group(1)) < len(body):
+            status, start = 206, int(match.group(1))
+            common.append((b"content-range", f"bytes {start}-{len(body) - 1}/{len(body)}".encode()))
+        payload = memoryview(body)[start:]
+        await send({"type": "http.response.start", "status": status, "headers": common + [
+            (b"content-type", b"video/mp4"), (b"content-length", str(len(payload)).encode())]})
+        cut = len(payload) // 2 if len(payload) > 65536 and self.rng.random() < self.drop_rate else None
+        for offset in range(0, len(payload) if cut is None else cut, 65536):
+            block = payload[offset:offset + 65536 if cut is None else min(offset + 65536, cut)]
+            self.bytes_sent += len(block)
+            await send({"type": "http.response.body", "body": bytes(block), "more_body": True})
+            await asyncio.sleep(0)  # let other requests interleave, as a network-bound origin would
+        if cut is None:
+            await send({"type": "http.response.body", "body": b""})
+        # else: return with the body unfinished, so the server drops the connection
+
+
+async def naive(urls, attempts: int = 20):
+    async def one(url):
+        for _ in range(attempts):
+            try:
+                async with httpx.AsyncClient(timeout=30.0) as client:
+                    response = await client.get(url)
+                    response.raise_for_status()
+            except httpx.HTTPError:
+                continue
+            return await asyncio.to_thread(artifact_store.store.put, response.content, ".mp4")
+        raise RuntimeError(f"{url} failed {attempts} times")
+
+    return await asyncio.gather(*(one(url) for url in urls))
+
+
+async def run(label: str, origins, work):
+    for origin in origins:
+        origin.reset()
+    start = time.monotonic()
+    results = await work
+    elapsed = time.monotonic() - start
+    sent = sum(o.bytes_sent for o in origins)
+    print(f"{label:12s} {elapsed:7.2f} s  {sum(o.requests for o in origins):6d} requests  "
+          f"{sent / 2 ** 20:8.1f} MiB sent  peak per origin {max(o.peak for o in origins):4d}")
+    return results
+
+
+async def main_async(args):
+    blob = random.Random(args.seed).randbytes(args.size_kib * 1024)
+    origins, servers, bases = [], [], []
+    for h in range(args.hosts):
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        origin = Origin(blob, args.drop_rate, args.seed + h)
+        server = uvicorn.Server(uvicorn.Config(origin, host="127.0.0.1", port=port, log_level="critical",
+                                               access_log=False))
+        servers.append((server, asyncio.create_task(server.serve())))
+        origins.append(origin)
+        bases.append(f"http://127.0.0.1:{port}")
+    while not all(server.started for server, _ in servers):
+        await asyncio.sleep(0.01)
+    urls = [f"{bases[n % args.hosts]}/media/{n}.mp4" for n in range(args.files)]
+    print(f"{args.files} files of {args.size_kib} KiB on {args.hosts} origins, {args.drop_rate:.0%} of responses "
+          f"cut off halfway")
+
+    expected = await run("naive", origins, naive(urls))
+    fetcher = source_fetch.SourceFetcher(max_per_host=args.max_per_host, base_backoff=0.01, max_backoff=0.2,
+                                         max_attempts=20)
+    fetched = await run("pooled", origins, asyncio.gather(*(fetcher.fetch(url) for url in urls)))
+    assert [f.artifact_id for f in fetched] == expected, "fetched bytes differ from the origin's"
+    for origin in origins:
+        origin.max_age = 3600  # the 304s make the cached copies fresh for an hour
+    await run("revalidated", origins, asyncio.gather(*(fetcher.fetch(url) for url in urls)))
+    await run("fresh", origins, asyncio.gather(*(fetcher.fetch(url) for url in urls)))
+    print(f"fetcher: {fetcher.counts}, retries {fetcher.retries}, "
+          f"{fetcher.bytes_received / 2 ** 20:.1f} MiB received")
+    await fetcher.aclose()
+    for server, serving in servers:
+        server.should_exit = True
+        await serving
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--size-kib", type=int, default=2048)
+    parser.add_argument("--hosts", type=int, default=4)
+    parser.add_argument("--max-per-host", type=int, default=source_fetch.DEFAULT_MAX_PER_HOST)
+    parser.add_argument("--drop-rate", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Streaming HTML rewriter throughput on a generated multi-hundred-megabyte export.
+
+    python benchmarks/bench_html_rewriter.py --mb 300 --chunk-kb 64
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import html_rewriter
+
+SECTION = """<div class="content-block" id="s{n}">
+<h3 class="title">Chapter {n}</h3>
+<p>Lorem ipsum dolor sit amet, <a href="/ref/{n}">consectetur</a> adipiscing elit. Integer nec odio.
+Praesent libero. Sed cursus ante dapibus diam. <em>Sed nisi.</em> Nulla quis sem at nibh elementum.
+Duis sagittis ipsum. Praesent mauris. Fusce nec tellus sed augue semper porta. Mauris massa. Vestibulum
+lacinia arcu eget nulla. Class aptent taciti sociosqu ad litora torquent per conubia nostra, per inceptos
+himenaeos. Curabitur sodales ligula in libero. Sed dignissim lacinia nunc. Curabitur tortor. Pellentesque
+nibh. Aenean quam. In scelerisque sem at dolor. Maecenas mattis. Sed convallis tristique sem.</p>
+<p>Proin ut ligula vel nunc egestas porttitor. Morbi lectus risus, iaculis vel, suscipit quis, luctus non,
+massa. Fusce ac turpis quis ligula lacinia aliquet. Mauris ipsum. Nulla metus metus, ullamcorper vel,
+tincidunt sed, euismod in, nibh. Quisque volutpat condimentum velit. Class aptent taciti sociosqu ad litora
+torquent per conubia nostra, per inceptos himenaeos. Nam nec ante. Sed lacinia, urna non tincidunt mattis,
+tortor neque adipiscing diam, a cursus ipsum ante quis turpis. Nulla facilisi. Ut fringilla.</p>
+<img src="/figures/figure_{n}-scan.png" width="640" height="480">
+<table><tr><th>Year</th><th>Value</th></tr><tr><td>2020</td><td>{n}</td></tr></table>
+<h5>Notes</h5><ul><li>First point</li><li>Second point &amp; more</li></ul>
+<img src="/logo.svg" alt=""><script>var x = {n}; if (x < 3) {{ x++; }}</script>
+<section><header><h4>Aside {n}</h4></header><p>Sidebar text.</p></section>
+</div>
+"""
+HEAD = '<!doctype html><html><body><div id="masthead"><h2>Archive export</h2></div><nav><ul></ul></nav>\n'
+TAIL = '<div class="footer">Generated</div></body></html>\n'
+
+
+def document(total_bytes, chunk_bytes):
+    """Yield the document in ``chunk_bytes`` pieces without ever holding it whole."""
+    buf = bytearray(HEAD.encode())
+    produced = 0
+    n = 0
+    while produced < total_bytes:
+        while len(buf) < chunk_bytes:
+            buf += SECTION.format(n=n).encode()
+            n += 1
+        yield bytes(buf[:chunk_bytes])
+        produced += chunk_bytes
+        del buf[:chunk_bytes]
+    yield bytes(buf) + TAIL.encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mb", type=int, default=300)
+    parser.add_argument("--chunk-kb", type=int, default=64)
+    args = parser.parse_args()
+
+    chunks = list(document(8 * 1024 * 1024, args.chunk_kb * 1024))  # pre-generated block, reused
+    block = sum(len(c) for c in chunks)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    written = 0
+
+    def write(text):
+        nonlocal written
+        written += len(text.encode())
+
+    def stream():
+        for _ in range(max(1, args.mb * 1024 * 1024 // block)):
+            yield from chunks
+
+    start = time.perf_counter()
+    rewriter = html_rewriter.rewrite(stream(), write)
+    elapsed = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    mb = rewriter.bytes_in / 2 ** 20
+    print(f"input {mb:.0f} MiB in {args.chunk_kb} KiB chunks -> output {written / 2 ** 20:.0f} MiB")
+    print(f"throughput {mb / elapsed:.1f} MiB/s ({elapsed:.1f} s)")
+    print(f"peak RSS growth while rewriting {max(0, rss_after - rss_before) / 1024:.1f} MiB")
+    print("changes", rewriter.changes)
+
+
+if __name__ == "__main__":
+    main()
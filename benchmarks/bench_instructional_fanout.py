@@ -0,0 +1,61 @@
+"""
+Decode-once fan-out vs. calling the two enhancement endpoints back to back.
+
+    python benchmarks/bench_instructional_fanout.py --runs 5 --duration 30
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fastapi.testclient import TestClient
+
+import main5
+import media_pipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of synthetic video")
+    args = parser.parse_args()
+
+    decodes = 0
+    open_decoder = media_pipeline.open_decoder
+
+    def counting_decoder(url):
+        nonlocal decodes
+        decodes += 1
+        decoder = open_decoder(url)
+        decoder.duration = args.duration
+        return decoder
+
+    media_pipeline.open_decoder = counting_decoder
+    client = TestClient(main5.app)
+    video_file_url = "https://example.com/lectures/intro.mp4"
+
+    def sequential():
+        client.post("/enhancements/sign-language", json={
+            "video_file_url": video_file_url, "targeted_sign_language": "ASL"}).raise_for_status()
+        client.post("/enhancements/video/descriptive-audio", json={
+            "video_file_url": video_file_url, "specificity": "detailed"}).raise_for_status()
+
+    def fan_out():
+        client.post("/enhancements/video/instructional-accessibility", json={
+            "video_file_url": video_file_url, "sign_language": "ASL",
+            "descriptive_audio_details": {"level_of_detail": "detailed"}}).raise_for_status()
+
+    for name, run in (("sequential endpoints", sequential), ("decode-once fan-out", fan_out)):
+        run()
+        decodes = 0
+        start = time.perf_counter()
+        for _ in range(args.runs):
+            run()
+        elapsed = (time.perf_counter() - start) / args.runs
+        print(f"{name:22s} {elapsed * 1000:9.1f} ms/video  decodes/video={decodes / args.runs:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,537 @@
+"""
+Load test for every main5 route, in-process (ASGI) or over loopback HTTP.
+
+Each scenario is a weighted mix of requests with realistic payloads, driven
+by a fixed number of concurrent clients: ingest bursts, status polling
+storms, batch document conversions, compliance checks, feedback, the
+media enhancement routes and the books catalog. Reports throughput, p50/p95/p99 latency,
+requests shed by admission control (429/503) and process memory per
+scenario; ``--save`` writes the results as a JSON
+baseline and ``--baseline`` fails (exit 1) when throughput or tail latency
+regresses by more than ``--threshold``.
+
+    python benchmarks/bench_load.py --transport asgi --save baseline.json
+    python benchmarks/bench_load.py --transport loopback --baseline baseline.json --threshold 0.2
+"""
+import argparse
+import asyncio
+import contextlib
+import dataclasses
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Keep feedback and artifacts written by the load test out of the working directory.
+_scratch = tempfile.mkdtemp(prefix="aidae-load-")
+os.environ.setdefault("AI_DAE_FEEDBACK_LOG", os.path.join(_scratch, "feedback.jsonl"))
+os.environ.setdefault("AI_DAE_ARTIFACT_DIR", os.path.join(_scratch, "artifacts"))
+os.environ.setdefault("AI_DAE_STATE_DB", os.path.join(_scratch, "state.db"))
+# The load generator stands in for a gateway that has authenticated each virtual user's X-Client-Id.
+os.environ.setdefault("AI_DAE_TRUSTED_PROXIES", "127.0.0.1")
+# Archive items are processed in the background; keep that out of the request latencies measured here.
+os.environ.setdefault("AI_DAE_BATCH_CONCURRENCY", "0")
+
+import httpx
+from fastapi.routing import APIRoute
+
+import main5
+import media_pipeline
+
+EXCLUDED_ROUTES = {
+    "/admin/profile",  # blocks for the capture window by design
+    "/archives/content/status/{batchProcessId}/events",  # streams until the batch completes
+}
+STANDARDS = ["WCAG 2.1 Level AA", "WCAG 2.2 Level AA", "ADA", "Section 508", "EN 301 549"]
+SIGN_LANGUAGES = ["ASL", "BSL", "American Sign Language", "British Sign Language"]
+DETAIL_LEVELS = ["summary", "standard", "detailed"]
+SENTENCES = ["The lesson begins with a short review.", "Dr. Lee explains the main idea, step by step.",
+             "Each figure has a caption.", "Why does the curve flatten?", "Practice problems follow.\n\n"]
+
+
+# Workload
+@dataclass
+class State:
+    content_ids: List[int] = field(default_factory=lambda: [1, 2, 3])
+    artifact_paths: List[str] = field(default_factory=list)
+    batch_ids: List[str] = field(default_factory=list)
+    report_ids: List[str] = field(default_factory=list)
+    feedback_ids: List[str] = field(default_factory=lambda: ["1"])
+
+
+@dataclass
+class Op:
+    route: str
+    method: str
+    build: Callable[[random.Random, State], Tuple[str, dict]]  # -> (url, httpx request kwargs)
+    expected: Tuple[int, ...] = (200,)
+    on_response: Optional[Callable[[State, httpx.Response], None]] = None
+    variant: str = ""  # distinguishes several workloads on one route
+
+    @property
+    def key(self) -> str:
+        return f"{self.method} {self.route}" + (f" ({self.variant})" if self.variant else "")
+
+
+@dataclass
+class Scenario:
+    name: str
+    mix: List[Tuple[float, Op]]
+    requests: int
+    concurrency: int
+    setup: List[Op] = field(default_factory=list)  # run once, untimed, before the mix
+
+
+def _video(rng):
+    return f"https://media.example.org/lectures/{rng.randrange(40)}.mp4"
+
+
+def _html_page(rng):
+    parts = ["<html><head><title>Archive item</title><style>h1{color:#333}</style></head><body>",
+             "<div class='header'><img src='/static/logo@2x.png'></div><div class='nav'><a href='/'>Home</a></div>"]
+    for section in range(rng.randint(5, 30)):
+        parts.append(f"<h{rng.choice((1, 2, 4))}>Section {section}</h{rng.choice((1, 2, 4))}>")
+        parts.append("<p>" + "Accessible archival text. " * rng.randint(5, 40) + "</p>")
+        if rng.random() < 0.4:
+            parts.append(f"<img src='/figures/fig_{rng.randrange(50)}_640x480.png'>")
+    parts.append("<div class='footer'>Contact</div></body></html>")
+    return "".join(parts).encode()
+
+
+def _ingested(state: State, response: httpx.Response):
+    if response.status_code == 200:
+        state.content_ids.append(response.json()["content_id"])
+
+
+def _artifacts(state: State, response: httpx.Response):
+    if response.status_code == 200:
+        for value in response.json().values():
+            for url in value if isinstance(value, list) else [value]:
+                state.artifact_paths.append("/artifacts/" + url.rsplit("/artifacts/", 1)[1])
+
+
+def _seek(rng, state):
+    # A player seeking: a 64 KiB window near the start of a speech clip (the shortest are ~160 KB).
+    start = rng.randrange(0, 96_000)
+    return rng.choice(state.artifact_paths), {"headers": {"range": f"bytes={start}-{start + 65535}"}}
+
+
+def _revalidate(rng, state):
+    # A cached copy being revalidated: the ETag is the content hash in the artifact id.
+    path = rng.choice(state.artifact_paths)
+    return path, {"headers": {"if-none-match": '"' + path.rsplit("/", 1)[1].split(".")[0] + '"'}}
+
+
+def _archived(state: State, response: httpx.Response):
+    if response.status_code == 200:
+        state.batch_ids.append(response.json()["batch_process_id"])
+
+
+def _reported(state: State, response: httpx.Response):
+    if response.status_code == 200:
+        state.report_ids.append(response.json()["report_id"])
+
+
+def _book(rng):
+    return {"id": None, "title": f"Accessible Design, vol. {rng.randint(1, 99)}", "author": "AI-DAE",
+            "description": "A book", "rating": rng.randint(1, 5), "published_date": rng.randint(2024, 2030)}
+
+
+def _content_id(rng, state):
+    # About one poll in twenty asks for content that does not exist.
+    return rng.choice(state.content_ids) if rng.random() > 0.05 else 10 ** 9 + rng.randrange(1000)
+
+
+OPS: Dict[str, Op] = {op.key: op for op in [
+    Op("/content/ingest", "POST", lambda rng, s: ("/content/ingest", {"json": {
+        "content_type": rng.choice(("document", "image", "video")),
+        "source_url": f"https://archive.example.org/items/{rng.randrange(10 ** 6)}.{rng.choice(('pdf', 'png', 'mp4'))}"}}),
+       on_response=_ingested),
+    Op("/archives/content/ingest", "POST", lambda rng, s: ("/archives/content/ingest", {"json": {
+        "archive_id": f"archive-{rng.randrange(100)}", "content_type": rng.choice(("document", "image", "video")),
+        "source": f"s3://archives/{rng.randrange(10 ** 6)}/"}}), on_response=_archived),
+    Op("/content/status/{contentId}", "GET",
+       lambda rng, s: (f"/content/status/{_content_id(rng, s)}", {}), expected=(200, 404)),
+    Op("/archives/content/status/{batchProcessId}", "GET",
+       lambda rng, s: (f"/archives/content/status/{rng.choice(s.batch_ids)}", {})),
+    Op("/feedback/summary/{content_id}", "GET",
+       lambda rng, s: (f"/feedback/summary/{rng.choice(s.feedback_ids)}", {}), expected=(200, 404)),
+    Op("/enhancements/sign-language/cache-stats", "GET",
+       lambda rng, s: ("/enhancements/sign-language/cache-stats", {})),
+    Op("/enhancements/alt-text/cache-stats", "GET", lambda rng, s: ("/enhancements/alt-text/cache-stats", {})),
+    Op("/enhancements/result-cache/stats", "GET", lambda rng, s: ("/enhancements/result-cache/stats", {})),
+    Op("/enhancements/models", "GET", lambda rng, s: ("/enhancements/models", {})),
+    Op("/metrics", "GET", lambda rng, s: ("/metrics", {})),
+    Op("/content/analysis", "POST",
+       lambda rng, s: ("/content/analysis", {"json": {"content_id": _content_id(rng, s)}}), expected=(200, 404)),
+    Op("/documents/convert-to-accessible", "POST", lambda rng, s: ("/documents/convert-to-accessible", {"json": {
+        "document_ids": [f"doc-{rng.randrange(10 ** 6)}" for _ in range(rng.randint(5, 200))],
+        "desired_format": rng.choice(("braille", "tagged PDF"))}})),
+    Op("/documents/convert-to-accessible-format", "POST",
+       lambda rng, s: ("/documents/convert-to-accessible-format", {"json": {
+           "document_ids": [f"doc-{rng.randrange(10 ** 6)}" for _ in range(rng.randint(5, 200))],
+           "desired_format": rng.choice(("braille", "tagged PDF"))}})),
+    Op("/enhancements/screen-reader-optimization", "POST",
+       lambda rng, s: ("/enhancements/screen-reader-optimization", {"json": {
+           "content_id": str(rng.choice(s.content_ids)),
+           "specific_enhancements": {k: True for k in rng.sample(
+               ["aria_roles", "landmarks", "heading_normalization", "alt_text"], rng.randint(1, 4))}}})),
+    Op("/enhancements/screen-reader-optimization/html", "POST",
+       lambda rng, s: ("/enhancements/screen-reader-optimization/html", {
+           "content": _html_page(rng), "headers": {"content-type": "text/html"}})),
+    Op("/compliance/check", "POST", lambda rng, s: ("/compliance/check", {"json": {
+        "content_id": str(rng.choice(s.content_ids)), "standards": rng.sample(STANDARDS, rng.randint(1, 3))}}),
+       on_response=_reported),
+    Op("/compliance/archive/verify", "POST", lambda rng, s: ("/compliance/archive/verify", {"json": {
+        "batch_process_id": rng.choice(s.batch_ids or ["unknown_batch"]), "standards": rng.sample(STANDARDS, rng.randint(1, 5))}}),
+       on_response=_reported),
+    Op("/compliance/reports/{report_id}", "GET",
+       lambda rng, s: (f"/compliance/reports/{rng.choice(s.report_ids)}", {})),
+    Op("/compliance/reports/{report_id}/findings", "GET",
+       lambda rng, s: (f"/compliance/reports/{rng.choice(s.report_ids)}/findings", {"params": {
+           "limit": rng.choice((50, 100, 500)), **({"severity": "critical"} if rng.random() < 0.3 else {})}})),
+    Op("/compliance/reports/{report_id}/findings.ndjson", "GET",
+       lambda rng, s: (f"/compliance/reports/{rng.choice(s.report_ids)}/findings.ndjson", {})),
+    Op("/feedback", "POST", lambda rng, s: ("/feedback", {"json": {
+        "content_id": rng.choice(s.feedback_ids), "user_feedback": "Captions were accurate. " * rng.randint(1, 10),
+        "satisfaction_rating": rng.randint(1, 5)}})),
+    Op("/communication/accessibility-feedback", "POST",
+       lambda rng, s: ("/communication/accessibility-feedback", {"json": {
+           "content_id": rng.choice(s.feedback_ids), "user_feedback": "Screen reader skipped the table.",
+           "satisfaction_rating": rng.randint(1, 5)}})),
+    Op("/communication/real-time-text", "POST", lambda rng, s: ("/communication/real-time-text", {"json": {
+        "client_id": f"client-{rng.randrange(500)}", "inquiry": "When will my transcript be ready?"}})),
+    Op("/enhancements/text-to-speech", "POST", lambda rng, s: ("/enhancements/text-to-speech", {"json": {
+        "content_id": str(rng.choice(s.content_ids)), "language": rng.choice(("en", "es", "fr"))}})),
+    Op("/enhancements/text-to-speech/stream", "POST", lambda rng, s: ("/enhancements/text-to-speech/stream", {"json": {
+        "text": " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(2, 12))),
+        "language": rng.choice(("en", "es", "fr"))}})),
+    Op("/enhancements/speech-to-text", "POST", lambda rng, s: ("/enhancements/speech-to-text", {"json": {
+        "audio_file_url": f"https://media.example.org/audio/{rng.randrange(100)}.wav", "language": "en"}})),
+    Op("/enhancements/video-captioning", "POST", lambda rng, s: ("/enhancements/video-captioning", {"json": {
+        "video_file_url": _video(rng), "language": rng.choice(("English", "Spanish", "French"))}})),
+    Op("/enhancements/sign-language", "POST", lambda rng, s: ("/enhancements/sign-language", {"json": {
+        "video_file_url": _video(rng), "targeted_sign_language": rng.choice(SIGN_LANGUAGES)}})),
+    Op("/enhancements/video/descriptive-audio", "POST",
+       lambda rng, s: ("/enhancements/video/descriptive-audio", {"json": {
+           "video_file_url": _video(rng), "specificity": rng.choice(DETAIL_LEVELS)}})),
+    Op("/enhancements/audio-description", "POST", lambda rng, s: ("/enhancements/audio-description", {"json": {
+        "video_file_url": _video(rng), "specificity": rng.choice(DETAIL_LEVELS)}})),
+    Op("/books", "GET", lambda rng, s: ("/books", {})),
+    Op("/books/{book_id}", "GET", lambda rng, s: (f"/books/{rng.randint(1, 12)}", {}), expected=(200, 404)),
+    Op("/books/", "GET", lambda rng, s: ("/books/", {"params": {"book_rating": rng.randint(1, 5)}})),
+    Op("/books/publish/", "GET",
+       lambda rng, s: ("/books/publish/", {"params": {"published_date": rng.randint(2024, 2030)}})),
+    Op("/create-book", "POST", lambda rng, s: ("/create-book", {"json": _book(rng)}), expected=(201,)),
+    Op("/books/update_book", "PUT",
+       lambda rng, s: ("/books/update_book", {"json": {**_book(rng), "id": rng.randint(1, 12)}}), expected=(204, 404)),
+    Op("/books/{book_id}", "DELETE", lambda rng, s: (f"/books/{rng.randint(1, 12)}", {}), expected=(204, 404)),
+    Op("/artifacts/{artifact_id}", "GET", _seek, expected=(206,)),
+    Op("/artifacts/{artifact_id}", "HEAD", lambda rng, s: (rng.choice(s.artifact_paths), {})),
+    Op("/artifacts/{artifact_id}", "GET", _revalidate, expected=(304,), variant="revalidate"),
+    Op("/enhancements/video/instructional-accessibility", "POST",
+       lambda rng, s: ("/enhancements/video/instructional-accessibility", {"json": {
+           "video_file_url": _video(rng), "sign_language": rng.choice(SIGN_LANGUAGES),
+           "descriptive_audio_details": {"level_of_detail": rng.choice(DETAIL_LEVELS),
+                                         "areas_of_focus": ["main_concepts", "visuals"]}}})),
+]}
+
+
+def scenarios(scale: float) -> List[Scenario]:
+    def mix(*weighted):
+        return [(weight, OPS[key]) for weight, key in weighted]
+
+    def n(requests):
+        return max(1, int(requests * scale))
+
+    return [
+        Scenario("ingest_burst", mix((7, "POST /content/ingest"), (3, "POST /archives/content/ingest")),
+                 n(3000), 64),
+        Scenario("status_polling_storm", mix(
+            (60, "GET /content/status/{contentId}"), (25, "GET /archives/content/status/{batchProcessId}"),
+            (8, "GET /feedback/summary/{content_id}"), (3, "GET /enhancements/sign-language/cache-stats"),
+            (3, "GET /enhancements/alt-text/cache-stats"), (2, "GET /enhancements/result-cache/stats"),
+            (1, "GET /enhancements/models"), (1, "GET /metrics")), n(10000), 128,
+            setup=[OPS["POST /archives/content/ingest"]] * 4),
+        Scenario("batch_conversion", mix(
+            (4, "POST /documents/convert-to-accessible"), (4, "POST /documents/convert-to-accessible-format"),
+            (1, "POST /enhancements/screen-reader-optimization"),
+            (3, "POST /enhancements/screen-reader-optimization/html")), n(600), 16),
+        Scenario("compliance_checks", mix(
+            (5, "POST /compliance/check"), (3, "POST /compliance/archive/verify"),
+            (2, "POST /content/analysis"), (4, "GET /compliance/reports/{report_id}"),
+            (2, "GET /compliance/reports/{report_id}/findings"),
+            (1, "GET /compliance/reports/{report_id}/findings.ndjson")), n(3000), 32,
+            setup=[OPS["POST /archives/content/ingest"]] * 4 + [OPS["POST /compliance/check"]]),
+        Scenario("feedback_and_messaging", mix(
+            (4, "POST /feedback"), (3, "POST /communication/accessibility-feedback"),
+            (3, "POST /communication/real-time-text")), n(2000), 32),
+        Scenario("media_enhancements", mix(
+            (3, "POST /enhancements/text-to-speech"), (2, "POST /enhancements/text-to-speech/stream"),
+            (3, "POST /enhancements/speech-to-text"),
+            (2, "POST /enhancements/video-captioning"), (2, "POST /enhancements/sign-language"),
+            (2, "POST /enhancements/video/descriptive-audio"), (1, "POST /enhancements/audio-description"),
+            (1, "POST /enhancements/video/instructional-accessibility")), n(80), 8),
+        Scenario("books_catalog", mix(
+            (5, "GET /books/{book_id}"), (2, "GET /books"), (2, "GET /books/"), (1, "GET /books/publish/"),
+            (1, "POST /create-book"), (1, "PUT /books/update_book"), (1, "DELETE /books/{book_id}")), n(2000), 32),
+        Scenario("artifact_downloads", mix(
+            (7, "GET /artifacts/{artifact_id}"), (2, "GET /artifacts/{artifact_id} (revalidate)"),
+            (1, "HEAD /artifacts/{artifact_id}")), n(3000), 32,
+            setup=[dataclasses.replace(OPS["POST /enhancements/text-to-speech"], on_response=_artifacts)] * 8),
+    ]
+
+
+def uncovered_routes(scenario_list: List[Scenario]) -> List[str]:
+    driven = {(op.method, op.route) for s in scenario_list for _, op in s.mix}
+    missing = []
+    for route in main5.app.routes:
+        if isinstance(route, APIRoute) and route.path not in EXCLUDED_ROUTES:
+            for method in route.methods:
+                if (method, route.path) not in driven:
+                    missing.append(f"{method} {route.path}")
+    return missing
+
+
+# Measurement
+def rss_mb(pid: Optional[int] = None) -> float:
+    """Resident memory of the process serving requests (this one for the ASGI transport)."""
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, seed: int,
+                       server_pid: Optional[int] = None) -> dict:
+    rng = random.Random(f"{seed}:{scenario.name}")
+    state = State()
+    weights = [w for w, _ in scenario.mix]
+    ops = [op for _, op in scenario.mix]
+    plan = rng.choices(ops, weights, k=scenario.requests)
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    shed = 0
+    next_index = 0
+
+    async def worker(worker_id: int):
+        nonlocal next_index, shed
+        worker_rng = random.Random(f"{seed}:{scenario.name}:{worker_id}")
+        while next_index < len(plan):
+            op = plan[next_index]
+            next_index += 1
+            url, kwargs = op.build(worker_rng, state)
+            # One client identity per virtual user, as admission control rate-limits per client.
+            kwargs["headers"] = {**kwargs.get("headers", {}), "x-client-id": f"load-{worker_id}"}
+            start = time.perf_counter()
+            try:
+                response = await client.request(op.method, url, **kwargs)
+                await response.aread()
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                continue
+            if response.status_code in (429, 503):
+                shed += 1
+                await asyncio.sleep(0)
+                continue
+            latencies.append(time.perf_counter() - start)
+            if response.status_code not in op.expected:
+                key = f"{op.method} {op.route} -> {response.status_code}"
+                errors[key] = errors.get(key, 0) + 1
+            if op.on_response is not None:
+                op.on_response(state, response)
+            # In-process requests that never block would otherwise let one worker run the whole plan.
+            await asyncio.sleep(0)
+
+    for index, op in enumerate(scenario.setup):
+        url, kwargs = op.build(rng, state)
+        kwargs["headers"] = {**kwargs.get("headers", {}), "x-client-id": f"setup-{index}"}
+        op.on_response(state, await client.request(op.method, url, **kwargs))
+    rss_before = rss_mb(server_pid)
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(scenario.concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    rss_after = rss_mb(server_pid)
+    return {
+        "requests": len(plan),
+        "concurrency": scenario.concurrency,
+        "shed": shed,
+        "errors": sum(errors.values()),
+        "error_detail": errors,
+        "seconds": round(elapsed, 4),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "rss_mb": round(rss_after, 1),
+        "rss_growth_mb": round(rss_after - rss_before, 1),
+    }
+
+
+# Transports
+class LoopbackServer:
+    """The app under uvicorn in a child process on an ephemeral 127.0.0.1 port, so the client gets its own GIL."""
+
+    def __init__(self, media_seconds: float):
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            self.port = probe.getsockname()[1]
+        self.command = [sys.executable, os.path.abspath(__file__), "--serve", str(self.port),
+                        "--media-seconds", str(media_seconds)]
+        self.process: Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> "LoopbackServer":
+        self.process = subprocess.Popen(self.command)
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=1).close()
+                return self
+            except OSError:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("loopback server did not start")
+                time.sleep(0.05)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait()
+
+
+def serve(port: int):
+    import uvicorn
+    uvicorn.run(main5.app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+async def run_all(server: Optional[LoopbackServer], scenario_list: List[Scenario], seed: int) -> dict:
+    if server is None:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main5.app), base_url="http://aidae.test",
+                                   timeout=120)
+    else:
+        limits = httpx.Limits(max_connections=max(s.concurrency for s in scenario_list), max_keepalive_connections=None)
+        client = httpx.AsyncClient(base_url=server.base_url, limits=limits, timeout=120)
+    results = {}
+    # In process, run the app's lifespan as uvicorn would: it starts the archive batch runner.
+    lifespan = main5.app.router.lifespan_context(main5.app) if server is None else contextlib.nullcontext()
+    async with lifespan, client:
+        for scenario in scenario_list:
+            results[scenario.name] = await run_scenario(client, scenario, seed,
+                                                        server.process.pid if server else None)
+            report_line(scenario.name, results[scenario.name])
+    return results
+
+
+# Baselines
+REGRESSION_CHECKS = (("throughput_rps", -1), ("p95_ms", 1), ("p99_ms", 1))  # (metric, direction that is worse)
+
+
+def regressions(baseline: dict, current: dict, threshold: float) -> List[str]:
+    found = []
+    for name, result in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        for metric, worse in REGRESSION_CHECKS:
+            before, after = base[metric], result[metric]
+            if before > 0 and (after - before) / before * worse > threshold:
+                found.append(f"{name}: {metric} {before} -> {after} ({(after - before) / before:+.1%})")
+    return found
+
+
+def report_line(name: str, result: dict):
+    print(f"{name:24s} {result['requests']:7d} req  {result['throughput_rps']:9.1f} req/s  "
+          f"p50 {result['p50_ms']:8.2f}  p95 {result['p95_ms']:8.2f}  p99 {result['p99_ms']:8.2f} ms  "
+          f"rss {result['rss_mb']:7.1f} MiB ({result['rss_growth_mb']:+.1f})  shed {result.get('shed', 0)}  "
+          f"errors {result['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--transport", choices=("asgi", "loopback"), default="asgi")
+    parser.add_argument("--scenario", action="append", help="run only these scenarios (repeatable)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every scenario's request count")
+    parser.add_argument("--media-seconds", type=float, default=2.0, help="synthetic video length for media routes")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", metavar="PATH", help="write results as a JSON baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="allowed relative regression in throughput, p95 and p99 (default 0.15)")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    open_decoder = media_pipeline.open_decoder
+
+    def short_decoder(url):
+        decoder = open_decoder(url)
+        decoder.duration = args.media_seconds
+        return decoder
+
+    media_pipeline.open_decoder = short_decoder
+    if args.serve:
+        serve(args.serve)
+        return
+
+    scenario_list = scenarios(args.scale)
+    missing = uncovered_routes(scenario_list)
+    if missing:
+        print("routes not covered by any scenario: " + ", ".join(missing), file=sys.stderr)
+        sys.exit(2)
+    if args.scenario:
+        scenario_list = [s for s in scenario_list if s.name in args.scenario]
+
+    if args.transport == "loopback":
+        with LoopbackServer(args.media_seconds) as server:
+            results = asyncio.run(run_all(server, scenario_list, args.seed))
+    else:
+        results = asyncio.run(run_all(None, scenario_list, args.seed))
+
+    current = {
+        "transport": args.transport, "scale": args.scale, "seed": args.seed, "media_seconds": args.media_seconds,
+        "python": sys.version.split()[0], "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "scenarios": results,
+    }
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as out:
+            json.dump(current, out, indent=2, sort_keys=True)
+        print(f"baseline written to {args.save}")
+
+    failed = any(r["errors"] for r in results.values())
+    for name, result in results.items():
+        for key, n in result["error_detail"].items():
+            print(f"  {name}: {n} x {key}", file=sys.stderr)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if (baseline.get("transport"), baseline.get("scale")) != (args.transport, args.scale):
+            print("warning: baseline was recorded with a different transport or scale", file=sys.stderr)
+        found = regressions(baseline, current, args.threshold)
+        for line in found:
+            print("REGRESSION " + line, file=sys.stderr)
+        failed = failed or bool(found)
+        if not found:
+            print(f"no regressions beyond {args.threshold:.0%} against {args.baseline}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Per-request cost of the metrics middleware, measured on a bare ASGI app so
+that only the middleware itself is timed.
+
+    python benchmarks/bench_metrics_overhead.py --requests 200000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import metrics
+
+
+class _Route:
+    path = "/content/status/{contentId}"
+
+
+ROUTE = _Route()
+START = {"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]}
+BODY = {"type": "http.response.body", "body": b'{"status":"processing","contentId":1}'}
+REQUEST = {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def endpoint(scope, receive, send):
+    scope["route"] = ROUTE
+    await receive()
+    await send(START)
+    await send(BODY)
+
+
+async def receive():
+    return REQUEST
+
+
+async def send(message):
+    pass
+
+
+async def run(app, requests):
+    start = time.perf_counter_ns()
+    for _ in range(requests):
+        scope = {"type": "http", "method": "GET", "path": "/content/status/1"}
+        await app(scope, receive, send)
+    return (time.perf_counter_ns() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    http_metrics = metrics.HttpMetrics()
+    instrumented = metrics.MetricsMiddleware(endpoint, metrics=http_metrics)
+
+    bare = min(asyncio.run(run(endpoint, args.requests)) for _ in range(args.repeats))
+    wrapped = min(asyncio.run(run(instrumented, args.requests)) for _ in range(args.repeats))
+    print(f"bare ASGI app        {bare / 1000:6.2f} us/request")
+    print(f"with metrics         {wrapped / 1000:6.2f} us/request")
+    print(f"middleware overhead  {(wrapped - bare) / 1000:6.2f} us/request")
+
+    start = time.perf_counter()
+    http_metrics.render()
+    print(f"/metrics render      {(time.perf_counter() - start) * 1000:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
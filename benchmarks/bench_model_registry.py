@@ -0,0 +1,88 @@
+"""
+Model loads, evictions and wait time under different model memory budgets.
+
+Replays ``--requests`` enhancement requests, ``--concurrency`` at a time,
+against a ``ModelRegistry`` of stub models. Requested (kind, variant) pairs
+follow a Zipf-like popularity so a few languages and voices dominate, as in
+production traffic. For each budget it reports how many loads were made
+(never more than one per model at a time), how many were joined by
+concurrent requests, evictions, the resident hit rate and the time requests
+waited for a model.
+
+    python benchmarks/bench_model_registry.py --budgets-mb 256,512,1024,4096
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import model_registry
+
+LANGUAGES = ("en", "es", "fr", "de", "it", "pt", "ja", "zh", "ar", "hi")
+VOICES = ("default", "female", "male", "child")
+SIGN_LANGUAGES = ("ASL", "BSL", "LSF", "DGS", "JSL")
+
+
+def catalogue():
+    models = [("text_to_speech", f"{language}/{voice}") for language in LANGUAGES for voice in VOICES]
+    models += [(kind, language) for kind in ("video_captioning", "speech_to_text") for language in LANGUAGES]
+    models += [("sign_language", sign_language) for sign_language in SIGN_LANGUAGES]
+    return models
+
+
+async def replay(budget_bytes: int, requests, concurrency: int, inference_seconds: float):
+    registry = model_registry.ModelRegistry(max_bytes=budget_bytes)
+    waits = []
+    queue = iter(requests)
+
+    async def worker():
+        for kind, variant in queue:
+            start = time.perf_counter()
+            async with registry.use(kind, variant):
+                waits.append(time.perf_counter() - start)
+                await asyncio.sleep(inference_seconds)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return registry.stats(), waits, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budgets-mb", default="256,512,1024,4096")
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--inference-ms", type=float, default=5.0)
+    parser.add_argument("--zipf", type=float, default=1.1, help="popularity skew; higher is more skewed")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    logging.getLogger("aidae.models").setLevel(logging.ERROR)  # over-budget loads are counted in the table
+
+    rng = random.Random(args.seed)
+    models = catalogue()
+    rng.shuffle(models)
+    weights = [1 / (rank + 1) ** args.zipf for rank in range(len(models))]
+    requests = rng.choices(models, weights, k=args.requests)
+    total_mb = sum(model_registry.MODEL_SIZES[kind] for kind, _ in models) >> 20
+    print(f"{len(models)} models ({total_mb} MiB if all resident), {args.requests} requests, "
+          f"concurrency {args.concurrency}, {len(set(requests))} distinct models requested")
+    print(f"{'budget MiB':>10} {'loads':>6} {'joined':>7} {'evicted':>8} {'over':>5} {'hit %':>6} "
+          f"{'wait p50':>9} {'wait p99':>9} {'elapsed':>8}")
+    for budget in (int(mb) for mb in args.budgets_mb.split(",")):
+        stats, waits, elapsed = asyncio.run(replay(budget * 2 ** 20, requests, args.concurrency,
+                                                   args.inference_ms / 1000))
+        waits.sort()
+        print(f"{budget:>10} {stats['loads']:>6} {stats['waits']:>7} {stats['evictions']:>8} "
+              f"{stats['over_budget_loads']:>5} {stats['hits'] / len(requests):>6.1%} "
+              f"{statistics.median(waits) * 1e3:>7.2f}ms {waits[int(len(waits) * 0.99)] * 1e3:>7.2f}ms "
+              f"{elapsed:>7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
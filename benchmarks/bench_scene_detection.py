@@ -0,0 +1,54 @@
+"""
+Scene-change detection throughput on 1080p frames, per description detail level.
+
+    python benchmarks/bench_scene_detection.py --seconds 60
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+
+import scene_detection
+from media_pipeline import MediaChunk
+
+
+def synthetic_chunks(seconds, fps=25, width=1920, height=1080, sample_rate=16000):
+    """One second of 1080p video, re-issued with advancing timestamps so decode cost is excluded."""
+    rng = np.random.default_rng(0)
+    frames = np.empty((fps, height, width, 3), dtype=np.uint8)
+    frames[:fps // 2] = rng.integers(0, 256, 3, dtype=np.uint8)
+    frames[fps // 2:] = rng.integers(0, 256, 3, dtype=np.uint8)
+    frames += rng.integers(0, 8, (1, height, width, 3), dtype=np.uint8)
+    speech = rng.standard_normal(sample_rate, dtype=np.float32) * 0.3
+    silence = speech * 0.001
+    for second in range(seconds):
+        # Dialogue pauses for three seconds out of every six.
+        audio = silence if (second // 3) % 2 else speech
+        yield MediaChunk(index=second, start=float(second), fps=fps, sample_rate=sample_rate,
+                         frames=frames, audio=audio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=int, default=60, help="seconds of 1080p25 video per level")
+    args = parser.parse_args()
+
+    print(f"{'detail level':12s} {'analysed fps':>12s} {'x real time':>12s} {'shots':>6s} {'slots':>6s}")
+    for level in scene_detection.DETAIL_PROFILES:
+        detector = scene_detection.SceneDetector(scene_detection.detail_profile(level))
+        start = time.perf_counter()
+        for chunk in synthetic_chunks(args.seconds):
+            detector.feed(chunk)
+        detector.finish()
+        slots = detector.description_slots()
+        elapsed = time.perf_counter() - start
+        print(f"{level:12s} {args.seconds * 25 / elapsed:12.0f} {args.seconds / elapsed:12.1f} "
+              f"{len(detector.shot_boundaries):6d} {len(slots):6d}")
+
+
+if __name__ == "__main__":
+    main()
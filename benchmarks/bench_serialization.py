@@ -0,0 +1,110 @@
+"""
+Per-request CPU of the hot read endpoints with and without the fast JSON path.
+
+Each route is called directly through the ASGI interface of the full app
+(middlewares included, no HTTP client or socket in the way) ``--requests``
+times, alternating between the standard path (dict -> response_model
+validation -> jsonable_encoder -> json) and the fast path (pre-built
+serializer, orjson, cached bytes for unchanged records), and the process CPU
+time per request is compared. Response bodies are checked to decode to the
+same JSON. The last column is a client revalidating its copy with
+``If-None-Match``, answered 304 from the record's version.
+
+    python benchmarks/bench_serialization.py --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+_scratch = tempfile.mkdtemp(prefix="aidae-serialization-")
+os.environ.setdefault("AI_DAE_STATE_DB", os.path.join(_scratch, "state.db"))
+os.environ.setdefault("AI_DAE_ARTIFACT_DIR", os.path.join(_scratch, "artifacts"))
+os.environ.setdefault("AI_DAE_FEEDBACK_LOG", os.path.join(_scratch, "feedback.jsonl"))
+os.environ.setdefault("AI_DAE_BATCH_CONCURRENCY", "0")
+os.environ.setdefault("AI_DAE_RATE_LIMIT", "1000000000")
+os.environ.setdefault("AI_DAE_RATE_BURST", "1000000000")
+
+import fast_json
+import main5
+import shared_state
+
+
+async def call(app, method: str, path: str, headers=()):
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+             "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+             "headers": [(b"host", b"bench"), *headers], "client": ("127.0.0.1", 1), "server": ("bench", 80)}
+    body = []
+    status = []
+    etag = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+            etag.extend(value for name, value in message["headers"] if name == b"etag")
+        elif message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status[0], b"".join(body), etag[0] if etag else None
+
+
+async def cpu_per_request(app, path: str, requests: int, headers=()) -> float:
+    start = time.process_time()
+    for _ in range(requests):
+        await call(app, "GET", path, headers)
+    return (time.process_time() - start) / requests
+
+
+async def main_async(args):
+    app = main5.app
+    batch_id = "bench-batch"
+    shared_state.state.create_batch(batch_id, "bench-archive", "document", "bench",
+                                    [f"bench-{n:05d}" for n in range(args.batch_items)])
+    # Complete every item, flagging one in twenty for review, so the status carries a realistic review list.
+    for job_id, _, _ in shared_state.state.claim_jobs("bench", args.batch_items, 60):
+        shared_state.state.complete_job(job_id, "bench", manual_review=job_id % 20 == 0)
+    routes = {"get_content_status": "/content/status/1", "read_book": "/books/3",
+              "read_all_books": "/books", "archive_content_status": f"/archives/content/status/{batch_id}"}
+
+    print(f"{args.requests} requests per route, orjson {'on' if fast_json.orjson else 'off'}, CPU us/request")
+    print(f"{'route':<24} {'standard':>9} {'fast':>9} {'saved':>9} {'saved %':>8} {'304':>9}")
+    for name, path in routes.items():
+        fast_json.enabled = False
+        standard_status, standard_body, _ = await call(app, "GET", path)
+        fast_json.enabled = True
+        fast_status, fast_body, etag = await call(app, "GET", path)
+        assert standard_status == fast_status == 200, (standard_status, fast_status)
+        assert json.loads(standard_body) == json.loads(fast_body), name
+        revalidate = [(b"if-none-match", etag)]
+        assert (await call(app, "GET", path, revalidate))[0] == 304, name
+        timings = {False: [], True: [], "304": []}
+        for _ in range(args.rounds):
+            for mode in (False, True):
+                fast_json.enabled = mode
+                timings[mode].append(await cpu_per_request(app, path, args.requests // args.rounds))
+            timings["304"].append(await cpu_per_request(app, path, args.requests // args.rounds, revalidate))
+        standard, fast, unchanged = (min(timings[mode]) * 1e6 for mode in (False, True, "304"))
+        print(f"{name:<24} {standard:>9.1f} {fast:>9.1f} {standard - fast:>9.1f} {(standard - fast) / standard:>8.1%} "
+              f"{unchanged:>9.1f}")
+    fast_json.enabled = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5, help="alternations between the two paths")
+    parser.add_argument("--batch-items", type=int, default=200)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Sign language assembly from the gloss clip cache vs. rendering every video from scratch.
+
+    python benchmarks/bench_sign_rendering.py --videos 200 --glosses 600
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+
+import sign_rendering
+
+
+def render_uncached(sign_language, glosses):
+    parts = []
+    previous = None
+    for gloss in glosses:
+        clip = sign_rendering.render_clip(sign_language, gloss)
+        if previous is not None:
+            parts.append(sign_rendering.blend_transition(previous[-1], clip[0]))
+        parts.append(clip)
+        previous = clip
+    return np.concatenate(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--videos", type=int, default=200)
+    parser.add_argument("--glosses", type=int, default=600, help="glosses per video (~10 min lecture)")
+    parser.add_argument("--cache-mb", type=int, default=64)
+    args = parser.parse_args()
+
+    workload = [(("ASL", "BSL")[v % 2], sign_rendering.placeholder_glosses(f"https://example.com/lecture/{v}.mp4",
+                                                                           args.glosses))
+                for v in range(args.videos)]
+
+    start = time.perf_counter()
+    for sign_language, glosses in workload:
+        render_uncached(sign_language, glosses)
+    uncached = time.perf_counter() - start
+
+    renderer = sign_rendering.AvatarRenderer(sign_rendering.ClipCache(args.cache_mb * 1024 * 1024))
+    start = time.perf_counter()
+    for sign_language, glosses in workload:
+        renderer.render(sign_language, glosses)
+    cached = time.perf_counter() - start
+
+    stats = renderer.cache.stats()
+    print(f"videos={args.videos} glosses/video={args.glosses} cache={args.cache_mb} MiB")
+    print(f"from scratch  {uncached * 1000 / args.videos:8.1f} ms/video")
+    print(f"clip cache    {cached * 1000 / args.videos:8.1f} ms/video")
+    print(f"hit rate      {stats['hit_rate']:8.1%}  ({stats['hits']} hits, {stats['misses']} misses, "
+          f"{stats['evictions']} evictions, {stats['bytes'] / 2 ** 20:.1f} MiB resident)")
+    print(f"render time   {stats['render_seconds']:8.2f} s spent, {stats['render_seconds_saved']:.2f} s saved")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Snapshot and restore time for an in-memory state store of ``--records`` content records.
+
+Fills a ``:memory:`` ``StateStore`` with content records (the time taken is
+the cost of rebuilding state by re-inserting it, a lower bound on
+re-ingesting), then:
+
+* snapshots it through ``Snapshotter.take`` while a coroutine keeps looking
+  records up every millisecond, reporting the fork pause, the write time,
+  the file size and the longest gap between lookups;
+* restores it into a fresh store from the memory-mapped file, and checks the
+  record count and the primary-key index with random point lookups.
+
+    python benchmarks/bench_snapshot.py --records 10000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import shared_state
+import snapshots
+
+CONTENT_TYPES = ("document", "image", "video")
+STATUSES = ("processing", "completed", "error")
+
+
+def populate(store: shared_state.StateStore, records: int):
+    now = time.time()
+    conn = store.conn
+    conn.execute("BEGIN")
+    conn.executemany("INSERT INTO contents (content_id, content_type, source_url, status, created) "
+                     "VALUES (?, ?, ?, ?, ?)",
+                     ((n, CONTENT_TYPES[n % 3], f"https://media.example.org/archive/{n:09d}", STATUSES[n % 3],
+                       now) for n in range(1, records + 1)))
+    conn.execute("COMMIT")
+
+
+def section(store: shared_state.StateStore) -> snapshots.Section:
+    return snapshots.Section("state", store.image, store.restore_image)
+
+
+async def snapshot_under_load(snapshotter: snapshots.Snapshotter, store: shared_state.StateStore, records: int):
+    rng = random.Random(1)
+    gaps, lookups = [], 0
+    done = asyncio.Event()
+
+    async def serve():
+        nonlocal lookups
+        last = time.perf_counter()
+        while not done.is_set():
+            assert store.get_content(rng.randint(1, records)) is not None
+            lookups += 1
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    server = asyncio.ensure_future(serve())
+    await asyncio.sleep(0.05)
+    ok = await snapshotter.take()
+    done.set()
+    await server
+    return ok, max(gaps), lookups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=10_000_000)
+    parser.add_argument("--lookups", type=int, default=10000, help="random point lookups after restore")
+    parser.add_argument("--path", default=os.path.join(tempfile.mkdtemp(prefix="aidae-snapshot-"), "state.snap"))
+    args = parser.parse_args()
+
+    store = shared_state.StateStore(":memory:")
+    start = time.perf_counter()
+    populate(store, args.records)
+    rebuild = time.perf_counter() - start
+    print(f"{args.records:,} records inserted in {rebuild:.2f}s ({args.records / rebuild:,.0f}/s): "
+          f"the rebuild cost without a snapshot")
+
+    snapshotter = snapshots.Snapshotter([section(store)], path=args.path, interval=0)
+    ok, longest_gap, lookups = asyncio.run(snapshot_under_load(snapshotter, store, args.records))
+    assert ok, "snapshot failed"
+    size = snapshotter.last_bytes
+    print(f"snapshot: paused {snapshotter.last_pause_seconds * 1e3:.1f} ms, written in {snapshotter.last_seconds:.2f}s, "
+          f"{size / 2 ** 20:,.1f} MiB ({size / args.records:.1f} bytes/record); "
+          f"{lookups} lookups served meanwhile, longest gap {longest_gap * 1e3:.1f} ms")
+    del store
+
+    restored = shared_state.StateStore(":memory:")
+    snapshotter = snapshots.Snapshotter([section(restored)], path=args.path, interval=0)
+    start = time.perf_counter()
+    assert snapshotter.restore() == ["state"]
+    restore = time.perf_counter() - start
+    count = restored.conn.execute("SELECT COUNT(*) FROM contents").fetchone()[0]
+    assert count == args.records, count
+    rng = random.Random(2)
+    start = time.perf_counter()
+    for _ in range(args.lookups):
+        content_id = rng.randint(1, args.records)
+        assert restored.get_content(content_id)["source_url"].endswith(f"{content_id:09d}")
+    lookup = (time.perf_counter() - start) / args.lookups
+    print(f"restore: {restore:.2f}s ({args.records / restore:,.0f} records/s, {rebuild / restore:.0f}x faster than "
+          f"rebuilding); point lookup after restore {lookup * 1e6:.1f} us")
+    os.remove(args.path)
+
+
+if __name__ == "__main__":
+    main()
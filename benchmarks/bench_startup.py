@@ -0,0 +1,103 @@
+"""
+Cold-start cost of the app: import time and time to first request, lazy vs. eager heavy imports.
+
+Every run is a fresh interpreter, as a newly scaled-up worker would be:
+
+* import: ``import main5`` (building the app from every router) timed
+  inside the process, plus the whole process's wall time;
+* first request: ``uvicorn main5:app`` is started and ``GET
+  /content/status/1`` polled until it answers, timed from the spawn;
+  then the first ``POST /documents/convert-to-accessible``, which is where
+  a lazily imported subsystem (numpy-backed placeholders) gets loaded.
+
+``eager`` imports the heavy modules (media pipeline, placeholder
+artifacts, sign rendering, image hashing, archive batches, webhooks) before
+the app, as the single ``main5.py`` module used to; ``lazy`` is the app as
+shipped.
+
+    python benchmarks/bench_startup.py --runs 7
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+HEAVY = ("media_pipeline", "placeholder_artifacts", "sign_rendering", "image_hashing", "archive_batches", "webhooks")
+VARIANTS = {"lazy": "", "eager": "".join(f"import {name}; " for name in HEAVY)}
+
+
+def _env(scratch: str) -> dict:
+    return dict(os.environ, PYTHONPATH=ROOT, PYTHONWARNINGS="ignore",
+                AI_DAE_STATE_DB=os.path.join(scratch, "state.db"),
+                AI_DAE_ARTIFACT_DIR=os.path.join(scratch, "artifacts"),
+                AI_DAE_FEEDBACK_LOG=os.path.join(scratch, "feedback.jsonl"))
+
+
+def measure_import(preload: str, scratch: str) -> dict:
+    code = ("import time; start = time.perf_counter(); " + preload +
+            "import main5; print(time.perf_counter() - start)")
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=_env(scratch), check=True,
+                            capture_output=True, text=True).stdout
+    return {"import": float(output.split()[-1]), "process": time.perf_counter() - start}
+
+
+def measure_first_request(preload: str, scratch: str) -> dict:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    code = (preload + "import uvicorn; uvicorn.run('main5:app', host='127.0.0.1', port=%d, log_level='warning', "
+            "access_log=False)" % port)
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", code], cwd=ROOT, env=_env(scratch))
+    try:
+        with httpx.Client(base_url=base_url, timeout=30) as client:
+            while True:
+                try:
+                    if client.get("/content/status/1").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if process.poll() is not None:
+                    raise RuntimeError("server exited")
+                time.sleep(0.002)
+            first = time.perf_counter() - start
+            heavy_start = time.perf_counter()
+            client.post("/documents/convert-to-accessible",
+                        json={"document_ids": ["doc-1"], "desired_format": "braille"}).raise_for_status()
+            heavy = time.perf_counter() - heavy_start
+    finally:
+        process.terminate()
+        process.wait()
+    return {"first_request": first, "first_heavy_request": heavy}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--variants", nargs="+", choices=sorted(VARIANTS), default=["eager", "lazy"])
+    args = parser.parse_args()
+
+    print(f"median of {args.runs} fresh processes, ms")
+    print(f"{'variant':<8} {'import':>8} {'process':>8} {'first request':>14} {'first heavy request':>20}")
+    for variant in args.variants:
+        samples = []
+        for _ in range(args.runs):
+            with tempfile.TemporaryDirectory(prefix="aidae-startup-") as scratch:
+                samples.append({**measure_import(VARIANTS[variant], scratch),
+                                **measure_first_request(VARIANTS[variant], scratch)})
+        median = {key: statistics.median(s[key] for s in samples) * 1000 for key in samples[0]}
+        print(f"{variant:<8} {median['import']:>8.0f} {median['process']:>8.0f} {median['first_request']:>14.0f} "
+              f"{median['first_heavy_request']:>20.0f}")
+
+
+if __name__ == "__main__":
+    main()
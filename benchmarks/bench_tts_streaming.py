@@ -0,0 +1,94 @@
+"""
+Time to first audio and total time for streamed versus whole-document text-to-speech.
+
+A generated textbook chapter (``--paragraphs`` paragraphs) is spoken by a
+stand-in backend that takes ``1 / --synth-chars-per-second`` seconds per
+character, in a worker thread like a real one would. The bench compares:
+
+* whole document: one synthesis of the full text, with nothing to play
+  until it finishes;
+* streamed: ``SpeechStreamer`` on ``--workers`` scheduler slots, timing
+  the first audio bytes and the end of the stream;
+* streamed again: the same chapter, every chunk from the cache.
+
+    python benchmarks/bench_tts_streaming.py --paragraphs 40 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+os.environ.setdefault("AI_DAE_ARTIFACT_DIR", tempfile.mkdtemp(prefix="aidae-tts-"))
+
+import job_scheduler
+import placeholder_artifacts
+import speech_streaming
+
+WORDS = ("the cell membrane controls what enters and leaves each cell while proteins carry signals between "
+         "neighbouring tissues and energy moves through the system in small steps").split()
+
+
+def chapter(paragraphs: int, seed: int) -> str:
+    rng = random.Random(seed)
+
+    def sentence():
+        words = rng.choices(WORDS, k=rng.randint(8, 24))
+        return " ".join(words).capitalize() + rng.choice((".", ".", ".", "?"))
+
+    return "\n\n".join(" ".join(sentence() for _ in range(rng.randint(3, 7))) for _ in range(paragraphs))
+
+
+async def stream(streamer: speech_streaming.SpeechStreamer, text: str):
+    start = time.perf_counter()
+    chunks, audio = await streamer.open(text, "en", "default")
+    first = None
+    size = 0
+    async for block in audio:
+        size += len(block)
+        if first is None and size > placeholder_artifacts.WAV_HEADER_BYTES:
+            first = time.perf_counter() - start
+    return chunks, first, time.perf_counter() - start, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--paragraphs", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=4, help="scheduler slots synthesizing chunks")
+    parser.add_argument("--lookahead", type=int, default=8)
+    parser.add_argument("--synth-chars-per-second", type=float, default=2000.0,
+                        help="stand-in backend speed")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    text = chapter(args.paragraphs, args.seed)
+
+    def synthesize(chunk: str, language: str, voice_type: str) -> str:
+        time.sleep(len(chunk) / args.synth_chars_per_second)
+        return placeholder_artifacts.speech_chunk_artifact(chunk, language, voice_type)
+
+    start = time.perf_counter()
+    synthesize(text, "en", "default")
+    whole = time.perf_counter() - start
+
+    job_scheduler.scheduler.workers = args.workers
+    streamer = speech_streaming.SpeechStreamer(synthesize, lookahead=args.lookahead)
+    chunks, first, total, size = asyncio.run(stream(streamer, text))
+    _, cached_first, cached_total, _ = asyncio.run(stream(streamer, text))
+    audio_seconds = (size - placeholder_artifacts.WAV_HEADER_BYTES) / (2 * placeholder_artifacts.SAMPLE_RATE)
+
+    print(f"{len(text):,} characters, {chunks} chunks, {audio_seconds / 60:.1f} min of audio, "
+          f"{args.workers} workers, lookahead {args.lookahead}")
+    print(f"{'':<16} {'first audio':>12} {'complete':>10}")
+    print(f"{'whole document':<16} {whole:>11.2f}s {whole:>9.2f}s")
+    print(f"{'streamed':<16} {first:>11.2f}s {total:>9.2f}s")
+    print(f"{'streamed, cached':<16} {cached_first:>11.3f}s {cached_total:>9.3f}s")
+    print(f"chunks synthesized {streamer.chunks['synthesized']}, from cache {streamer.chunks['cached']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Webhook delivery against a local stand-in receiver, batched vs. one POST per event.
+
+The receiver is a small ASGI app under uvicorn on a loopback port, in the
+same event loop as the dispatcher. It verifies every signature, answers a
+``--fail-rate`` fraction of requests with 503 (half of them with
+``Retry-After: 0``) and records event ids, so duplicates from retried
+batches and lost events both show up. Events are emitted in bursts to
+``--endpoints`` callback URLs, as completions would arrive; the report
+gives delivery time, POSTs made, retries and per-event latency.
+
+    python benchmarks/bench_webhooks.py --events 20000 --endpoints 50 --fail-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import uvicorn
+
+import webhooks
+
+SECRET = "bench-secret"
+
+
+class Receiver:
+    def __init__(self, fail_rate: float, seed: int):
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+        self.reset()
+
+    def reset(self):
+        self.seen = set()
+        self.duplicates = 0
+        self.bad_signatures = 0
+        self.latencies = []
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body = b"".join(chunks)
+        headers = dict(scope["headers"])
+        status, extra = 204, []
+        if not webhooks.verify_signature(SECRET, headers.get(b"x-aidae-signature", b"").decode(), body):
+            self.bad_signatures += 1
+            status = 401
+        elif self.rng.random() < self.fail_rate:
+            status = 503
+            if self.rng.random() < 0.5:
+                extra = [(b"retry-after", b"0")]
+        else:
+            now = time.time()
+            for event in json.loads(body)["events"]:
+                if event["id"] in self.seen:
+                    self.duplicates += 1
+                else:
+                    self.seen.add(event["id"])
+                    self.latencies.append(now - event["created"])
+        await send({"type": "http.response.start", "status": status, "headers": extra})
+        await send({"type": "http.response.body", "body": b""})
+
+
+async def run(label: str, dispatcher: webhooks.WebhookDispatcher, receiver: Receiver, base_url: str,
+              events: int, endpoints: int, bursts: int):
+    receiver.reset()
+    start = time.monotonic()
+    per_burst = events // bursts
+    for burst in range(bursts):
+        for i in range(per_burst):
+            dispatcher.emit(f"{base_url}/hooks/{i % endpoints}", "enhancement.completed",
+                            {"operation": "text_to_speech", "content_id": f"{burst}-{i}"})
+        await asyncio.sleep(0.01)
+    await dispatcher.drain()
+    elapsed = time.monotonic() - start
+    counts = dispatcher.counts
+    latencies = sorted(receiver.latencies)
+    print(f"{label:10s} {elapsed:7.2f} s  {counts['requests']:7d} POSTs  {counts['retries']:5d} retries  "
+          f"delivered {len(receiver.seen):6d}/{per_burst * bursts}  failed {counts['failed']:4d}  "
+          f"duplicates {receiver.duplicates:3d}  bad signatures {receiver.bad_signatures}  "
+          f"latency p50 {statistics.median(latencies) * 1000:7.1f} ms  "
+          f"p99 {latencies[int(0.99 * (len(latencies) - 1))] * 1000:7.1f} ms")
+    await dispatcher.aclose()
+
+
+async def main_async(args):
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    receiver = Receiver(args.fail_rate, args.seed)
+    server = uvicorn.Server(uvicorn.Config(receiver, host="127.0.0.1", port=port, log_level="warning",
+                                           access_log=False))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    base_url = f"http://127.0.0.1:{port}"
+    print(f"{args.events} events to {args.endpoints} endpoints in {args.bursts} bursts, "
+          f"{args.fail_rate:.0%} of POSTs fail")
+    # The loopback receiver is allowlisted; without that the dispatcher refuses it as an internal destination.
+    common = dict(secret=SECRET, max_connections=args.max_connections, base_backoff=0.05, max_backoff=1.0,
+                  allowed_hosts=("127.0.0.1",))
+    await run("unbatched", webhooks.WebhookDispatcher(max_batch=1, max_delay=0.0, **common), receiver, base_url,
+              args.events, args.endpoints, args.bursts)
+    await run("batched", webhooks.WebhookDispatcher(max_batch=args.max_batch, **common), receiver, base_url,
+              args.events, args.endpoints, args.bursts)
+    server.should_exit = True
+    await serving
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--endpoints", type=int, default=50)
+    parser.add_argument("--bursts", type=int, default=20)
+    parser.add_argument("--max-batch", type=int, default=100)
+    parser.add_argument("--max-connections", type=int, default=webhooks.DEFAULT_MAX_CONNECTIONS)
+    parser.add_argument("--fail-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
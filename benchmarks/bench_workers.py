@@ -0,0 +1,151 @@
+"""
+Throughput of main5 under 1, 2, 4, ... uvicorn worker processes sharing state.
+
+For each worker count the app is started with ``uvicorn main5:app --workers
+N`` on a fresh state database, then driven from several client processes:
+
+* requests: each client loops ingest -> status -> analysis for
+  ``--seconds``; the status read right after an ingest may land on any
+  worker, so every 404 there is a consistency violation;
+* batches: ``--batches`` archives are ingested at once and their status
+  polled until every item is processed, giving archive items per second.
+
+Speedups are relative to one worker; they are bounded by the machine's
+cores (the clients need CPU too).
+
+    python benchmarks/bench_workers.py --workers 1 2 4 --seconds 10
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+class Server:
+    def __init__(self, workers: int, scratch: str):
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            self.port = probe.getsockname()[1]
+        self.workers = workers
+        self.env = dict(os.environ,
+                        AI_DAE_STATE_DB=os.path.join(scratch, "state.db"),
+                        AI_DAE_ARTIFACT_DIR=os.path.join(scratch, "artifacts"),
+                        AI_DAE_FEEDBACK_LOG=os.path.join(scratch, "feedback.jsonl"),
+                        AI_DAE_RATE_LIMIT="1000000", AI_DAE_RATE_BURST="1000000",
+                        AI_DAE_TRUSTED_PROXIES="127.0.0.1")
+        self.process = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "Server":
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main5:app", "--host", "127.0.0.1", "--port", str(self.port),
+             "--workers", str(self.workers), "--log-level", "warning", "--no-access-log"],
+            cwd=ROOT, env=self.env)
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                if httpx.get(self.base_url + "/content/status/1", timeout=1).status_code == 200:
+                    time.sleep(1.0)  # let the remaining workers finish importing
+                    return self
+            except httpx.HTTPError:
+                pass
+            if self.process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("server did not start")
+            time.sleep(0.1)
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait()
+
+
+# Clients
+async def _request_loop(client: httpx.AsyncClient, deadline: float, counts: dict):
+    while time.monotonic() < deadline:
+        response = await client.post("/content/ingest", json={
+            "content_type": "image", "source_url": f"https://archive.example.org/{counts['requests']}.png"})
+        content_id = response.json()["content_id"]
+        status = await client.get(f"/content/status/{content_id}")
+        if status.status_code != 200:
+            counts["inconsistent"] += 1
+        await client.post("/content/analysis", json={"content_id": content_id})
+        counts["requests"] += 3
+
+
+async def _drive(base_url: str, client_id: int, seconds: float, concurrency: int) -> dict:
+    counts = {"requests": 0, "inconsistent": 0}
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60,
+                                 headers={"x-client-id": f"bench-{client_id}"}) as client:
+        deadline = time.monotonic() + seconds
+        await asyncio.gather(*(_request_loop(client, deadline, counts) for _ in range(concurrency)))
+    return counts
+
+
+def _client_process(args) -> dict:
+    return asyncio.run(_drive(*args))
+
+
+def measure_requests(base_url: str, clients: int, seconds: float, concurrency: int) -> dict:
+    with multiprocessing.Pool(clients) as pool:
+        start = time.monotonic()
+        results = pool.map(_client_process, [(base_url, i, seconds, concurrency) for i in range(clients)])
+        elapsed = time.monotonic() - start
+    requests = sum(r["requests"] for r in results)
+    return {"rps": requests / elapsed, "inconsistent": sum(r["inconsistent"] for r in results)}
+
+
+def measure_batches(base_url: str, batches: int) -> dict:
+    with httpx.Client(base_url=base_url, timeout=60) as client:
+        start = time.monotonic()
+        ids = [client.post("/archives/content/ingest", json={
+            "archive_id": f"archive-{i}", "content_type": "document", "source": "bench"}).json()["batch_process_id"]
+            for i in range(batches)]
+        items = 0
+        pending = set(ids)
+        while pending:
+            for batch_id in list(pending):
+                status = client.get(f"/archives/content/status/{batch_id}").json()
+                if status["status"] == "completed":
+                    items += status["items_total"]
+                    pending.discard(batch_id)
+            time.sleep(0.05)
+        elapsed = time.monotonic() - start
+    return {"items_per_second": items / elapsed, "items": items}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=4, help="client processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent request loops per client")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--batches", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.clients} client processes x {args.concurrency} loops")
+    print(f"{'workers':>7}  {'req/s':>9}  {'speedup':>7}  {'inconsistent':>12}  {'items/s':>9}  {'speedup':>7}")
+    base = None
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory(prefix="aidae-workers-") as scratch, Server(workers, scratch) as server:
+            requests = measure_requests(server.base_url, args.clients, args.seconds, args.concurrency)
+            batches = measure_batches(server.base_url, args.batches)
+        base = base or (requests["rps"], batches["items_per_second"])
+        print(f"{workers:>7}  {requests['rps']:>9.0f}  {requests['rps'] / base[0]:>6.2f}x  "
+              f"{requests['inconsistent']:>12}  {batches['items_per_second']:>9.0f}  "
+              f"{batches['items_per_second'] / base[1]:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
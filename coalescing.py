@@ -0,0 +1,178 @@
+"""
+Single-flight coalescing and result cache for enhancement requests.
+
+Requests are keyed on the operation name plus a normalised form of the
+request model (URLs canonicalised, strings trimmed, dict keys sorted). The
+first request for a key starts the computation; identical requests arriving
+while it runs attach to the same task and receive its result; once it
+succeeds the result is cached (LRU, TTL) and served to later requests
+without running anything. Failures are not cached, so the next request
+retries.
+
+The computation runs as its own task and every caller awaits it through
+``asyncio.shield``, so one client disconnecting does not cancel the work the
+others are waiting for.
+"""
+import asyncio
+import collections
+import hashlib
+import json
+import os
+import time
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from pydantic import BaseModel
+
+import snapshots
+
+DEFAULT_TTL = float(os.environ.get("AI_DAE_RESULT_CACHE_TTL", "3600"))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("AI_DAE_RESULT_CACHE_SIZE", "10000"))
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+# Keys
+def normalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    return urlunsplit((scheme, host, parts.path or "/", parts.query, ""))
+
+
+def normalize(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        value = value.model_dump()
+    if isinstance(value, Enum):
+        value = value.value
+    if isinstance(value, dict):
+        return {str(k): normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    if value is not None and not isinstance(value, (str, int, float, bool)):
+        value = str(value)  # pydantic URL types and the like
+    if isinstance(value, str):
+        value = value.strip()
+        if value.startswith(("http://", "https://", "HTTP://", "HTTPS://")):
+            return normalize_url(value)
+    return value
+
+
+def request_key(operation: str, request: Any) -> str:
+    canonical = json.dumps([operation, normalize(request)], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+# Coalescing
+class SingleFlight:
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._results: "collections.OrderedDict[str, Tuple[float, float, Any]]" = collections.OrderedDict()
+        self._in_flight: Dict[str, Tuple[asyncio.Task, list]] = {}
+        self.executions: Dict[str, int] = {}
+        self.coalesced: Dict[str, int] = {}
+        self.cache_hits: Dict[str, int] = {}
+        self.seconds_saved = 0.0
+        self.evictions = 0
+
+    async def run(self, operation: str, request: Any, work: Callable[[], Awaitable]):
+        """Result of ``work()`` for this request, computing it at most once across concurrent callers."""
+        key = request_key(operation, request)
+        cached = self._results.get(key)
+        if cached is not None:
+            expires, elapsed, result = cached
+            if expires > time.monotonic():
+                self._results.move_to_end(key)
+                self.cache_hits[operation] = self.cache_hits.get(operation, 0) + 1
+                self.seconds_saved += elapsed
+                return result
+            del self._results[key]
+
+        flight = self._in_flight.get(key)
+        if flight is None:
+            waiters = [0]  # callers that attached to this flight
+            task = asyncio.ensure_future(self._execute(key, work, waiters))
+            self._in_flight[key] = flight = (task, waiters)
+            self.executions[operation] = self.executions.get(operation, 0) + 1
+        else:
+            flight[1][0] += 1
+            self.coalesced[operation] = self.coalesced.get(operation, 0) + 1
+        return await asyncio.shield(flight[0])
+
+    async def _execute(self, key: str, work: Callable[[], Awaitable], waiters: list):
+        start = time.monotonic()
+        try:
+            result = await work()
+        finally:
+            self._in_flight.pop(key, None)
+        elapsed = time.monotonic() - start
+        self.seconds_saved += elapsed * waiters[0]
+        self._store(key, elapsed, result)
+        return result
+
+    def _store(self, key: str, elapsed: float, result: Any):
+        if self.max_entries <= 0:
+            return
+        self._results[key] = (time.monotonic() + self.ttl, elapsed, result)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+            self.evictions += 1
+
+    # Snapshots
+    def dump(self) -> bytes:
+        """Unexpired results as (key, seconds left, elapsed, JSON result) rows, least recently used first."""
+        now = time.monotonic()
+        return snapshots.pack_table("sdds", [(key, expires - now, elapsed, json.dumps(result))
+                                             for key, (expires, elapsed, result) in self._results.items()
+                                             if expires > now])
+
+    def load(self, payload: memoryview):
+        now = time.monotonic()
+        for key, remaining, elapsed, result in snapshots.unpack_table("sdds", payload):
+            self._results[key] = (now + remaining, elapsed, json.loads(result))
+            self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def stats(self) -> Dict[str, Any]:
+        executions = sum(self.executions.values())
+        avoided = sum(self.coalesced.values()) + sum(self.cache_hits.values())
+        return {
+            "entries": len(self._results),
+            "max_entries": self.max_entries,
+            "in_flight": self.in_flight,
+            "executions": executions,
+            "coalesced": sum(self.coalesced.values()),
+            "cache_hits": sum(self.cache_hits.values()),
+            "evictions": self.evictions,
+            "duplicate_work_avoided_ratio": avoided / (executions + avoided) if executions + avoided else 0.0,
+            "seconds_saved": self.seconds_saved,
+        }
+
+
+coalescer = SingleFlight()
+
+
+def metric_samples():
+    operations = sorted(set(coalescer.executions) | set(coalescer.coalesced) | set(coalescer.cache_hits))
+    return [
+        ("aidae_enhancement_requests_total", "counter",
+         "Enhancement requests by how they were served: executed, coalesced onto an in-flight run, or cached.",
+         [({"operation": op, "outcome": outcome}, counts.get(op, 0)) for op in operations
+          for outcome, counts in (("executed", coalescer.executions), ("coalesced", coalescer.coalesced),
+                                  ("cached", coalescer.cache_hits))]),
+        ("aidae_enhancement_duplicate_seconds_saved_total", "counter",
+         "Computation time avoided by coalescing and the result cache.", [({}, round(coalescer.seconds_saved, 6))]),
+        ("aidae_enhancement_result_cache_entries", "gauge", "Cached enhancement results.",
+         [({}, len(coalescer._results))]),
+        ("aidae_enhancement_in_flight", "gauge", "Distinct enhancement computations running.",
+         [({}, coalescer.in_flight)]),
+    ]
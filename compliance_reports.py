@@ -0,0 +1,246 @@
+"""
+Structured compliance reports: per-item findings with rule IDs and
+severities, stored as they are produced and read back page by page.
+
+A report is a row of summary counts plus an append-only list of findings in
+``shared_state``. Checks run in chunks of ``chunk_size`` items. Each chunk's
+findings and its contribution to the summary (per-severity and per-rule
+counts, items failing) are written in one transaction, so the headline
+numbers are a single-row read at any point, and a report of any size is
+never held in memory. Findings are served as keyset-paginated JSON or
+streamed as NDJSON straight from the store.
+
+An archive verification is a report row waiting in the store. Every worker
+runs a ``ReportRunner`` (started with the app) that claims one under a lease,
+checks the batch chunk by chunk and records with each chunk the last item
+checked, renewing the lease. If its worker dies, another claims the report
+once the lease runs out and resumes after that item.
+
+Each report records the checker that produced its findings. Until the
+accessibility analysers are wired in that is the placeholder checker, and a
+placeholder report never says whether the subject is compliant.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import uuid
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from shared_state import StateStore, state
+
+SEVERITIES = ("critical", "serious", "moderate", "minor")
+CHECKER = "placeholder"  # the checker check_item implements; reports from it make no compliance determination
+DEFAULT_CONCURRENCY = int(os.environ.get("AI_DAE_REPORT_CONCURRENCY", "1"))
+DEFAULT_POLL_INTERVAL = float(os.environ.get("AI_DAE_REPORT_POLL_INTERVAL", "0.5"))
+DEFAULT_LEASE = float(os.environ.get("AI_DAE_REPORT_LEASE", "60"))
+
+
+@dataclass(frozen=True)
+class Rule:
+    rule_id: str
+    title: str
+    severity: str
+    content_types: Tuple[str, ...]
+
+
+RULES: Dict[str, Rule] = {r.rule_id: r for r in (
+    Rule("WCAG-1.1.1", "Non-text content has a text alternative", "critical", ("image", "document", "service")),
+    Rule("WCAG-1.2.2", "Prerecorded video has captions", "critical", ("video",)),
+    Rule("WCAG-1.2.5", "Prerecorded video has audio description", "serious", ("video",)),
+    Rule("WCAG-1.3.1", "Structure is conveyed by markup or tags", "serious", ("document", "service")),
+    Rule("WCAG-1.4.3", "Text has a contrast ratio of at least 4.5:1", "serious", ("image", "document", "service")),
+    Rule("WCAG-2.4.2", "Document has a descriptive title", "moderate", ("document", "service")),
+    Rule("WCAG-3.1.1", "Default language is declared", "moderate", ("document", "service", "video")),
+    Rule("WCAG-2.4.4", "Link purpose is clear from its text", "minor", ("document", "service")),
+)}
+
+# Every supported standard incorporates WCAG success criteria at level AA.
+STANDARDS: Dict[str, str] = {
+    "wcag 2.0": "WCAG 2.0 Level AA", "wcag 2.1": "WCAG 2.1 Level AA", "wcag 2.2": "WCAG 2.2 Level AA",
+    "ada": "ADA", "section 508": "Section 508", "en 301 549": "EN 301 549",
+}
+
+
+def resolve_standards(standards: Sequence[str]) -> List[str]:
+    """Canonical names for ``standards``; ValueError naming any that are not supported."""
+    resolved, unknown = [], []
+    for name in standards:
+        key = " ".join(name.lower().replace("level", " ").split())
+        match = next((canonical for prefix, canonical in STANDARDS.items() if key.startswith(prefix)), None)
+        (resolved if match else unknown).append(match or name)
+    if unknown:
+        raise ValueError(f"Unsupported standards: {', '.join(unknown)}; supported: {', '.join(STANDARDS.values())}")
+    return sorted(set(resolved))
+
+
+def check_item(item_id: str, content_type: str) -> List[Tuple[str, str, str, str]]:
+    """
+    Placeholder checker until the accessibility analysers are wired in: each
+    applicable rule fails for a stable pseudo-random subset of items.
+    """
+    findings = []
+    for rule in RULES.values():
+        if content_type in rule.content_types:
+            draw = int.from_bytes(hashlib.sha256(f"{item_id}|{rule.rule_id}".encode()).digest()[:2], "little")
+            if draw < 0.12 * 65536:
+                findings.append((item_id, rule.rule_id, rule.severity, f"{rule.title}: check failed for {item_id}."))
+    return findings
+
+
+def summary(report: dict) -> dict:
+    """The API view of a stored report: its precomputed counts and a one-line headline."""
+    severity = report["severity_counts"]
+    placeholder = report["checker"] == "placeholder"
+    compliant = None
+    if report["status"] == "completed" and not placeholder:
+        compliant = not (severity.get("critical") or severity.get("serious"))
+    headline = (f"{report['items_checked']}/{report['items_total']} items checked against "
+                f"{', '.join(report['standards'])}: {report['findings_total']} findings "
+                f"({', '.join(f'{severity.get(s, 0)} {s}' for s in SEVERITIES)}), "
+                f"{report['items_failing']} items failing.")
+    if placeholder:
+        headline += " Placeholder findings, not a compliance determination."
+    return {
+        "report_id": report["report_id"],
+        "subject": report["subject"],
+        "status": report["status"],
+        "standards": report["standards"],
+        "items_total": report["items_total"],
+        "items_checked": report["items_checked"],
+        "items_failing": report["items_failing"],
+        "findings_total": report["findings_total"],
+        "by_severity": {s: severity.get(s, 0) for s in SEVERITIES},
+        "by_rule": dict(sorted(report["rule_counts"].items())),
+        "checker": report["checker"],
+        "compliant": compliant,
+        "compliance_report": headline,
+    }
+
+
+class ReportRunner:
+    def __init__(self, shared: StateStore = state, chunk_size: int = 500, concurrency: int = DEFAULT_CONCURRENCY,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL, lease: float = DEFAULT_LEASE):
+        self.shared = shared
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.reports_started = 0
+        self.reports_resumed = 0
+        self.reports_failed = 0
+        self.findings_written = 0
+        self.active = 0
+        self._tasks: List[asyncio.Task] = []
+        self._wake: Optional[asyncio.Event] = None
+
+    @property
+    def worker(self) -> str:
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def _record(self, report_id: str, items: Sequence[Tuple[str, str]], findings: list, finished: bool,
+                checked_through: int = 0, worker: Optional[str] = None) -> bool:
+        recorded = self.shared.add_findings(report_id, len(items), len({f[0] for f in findings}), findings,
+                                            finished=finished, checked_through=checked_through, worker=worker)
+        if recorded:
+            self.findings_written += len(findings)
+        return recorded
+
+    def check(self, subject: str, item_id: str, content_type: str, standards: Sequence[str]) -> dict:
+        """Check a single item now; returns the completed report."""
+        report_id = uuid.uuid4().hex
+        self.shared.create_report(report_id, subject, standards, 1, CHECKER)
+        self.reports_started += 1
+        self._record(report_id, [(item_id, content_type)], check_item(item_id, content_type), finished=True)
+        return self.shared.report(report_id)
+
+    async def verify_batch(self, batch: dict, standards: Sequence[str]) -> dict:
+        """Queue a check of every item of an archive batch for any worker to claim; returns the new report."""
+        report_id = uuid.uuid4().hex
+        await asyncio.to_thread(self.shared.create_report, report_id, f"batch:{batch['batch_id']}", standards,
+                                batch["total"], CHECKER, batch["batch_id"], batch["content_type"])
+        self.reports_started += 1
+        if self._wake is not None:
+            self._wake.set()
+        return await asyncio.to_thread(self.shared.report, report_id)
+
+    # Claiming
+    def start(self):
+        """Start claiming reports on the running loop (once per loop)."""
+        loop = asyncio.get_running_loop()
+        if self.concurrency <= 0 or any(not t.done() and t.get_loop() is loop for t in self._tasks):
+            return
+        self._wake = asyncio.Event()
+        self._tasks = [loop.create_task(self._run()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        """Stop claiming; a report being checked is resumed by a worker once its lease runs out."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self):
+        worker = self.worker
+        while True:
+            claimed = await asyncio.to_thread(self.shared.claim_report, worker, self.lease)
+            if claimed is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self.reports_resumed += claimed["checked_through"] > 0
+            self.active += 1
+            try:
+                await self._verify(claimed, worker)
+            except Exception:
+                self.reports_failed += 1
+                await asyncio.to_thread(self.shared.fail_report, claimed["report_id"])
+            finally:
+                self.active -= 1
+
+    async def _verify(self, claimed: dict, worker: str):
+        report_id, after = claimed["report_id"], claimed["checked_through"]
+        while True:
+            rows = await asyncio.to_thread(self.shared.batch_items, claimed["batch_id"], after, self.chunk_size)
+            items = [(item_id, claimed["content_type"]) for _, item_id in rows]
+            findings = await asyncio.to_thread(lambda: [f for i, t in items for f in check_item(i, t)])
+            finished = len(rows) < self.chunk_size
+            after = rows[-1][0] if rows else after
+            if not await asyncio.to_thread(self._record, report_id, items, findings, finished, after, worker):
+                return  # the lease ran out and another worker has the report now
+            if finished:
+                return
+
+
+runner = ReportRunner()
+
+
+async def ndjson(report_id: str, severity: Optional[str] = None, rule_id: Optional[str] = None,
+                 page_size: int = 1000, shared: StateStore = state) -> AsyncIterator[bytes]:
+    """Stream a report's findings as NDJSON, one page of rows read at a time."""
+    after = 0
+    while True:
+        rows = await asyncio.to_thread(shared.findings, report_id, after, page_size, severity, rule_id)
+        if not rows:
+            return
+        after = rows[-1]["seq"]
+        yield "".join(json.dumps(row, separators=(",", ":")) + "\n" for row in rows).encode()
+
+
+def metric_samples():
+    return [
+        ("aidae_compliance_reports_total", "counter", "Compliance reports started.", [({}, runner.reports_started)]),
+        ("aidae_compliance_findings_total", "counter", "Compliance findings written.",
+         [({}, runner.findings_written)]),
+        ("aidae_compliance_reports_running", "gauge", "Archive verifications this worker is checking.",
+         [({}, runner.active)]),
+        ("aidae_compliance_reports_resumed_total", "counter",
+         "Archive verifications this worker took over part-way through.", [({}, runner.reports_resumed)]),
+        ("aidae_compliance_reports_failed_total", "counter", "Archive verifications that failed on this worker.",
+         [({}, runner.reports_failed)]),
+    ]
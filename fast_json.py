@@ -0,0 +1,135 @@
+"""
+Fast-path JSON responses for the hot read endpoints.
+
+A route normally returns a dict; FastAPI then validates it against the
+``response_model``, walks it with ``jsonable_encoder`` and encodes it with
+the standard ``json`` module. For records the app built itself that work
+is redundant, so the hot reads instead return a ``FastJSONResponse``, which
+FastAPI sends as is:
+
+* ``Serializer(model)`` is built once per response model and copies the
+  model's fields (in order, with their defaults) out of a trusted record,
+  without validating them;
+* bodies are encoded with orjson when it is installed (stdlib ``json``
+  otherwise);
+* ``EncodedCache`` keeps the encoded bytes of recently read records with a
+  caller-supplied version token, so an unchanged record is not encoded
+  again.
+
+The ``response_model`` stays on the route, so the OpenAPI schema is
+unchanged. ``AI_DAE_FAST_JSON=0`` turns the fast path off and the routes
+return plain dicts through FastAPI's usual path.
+"""
+import collections
+import json
+import os
+from typing import Any, Callable, Hashable, Iterable, Optional, Sequence, Tuple, Type, Union
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+enabled = os.environ.get("AI_DAE_FAST_JSON", "1") != "0"
+DEFAULT_MAX_ENTRIES = int(os.environ.get("AI_DAE_ENCODED_CACHE_SIZE", "10000"))
+_MISSING = object()
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=jsonable_encoder)
+    return json.dumps(content, default=jsonable_encoder, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(Response):
+    """JSON response whose content may already be encoded bytes."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return content if isinstance(content, bytes) else dumps(content)
+
+
+class Serializer:
+    """Shapes trusted records as ``model`` (or the named ``fields``) would, without validating them."""
+
+    def __init__(self, model: Union[Type[BaseModel], Sequence[str]]):
+        if isinstance(model, type) and issubclass(model, BaseModel):
+            self.fields: Tuple[Tuple[str, str, Any], ...] = tuple(
+                (name, info.alias or name, _MISSING if info.is_required() else info.get_default(call_default_factory=True))
+                for name, info in model.model_fields.items())
+        else:
+            self.fields = tuple((name, name, _MISSING) for name in model)
+
+    def to_dict(self, record: Any) -> dict:
+        """``record`` (a mapping or an object with the fields as attributes) as a plain dict."""
+        get = record.get if isinstance(record, dict) else lambda name, default: getattr(record, name, default)
+        shaped = {}
+        for name, alias, default in self.fields:
+            value = get(name, default)
+            if value is _MISSING:
+                raise KeyError(f"record has no field {name!r}")
+            shaped[alias] = value
+        return shaped
+
+    def encode(self, record: Any) -> bytes:
+        return dumps(self.to_dict(record))
+
+    def encode_many(self, records: Iterable[Any]) -> bytes:
+        return dumps([self.to_dict(record) for record in records])
+
+
+class EncodedCache:
+    """LRU of encoded response bodies, each valid while its version token is unchanged."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "collections.OrderedDict[Hashable, Tuple[Hashable, bytes]]" = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, token: Hashable, encode: Callable[[], bytes]) -> bytes:
+        """The cached body for ``key`` at version ``token``, encoding (and caching) it if needed."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == token:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        body = encode()
+        self._entries[key] = (token, body)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return body
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+cache = EncodedCache()
+
+
+def respond(serializer: Serializer, record: Any, key: Optional[Hashable] = None, token: Hashable = None,
+            many: bool = False) -> Any:
+    """
+    The response for a trusted ``record`` (a list of records if ``many``):
+    a ``FastJSONResponse``, from the cache when ``key`` is given and its
+    ``token`` still matches, or the shaped dict(s) when the fast path is off.
+    """
+    if not enabled:
+        return [serializer.to_dict(r) for r in record] if many else serializer.to_dict(record)
+    encode = (lambda: serializer.encode_many(record)) if many else (lambda: serializer.encode(record))
+    return FastJSONResponse(encode() if key is None else cache.get(key, token, encode))
+
+
+def metric_samples():
+    return [
+        ("aidae_encoded_cache_lookups_total", "counter", "Encoded response body cache lookups, by result.",
+         [({"result": "hit"}, cache.hits), ({"result": "miss"}, cache.misses)]),
+        ("aidae_encoded_cache_entries", "gauge", "Encoded response bodies cached.", [({}, len(cache))]),
+    ]
@@ -0,0 +1,172 @@
+"""
+Append-only feedback log with group commit and shared rating aggregates.
+
+``FeedbackLog.append`` waits for its entry to be written. Entries arriving
+together are written by one flusher in a single write + fsync, triggered
+when ``max_batch`` entries are pending or ``max_delay`` seconds have passed,
+so a burst of feedback costs a handful of disk syncs rather than one per
+request. The per-content rating histograms live in ``shared_state``, so
+every worker appending to the log adds to, and reads, the same aggregates.
+A batch is counted once it is durable, so they never count an entry the log
+does not hold; once it is durable its callers succeed, and if counting it
+fails its ratings are counted with the next batch instead, so a retried
+request never logs the same feedback twice. They are rebuilt from the log only when the state database
+has never been seeded (a new database next to an existing log), once across
+all workers.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from shared_state import StateStore, state
+
+DEFAULT_PATH = os.environ.get("AI_DAE_FEEDBACK_LOG", "feedback.jsonl")
+MIN_RATING, MAX_RATING = 1, 5
+
+
+def rating_summary(content_id: str, histogram: Dict[int, int]) -> dict:
+    count = sum(histogram.values())
+    return {
+        "content_id": content_id,
+        "count": count,
+        "average_rating": sum(r * n for r, n in histogram.items()) / count if count else 0.0,
+        "rating_histogram": {str(r): n for r, n in sorted(histogram.items())},
+    }
+
+
+class FeedbackLog:
+    def __init__(self, path: str = DEFAULT_PATH, max_batch: int = 256, max_delay: float = 0.005,
+                 fsync: bool = True, shared: StateStore = state):
+        self.path = path
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.fsync = fsync
+        self.shared = shared
+        self.flushes = 0
+        self.entries_written = 0
+        self.count_failures = 0
+        self._uncounted: List[Tuple[str, int]] = []  # logged, but not yet in the shared aggregates
+        self._pending: List[Tuple[str, str, int, asyncio.Future]] = []
+        self._file = None
+        self._file_lock = threading.Lock()
+        self._loop = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._batch_full: Optional[asyncio.Future] = None
+        shared.seed_ratings(self._replay)
+
+    def _replay(self) -> Iterator[Tuple[str, int]]:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as log:
+            for line in log:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn final line from a crash mid-write
+                rating = record.get("satisfaction_rating")
+                if isinstance(rating, int) and MIN_RATING <= rating <= MAX_RATING:
+                    yield record["content_id"], rating
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def summary(self, content_id: str) -> Optional[dict]:
+        """Rating aggregates for ``content_id`` across all workers; a store read, so call it off the event loop."""
+        histogram = self.shared.rating_histogram(content_id)
+        return rating_summary(content_id, histogram) if histogram else None
+
+    async def append(self, content_id: str, user_feedback: str, satisfaction_rating: int):
+        """Record one entry; returns once it is durably in the log."""
+        record = {"ts": time.time(), "content_id": content_id, "user_feedback": user_feedback,
+                  "satisfaction_rating": satisfaction_rating}
+        loop = asyncio.get_running_loop()
+        committed = loop.create_future()
+        self._pending.append((json.dumps(record) + "\n", content_id, satisfaction_rating, committed))
+        self._schedule(loop)
+        await committed
+
+    def _schedule(self, loop):
+        if self._loop is not loop:
+            self._loop, self._flusher = loop, None
+        if self._flusher is None or self._flusher.done():
+            self._batch_full = loop.create_future()
+            self._flusher = loop.create_task(self._flush())
+        elif len(self._pending) >= self.max_batch and not self._batch_full.done():
+            self._batch_full.set_result(None)
+
+    async def _flush(self):
+        while self._pending:
+            if len(self._pending) < self.max_batch:
+                try:
+                    await asyncio.wait_for(asyncio.shield(self._batch_full), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+            batch, self._pending = self._pending, []
+            self._batch_full = self._loop.create_future()
+            try:
+                await asyncio.to_thread(self._commit, "".join(line for line, _, _, _ in batch),
+                                        [(content_id, rating) for _, content_id, rating, _ in batch])
+            except Exception as e:
+                for _, _, _, committed in batch:
+                    if not committed.done():
+                        committed.set_exception(e)
+                continue
+            self.flushes += 1
+            self.entries_written += len(batch)
+            for _, _, _, committed in batch:
+                if not committed.done():
+                    committed.set_result(None)
+
+    def _commit(self, data: str, ratings: List[Tuple[str, int]]):
+        self._write(data)  # if this fails nothing was logged, and the callers see the error
+        self._uncounted.extend(ratings)
+        self._count()
+
+    def _count(self):
+        uncounted, self._uncounted = self._uncounted, []
+        if not uncounted:
+            return
+        try:
+            self.shared.add_ratings(uncounted)
+        except Exception:
+            # The entries are in the log, so their callers succeed; count them with the next batch.
+            self._uncounted = uncounted + self._uncounted
+            self.count_failures += 1
+
+    def _write(self, data: str):
+        with self._file_lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(data)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    def close(self):
+        self._count()
+        with self._file_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+feedback_log = FeedbackLog()
+
+
+def metric_samples():
+    return [
+        ("aidae_feedback_pending_entries", "gauge", "Feedback entries waiting for the next group commit.",
+         [({}, feedback_log.pending)]),
+        ("aidae_feedback_flushes_total", "counter", "Group commits written to the feedback log.",
+         [({}, feedback_log.flushes)]),
+        ("aidae_feedback_entries_written_total", "counter", "Feedback entries written to the log.",
+         [({}, feedback_log.entries_written)]),
+        ("aidae_feedback_uncounted_entries", "gauge", "Logged feedback entries not yet in the rating aggregates.",
+         [({}, len(feedback_log._uncounted))]),
+        ("aidae_feedback_count_failures_total", "counter", "Failed updates of the shared rating aggregates.",
+         [({}, feedback_log.count_failures)]),
+    ]
@@ -0,0 +1,298 @@
+"""
+Single-pass streaming HTML rewriter for screen reader optimization.
+
+``HtmlRewriter`` is fed the document in arbitrary chunks and returns the
+rewritten output as soon as it is safe to emit, so memory stays bounded by
+the chunk size plus one incomplete tag. Only the handful of tags a
+transformation can touch are tokenized; all other markup and text is copied
+through as slices. Script, style and comment bodies are passed through
+untouched.
+
+Transformations (keys of ``specific_enhancements``):
+
+- ``aria_roles``: explicit roles on semantic elements, ``presentation`` on decorative images
+- ``landmarks``: landmark roles on ``div``/``section`` layouts hinted by ``id``/``class``
+- ``heading_normalization``: no skipped heading levels, document starts at ``h1``
+- ``alt_text``: ``alt`` attributes for images that have none
+"""
+import asyncio
+import codecs
+import functools
+import html
+import os
+import re
+from typing import Callable, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from starlette.responses import StreamingResponse
+
+ENHANCEMENTS = ("aria_roles", "landmarks", "heading_normalization", "alt_text")
+
+SEMANTIC_ROLES = {
+    "header": "banner",
+    "nav": "navigation",
+    "main": "main",
+    "footer": "contentinfo",
+    "aside": "complementary",
+    "form": "form",
+}
+LANDMARK_HINTS = {
+    "header": "banner", "masthead": "banner", "banner": "banner",
+    "nav": "navigation", "navbar": "navigation", "navigation": "navigation", "menu": "navigation",
+    "main": "main", "content": "main",
+    "sidebar": "complementary", "aside": "complementary",
+    "footer": "contentinfo",
+    "search": "search",
+}
+# Longest incomplete tag carried between chunks before it is given up on as text.
+MAX_CARRY = 64 * 1024
+
+_ATTR_TEXT = r"((?:[^>\"']|\"[^\"]*\"|'[^']*')*)"
+_RAW_END = {
+    "script": re.compile(r"</script\s*>", re.IGNORECASE),
+    "style": re.compile(r"</style\s*>", re.IGNORECASE),
+    "!--": re.compile(r"-->"),
+}
+_ATTR_RE = re.compile(r"""([^\s=/>"']+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s>"']+))?""")
+_TOKEN_SPLIT = re.compile(r"[\s_-]+")
+
+
+@functools.lru_cache(maxsize=None)
+def _tag_pattern(enhancements: frozenset):
+    """
+    Tokenizer for only the tags the enabled transformations need to see.
+
+    Every other tag is left to the plain-text path, which is what keeps the
+    rewriter fast on markup-heavy documents.
+    """
+    opening = {"script", "style"}
+    closing = set()
+    if "heading_normalization" in enhancements:
+        opening.add("h[1-6]")
+        closing.add("h[1-6]")
+    if "aria_roles" in enhancements:
+        opening.update(("img", "header", "nav", "main", "footer", "aside", "form", "section", "article"))
+        closing.update(("section", "article"))
+    if "landmarks" in enhancements:
+        opening.update(("div", "section"))
+    if "alt_text" in enhancements:
+        opening.add("img")
+    alternatives = ["!--", f"()({'|'.join(sorted(opening))})\\b{_ATTR_TEXT}>"]
+    if closing:
+        alternatives.append(f"(/)({'|'.join(sorted(closing))})\\b{_ATTR_TEXT}>")
+    return re.compile("<(?:" + "|".join(alternatives) + ")", re.IGNORECASE)
+
+
+def parse_enhancements(specific_enhancements: Optional[dict]) -> frozenset:
+    """Enabled transformations from a ``specific_enhancements`` payload; empty means all."""
+    if not specific_enhancements:
+        return frozenset(ENHANCEMENTS)
+    unknown = set(specific_enhancements) - set(ENHANCEMENTS)
+    if unknown:
+        raise ValueError(f"Unknown enhancements: {', '.join(sorted(unknown))}")
+    return frozenset(name for name, enabled in specific_enhancements.items() if enabled)
+
+
+def alt_text_from_src(src: Optional[str]) -> str:
+    """Fallback alt text derived from the image file name."""
+    name = os.path.splitext(os.path.basename(urlsplit(src or "").path))[0]
+    words = _TOKEN_SPLIT.split(name.strip())
+    return " ".join(w for w in words if w).capitalize() or "Image"
+
+
+def _attributes(text: str) -> dict:
+    attrs = {}
+    for name, value in _ATTR_RE.findall(text):
+        if value[:1] in ("'", '"'):
+            value = value[1:-1]
+        attrs.setdefault(name.lower(), html.unescape(value))
+    return attrs
+
+
+class HtmlRewriter:
+    def __init__(self, enhancements: Iterable[str] = ENHANCEMENTS,
+                 alt_text: Callable[[Optional[str]], str] = alt_text_from_src):
+        self.enhancements = frozenset(enhancements)
+        self._pattern = _tag_pattern(self.enhancements)
+        self.alt_text = alt_text
+        self.changes = dict.fromkeys(ENHANCEMENTS, 0)
+        self.bytes_in = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._carry = ""
+        self._raw_end = None
+        self._headings: List[int] = []
+        self._last_heading = 0
+        self._sectioning_depth = 0
+        self._main_assigned = False
+
+    def feed(self, data) -> str:
+        if isinstance(data, bytes):
+            self.bytes_in += len(data)
+            data = self._decoder.decode(data)
+        else:
+            self.bytes_in += len(data)
+        return self._process(self._carry + data, final=False)
+
+    def close(self) -> str:
+        return self._process(self._carry + self._decoder.decode(b"", final=True), final=True)
+
+    def _process(self, buf: str, final: bool) -> str:
+        out = []
+        pos = 0
+        while True:
+            if self._raw_end is not None:
+                m = self._raw_end.search(buf, pos)
+                if m is None:
+                    # Hold back enough to complete a split end marker.
+                    keep = 0 if final else min(len(buf) - pos, 16)
+                    out.append(buf[pos:len(buf) - keep])
+                    pos = len(buf) - keep
+                    break
+                out.append(buf[pos:m.end()])
+                pos = m.end()
+                self._raw_end = None
+                continue
+            m = self._pattern.search(buf, pos)
+            if m is None:
+                safe = len(buf)
+                lt = buf.rfind("<", pos)
+                if not final and lt != -1 and buf.find(">", lt) == -1 and len(buf) - lt < MAX_CARRY:
+                    safe = lt
+                out.append(buf[pos:safe])
+                pos = safe
+                break
+            out.append(buf[pos:m.start()])
+            out.append(self._rewrite(m))
+            pos = m.end()
+        self._carry = buf[pos:]
+        return "".join(out)
+
+    def _rewrite(self, m) -> str:
+        groups = m.groups()
+        closing, name, attr_text = groups[:3] if groups[1] is not None or len(groups) == 3 else groups[3:]
+        if name is None:
+            self._raw_end = _RAW_END["!--"]
+            return m.group(0)
+        name = name.lower()
+        if closing:
+            if name[0] == "h" and name[1:].isdigit() and self._headings:
+                level = self._headings.pop()
+                if "heading_normalization" in self.enhancements:
+                    return f"</h{level}>"
+            elif name in ("section", "article"):
+                self._sectioning_depth = max(0, self._sectioning_depth - 1)
+            return m.group(0)
+        if name in _RAW_END:
+            self._raw_end = _RAW_END[name]
+            return m.group(0)
+        if name in ("section", "article"):
+            self._sectioning_depth += 1
+        if name[0] == "h" and name[1:].isdigit():
+            return self._heading(m, int(name[1]), attr_text)
+
+        extra = []
+        has_role = "role" in attr_text.lower() and "role" in _attributes(attr_text)
+        if name == "img":
+            attrs = None
+            if "alt_text" in self.enhancements:
+                attrs = _attributes(attr_text)
+                if "alt" not in attrs:
+                    extra.append(("alt", self.alt_text(attrs.get("src"))))
+                    self.changes["alt_text"] += 1
+            if "aria_roles" in self.enhancements and not has_role:
+                if attrs is None:
+                    attrs = _attributes(attr_text)
+                if attrs.get("alt") == "":
+                    extra.append(("role", "presentation"))
+                    self.changes["aria_roles"] += 1
+        elif not has_role:
+            role = None
+            if "aria_roles" in self.enhancements and name in SEMANTIC_ROLES:
+                role = SEMANTIC_ROLES[name]
+                if role in ("banner", "contentinfo") and self._sectioning_depth:
+                    role = None
+                key = "aria_roles"
+            elif "landmarks" in self.enhancements and name in ("div", "section"):
+                role = self._landmark(attr_text)
+                key = "landmarks"
+            if role == "main":
+                if self._main_assigned:
+                    role = None
+                self._main_assigned = True
+            if role:
+                extra.append(("role", role))
+                self.changes[key] += 1
+        if not extra:
+            return m.group(0)
+        return self._with_attributes(m.group(0), extra)
+
+    def _heading(self, m, level: int, attr_text: str) -> str:
+        new_level = min(level, self._last_heading + 1)
+        self._headings.append(new_level if "heading_normalization" in self.enhancements else level)
+        self._last_heading = new_level
+        if "heading_normalization" not in self.enhancements or new_level == level:
+            return m.group(0)
+        self.changes["heading_normalization"] += 1
+        return f"<h{new_level}{attr_text}>"
+
+    def _landmark(self, attr_text: str) -> Optional[str]:
+        if "id" not in attr_text.lower() and "class" not in attr_text.lower():
+            return None
+        attrs = _attributes(attr_text)
+        for value in (attrs.get("id"), attrs.get("class")):
+            if value:
+                for token in _TOKEN_SPLIT.split(value.lower()):
+                    if token in LANDMARK_HINTS:
+                        return LANDMARK_HINTS[token]
+        return None
+
+    @staticmethod
+    def _with_attributes(tag: str, extra) -> str:
+        added = "".join(f' {name}="{html.escape(value, quote=True)}"' for name, value in extra)
+        end = len(tag) - 2 if tag.endswith("/>") else len(tag) - 1
+        return tag[:end].rstrip() + added + tag[end:]
+
+
+def rewrite(chunks: Iterable, write: Callable[[str], object], enhancements: Iterable[str] = ENHANCEMENTS,
+            alt_text: Callable[[Optional[str]], str] = alt_text_from_src) -> HtmlRewriter:
+    """Rewrite ``chunks`` into ``write`` in one pass; returns the rewriter for its ``changes``."""
+    rewriter = HtmlRewriter(enhancements, alt_text)
+    for chunk in chunks:
+        out = rewriter.feed(chunk)
+        if out:
+            write(out)
+    out = rewriter.close()
+    if out:
+        write(out)
+    return rewriter
+
+
+class RewriteStreamingResponse(StreamingResponse):
+    """
+    Streams the rewritten request body straight back to the client.
+
+    Request chunks are pulled from ``receive`` inside the response itself, so
+    reading the upload and writing the output share one coroutine and neither
+    side is buffered in full. Each chunk is rewritten in a worker thread
+    (alt text hashes a decoded image per ``<img>``), so a large document does
+    not hold up the event loop.
+    """
+
+    def __init__(self, rewriter: HtmlRewriter, status_code: int = 200, headers: Optional[dict] = None):
+        super().__init__(iter(()), status_code=status_code, headers=headers,
+                         media_type="text/html; charset=utf-8")
+        self.rewriter = rewriter
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            more_body = message.get("more_body", False)
+            out = await asyncio.to_thread(self.rewriter.feed, message.get("body", b""))
+            if out:
+                await send({"type": "http.response.body", "body": out.encode(), "more_body": True})
+        out = await asyncio.to_thread(self.rewriter.close)
+        await send({"type": "http.response.body", "body": out.encode(), "more_body": False})
@@ -0,0 +1,268 @@
+"""
+``Idempotency-Key`` support for POST endpoints that create work.
+
+A client that times out and retries ``POST /content/ingest`` with the same
+``Idempotency-Key`` header gets the response of its first attempt instead
+of a second content id. ``install(app)`` adds a pure ASGI middleware that,
+for covered POSTs carrying the header,
+
+1. looks the key up (scoped to the client, method and path) in
+   ``shared_state``, with TTL expiry and a bound on the keys kept, so a
+   retry finds the first attempt whichever worker it reaches;
+2. replays a stored response as-is, with ``Idempotent-Replayed: true``;
+3. makes a retry that arrives while the first call is still running wait
+   for that call and then replay its response (on the same worker it waits
+   for the call to finish; on another it polls the store);
+4. otherwise runs the request, recording the response as it is sent and
+   storing it as soon as its last body chunk goes out (before any
+   background tasks the endpoint started have run).
+
+The request body is fingerprinted, and reusing a key for a different body
+is answered 422. Server errors (5xx) and oversized responses are not
+stored, so a retry after those runs the work again, as does one that finds
+a call still running after ``lease`` seconds (its worker died). Requests
+without the header are passed straight through, as are the streaming
+endpoints (``DEFAULT_EXCLUDED``): fingerprinting reads the whole request
+body into memory, which those endpoints exist to avoid, and a streamed
+response is not one to replay.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import FastAPI
+
+from admission import client_key, current_client
+from shared_state import StateStore, state
+
+DEFAULT_TTL = float(os.environ.get("AI_DAE_IDEMPOTENCY_TTL", "86400"))
+DEFAULT_MAX_KEYS = int(os.environ.get("AI_DAE_IDEMPOTENCY_MAX_KEYS", "10000"))
+DEFAULT_LEASE = float(os.environ.get("AI_DAE_IDEMPOTENCY_LEASE", "60"))
+MAX_KEY_LENGTH = 255
+MAX_STORED_BODY = 1 << 20
+DEFAULT_PATHS = ("/content/ingest", "/archives/content/ingest")
+DEFAULT_PREFIXES = ("/enhancements/",)
+DEFAULT_EXCLUDED = ("/enhancements/screen-reader-optimization/html", "/enhancements/text-to-speech/stream")
+
+Key = Tuple[str, str, str, str]  # (client, method, path, Idempotency-Key)
+
+
+@dataclass
+class StoredResponse:
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+
+def _stored(entry: Dict) -> StoredResponse:
+    return StoredResponse(entry["status"], [(k.encode("latin-1"), v.encode("latin-1"))
+                                            for k, v in json.loads(entry["headers"])], entry["body"])
+
+
+class IdempotencyStore:
+    """Keys and stored responses in ``shared``, plus this worker's calls still running."""
+
+    def __init__(self, shared: StateStore = state, ttl: float = DEFAULT_TTL, max_keys: int = DEFAULT_MAX_KEYS,
+                 lease: float = DEFAULT_LEASE, poll_interval: float = 0.05):
+        self.shared = shared
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.keys = 0  # as of this worker's last new key
+        self.counts = dict.fromkeys(("executed", "replayed", "waited", "mismatched", "evicted"), 0)
+        self.running: Dict[Key, asyncio.Future] = {}
+
+    async def begin(self, key: Key, fingerprint: str, owner: str) -> Optional[Dict]:
+        """The live entry for ``key``, or None once ``owner`` holds it."""
+        entry, keys, evicted = await asyncio.to_thread(self.shared.begin_idempotent, key, fingerprint, owner,
+                                                       self.ttl, self.lease, self.max_keys)
+        if entry is None:
+            self.keys = keys
+            self.counts["evicted"] += evicted
+            self.running[key] = asyncio.get_running_loop().create_future()
+        return entry
+
+    async def finish(self, key: Key, owner: str, response: Optional[StoredResponse]):
+        try:
+            if response is None:
+                await asyncio.to_thread(self.shared.finish_idempotent, key, owner)
+            else:
+                await asyncio.to_thread(self.shared.finish_idempotent, key, owner, response.status,
+                                        [(k.decode("latin-1"), v.decode("latin-1")) for k, v in response.headers],
+                                        response.body)
+        finally:
+            done = self.running.pop(key, None)
+            if done is not None and not done.done():
+                done.set_result(response)
+
+    async def wait(self, key: Key) -> Optional[StoredResponse]:
+        """The response of the call running for ``key``; None if it failed or its worker went away."""
+        done = self.running.get(key)
+        if done is not None:
+            return await asyncio.shield(done)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            entry = await asyncio.to_thread(self.shared.idempotent_entry, key)
+            if entry is None or entry["claimed_at"] < time.time() - self.lease:
+                return None
+            if entry["status"] is not None:
+                return _stored(entry)
+
+
+def _covered(scope, paths, prefixes, excluded) -> bool:
+    path = scope["path"]
+    return scope["method"] == "POST" and (path in paths or path.startswith(prefixes)) and path not in excluded
+
+
+def _header(scope, name: bytes) -> Optional[bytes]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+async def _read_body(receive) -> Optional[bytes]:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+async def _send_json(send, status: int, detail: str):
+    body = json.dumps({"detail": detail}).encode()
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _replay(send, response: StoredResponse):
+    await send({"type": "http.response.start", "status": response.status,
+                "headers": response.headers + [(b"idempotent-replayed", b"true")]})
+    await send({"type": "http.response.body", "body": response.body})
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app, store: IdempotencyStore, paths=DEFAULT_PATHS, prefixes=DEFAULT_PREFIXES,
+                 excluded=DEFAULT_EXCLUDED):
+        self.app = app
+        self.store = store
+        self.paths = frozenset(paths)
+        self.prefixes = tuple(prefixes)
+        self.excluded = frozenset(excluded)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _covered(scope, self.paths, self.prefixes, self.excluded):
+            await self.app(scope, receive, send)
+            return
+        idempotency_key = _header(scope, b"idempotency-key")
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+            return
+
+        body = await _read_body(receive)
+        if body is None:
+            return  # client went away before sending the whole body
+        fingerprint = hashlib.sha256(body).hexdigest()
+        # The identity admission control settled on (it runs first), else the peer address.
+        client = current_client.get(None) or client_key(scope)
+        key = (client, scope["method"], scope["path"], idempotency_key.decode("latin-1"))
+        store = self.store
+        owner = uuid.uuid4().hex
+        while True:
+            entry = await store.begin(key, fingerprint, owner)
+            if entry is None:
+                break
+            if entry["fingerprint"] != fingerprint:
+                store.counts["mismatched"] += 1
+                await _send_json(send, 422, "Idempotency-Key was already used with a different request body")
+                return
+            if entry["status"] is None:
+                store.counts["waited"] += 1
+                response = await store.wait(key)
+                if response is None:
+                    continue  # the first call failed; this retry runs the work itself
+            else:
+                store.counts["replayed"] += 1
+                response = _stored(entry)
+            await _replay(send, response)
+            return
+
+        store.counts["executed"] += 1
+        recorded: Dict = {"status": None, "headers": [], "chunks": [], "size": 0}
+        finished = [False]
+
+        replay_body = [body]
+
+        async def receive_once():
+            if replay_body[0] is not None:
+                message = {"type": "http.request", "body": replay_body[0], "more_body": False}
+                replay_body[0] = None
+                return message
+            return await receive()
+
+        async def complete():
+            # The whole response has been produced: store it now. Starlette runs the endpoint's
+            # background tasks before the app call returns, and a retry must not wait for those.
+            finished[0] = True
+            status = recorded["status"]
+            response = None
+            if status is not None and status < 500 and recorded["size"] <= MAX_STORED_BODY:
+                response = StoredResponse(status, recorded["headers"], b"".join(recorded["chunks"]))
+            await store.finish(key, owner, response)
+
+        async def send_recording(message):
+            if message["type"] == "http.response.start":
+                recorded["status"] = message["status"]
+                recorded["headers"] = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                recorded["size"] += len(chunk)
+                if recorded["size"] <= MAX_STORED_BODY:
+                    recorded["chunks"].append(chunk)
+                if not message.get("more_body", False) and not finished[0]:
+                    await complete()
+            await send(message)
+
+        try:
+            await self.app(scope, receive_once, send_recording)
+        finally:
+            if not finished[0]:  # failed before finishing its response
+                await store.finish(key, owner, None)
+
+
+def install(app: FastAPI, store: Optional[IdempotencyStore] = None, paths=DEFAULT_PATHS,
+            prefixes=DEFAULT_PREFIXES, excluded=DEFAULT_EXCLUDED) -> IdempotencyStore:
+    """Honour ``Idempotency-Key`` on POSTs to ``paths`` and under ``prefixes``, except ``excluded``."""
+    store = store or IdempotencyStore()
+    app.state.idempotency = store
+    app.add_middleware(IdempotencyMiddleware, store=store, paths=paths, prefixes=prefixes, excluded=excluded)
+
+    def metric_samples():
+        return [
+            ("aidae_idempotency_requests_total", "counter",
+             "Requests carrying an Idempotency-Key, by outcome (executed, replayed, waited, mismatched).",
+             [({"outcome": outcome}, store.counts[outcome])
+              for outcome in ("executed", "replayed", "waited", "mismatched")]),
+            ("aidae_idempotency_keys", "gauge", "Idempotency keys stored, as of this worker's last new key.",
+             [({}, store.keys)]),
+            ("aidae_idempotency_evictions_total", "counter", "Keys evicted before expiry to stay within the bound.",
+             [({}, store.counts["evicted"])]),
+        ]
+
+    metrics = getattr(app.state, "metrics", None)
+    if metrics is not None:
+        metrics.collectors.append(metric_samples)
+    return store
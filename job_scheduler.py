@@ -0,0 +1,203 @@
+"""
+Weighted-fair scheduler for enhancement jobs of very different cost.
+
+Every job belongs to a job class (text-to-speech, sign language video, ...)
+and gets a cost estimate in worker-seconds from the class's cost model and
+the media's duration and size. Jobs are queued per flow, a flow being one
+(tenant, job class) pair, and served in start-time fair queueing order:
+
+    start  = max(virtual time, flow's last finish tag)
+    finish = start + cost / (tenant weight * class weight)
+
+so a cheap job never queues behind another flow's expensive ones and a
+tenant submitting many jobs only gets its share. Aging subtracts
+``aging_rate`` virtual seconds per second waited from a job's finish tag;
+because every waiting job ages at the same rate this is a fixed offset of
+its enqueue time, so the heap order never needs rebuilding.
+
+A queued job whose request goes away is marked cancelled and left in the
+heap to be skipped when popped; ``len(queue)`` counts live jobs only, so the
+admission backlog probe is not inflated by a burst of disconnects, and the
+heap is compacted once cancelled entries outnumber live ones.
+"""
+import asyncio
+import heapq
+import inspect
+import itertools
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+import admission
+
+DEFAULT_WORKERS = int(os.environ.get("AI_DAE_SCHEDULER_WORKERS", str(os.cpu_count() or 4)))
+DEFAULT_AGING_RATE = float(os.environ.get("AI_DAE_SCHEDULER_AGING", "0.5"))
+
+
+@dataclass(frozen=True)
+class JobClass:
+    name: str
+    weight: float
+    base_seconds: float
+    seconds_per_media_second: float = 0.0
+    seconds_per_megabyte: float = 0.0
+
+    def estimate(self, duration: float = 0.0, size_bytes: int = 0) -> float:
+        """Expected worker-seconds for media of ``duration`` seconds and ``size_bytes`` bytes."""
+        return (self.base_seconds + self.seconds_per_media_second * duration
+                + self.seconds_per_megabyte * size_bytes / 2 ** 20)
+
+
+# Rough worker-seconds per job, to be refitted from real timings once the backends are wired in.
+JOB_CLASSES: Dict[str, JobClass] = {c.name: c for c in (
+    JobClass("text_to_speech", weight=4.0, base_seconds=1.0, seconds_per_megabyte=60.0),
+    JobClass("speech_to_text", weight=2.0, base_seconds=2.0, seconds_per_media_second=0.3),
+    JobClass("video_captioning", weight=2.0, base_seconds=3.0, seconds_per_media_second=0.4),
+    JobClass("descriptive_audio", weight=1.0, base_seconds=5.0, seconds_per_media_second=0.6,
+             seconds_per_megabyte=0.02),
+    JobClass("sign_language", weight=1.0, base_seconds=10.0, seconds_per_media_second=1.5,
+             seconds_per_megabyte=0.02),
+    JobClass("instructional_accessibility", weight=1.0, base_seconds=12.0, seconds_per_media_second=2.0,
+             seconds_per_megabyte=0.02),
+)}
+
+
+@dataclass(order=True)
+class Job:
+    key: float
+    seq: int
+    tenant: str = field(compare=False)
+    job_class: JobClass = field(compare=False)
+    cost: float = field(compare=False)
+    start_tag: float = field(compare=False)
+    finish_tag: float = field(compare=False)
+    enqueued: float = field(compare=False)
+    payload: Any = field(default=None, compare=False)
+    cancelled: bool = field(default=False, compare=False)
+
+
+class FairQueue:
+    """The queueing discipline on its own, with the clock passed in so it can be simulated."""
+
+    def __init__(self, aging_rate: float = DEFAULT_AGING_RATE,
+                 tenant_weights: Optional[Dict[str, float]] = None):
+        self.aging_rate = aging_rate
+        self.tenant_weights = tenant_weights or {}
+        self.virtual_time = 0.0
+        self._last_finish: Dict[Tuple[str, str], float] = {}
+        self._heap: List[Job] = []
+        self._live = 0
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return self._live
+
+    def push(self, tenant: str, job_class: JobClass, cost: float, now: float, payload=None) -> Job:
+        flow = (tenant, job_class.name)
+        start = max(self.virtual_time, self._last_finish.get(flow, 0.0))
+        finish = start + cost / (self.tenant_weights.get(tenant, 1.0) * job_class.weight)
+        self._last_finish[flow] = finish
+        job = Job(finish + self.aging_rate * now, next(self._seq), tenant, job_class, cost, start, finish, now,
+                  payload)
+        heapq.heappush(self._heap, job)
+        self._live += 1
+        return job
+
+    def pop(self) -> Job:
+        job = heapq.heappop(self._heap)
+        while job.cancelled:
+            job = heapq.heappop(self._heap)
+        self._live -= 1
+        if job.start_tag > self.virtual_time:
+            self.virtual_time = job.start_tag
+        if not self._live:
+            self._idle()
+        return job
+
+    def cancel(self, job: Job):
+        """Drop a queued job: it no longer counts and is skipped when it reaches the front."""
+        if job.cancelled:
+            return
+        job.cancelled = True
+        self._live -= 1
+        if not self._live:
+            self._idle()
+        elif len(self._heap) > 2 * self._live:
+            self._heap = [j for j in self._heap if not j.cancelled]
+            heapq.heapify(self._heap)
+
+    def _idle(self):
+        # Idle: forget history so a returning flow is not penalised or favoured for it.
+        self._heap.clear()
+        self._last_finish.clear()
+
+    def queued(self) -> List[Job]:
+        return [job for job in self._heap if not job.cancelled]
+
+
+class JobScheduler:
+    """Runs submitted jobs on ``workers`` slots in ``FairQueue`` order."""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, queue: Optional[FairQueue] = None):
+        self.workers = workers
+        self.queue = queue or FairQueue()
+        self.running = 0
+        self.completed: Dict[str, int] = {}
+        self.wait_seconds: Dict[str, float] = {}
+
+    async def run(self, job_class: str, work: Callable[[], Union[Awaitable, Any]], tenant: Optional[str] = None,
+                  duration: float = 0.0, size_bytes: int = 0):
+        """Wait for a slot in fair order, then run ``work()`` and return its result."""
+        cls = JOB_CLASSES[job_class]
+        tenant = tenant or admission.current_client.get()
+        enqueued = time.monotonic()
+        if self.running < self.workers and not self.queue:
+            self.running += 1
+        else:
+            slot = asyncio.get_running_loop().create_future()
+            job = self.queue.push(tenant, cls, cls.estimate(duration, size_bytes), enqueued, payload=slot)
+            try:
+                await slot
+            except asyncio.CancelledError:
+                if slot.done() and not slot.cancelled():
+                    self._release()
+                else:
+                    self.queue.cancel(job)
+                raise
+        self.wait_seconds[cls.name] = self.wait_seconds.get(cls.name, 0.0) + time.monotonic() - enqueued
+        try:
+            result = work()
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        finally:
+            self.completed[cls.name] = self.completed.get(cls.name, 0) + 1
+            self._release()
+
+    def _release(self):
+        while self.queue:
+            slot = self.queue.pop().payload
+            if not slot.done():
+                slot.set_result(None)  # hand the slot straight to the next job
+                return
+        self.running -= 1
+
+
+scheduler = JobScheduler()
+
+
+def metric_samples():
+    queued: Dict[str, int] = {}
+    for job in scheduler.queue.queued():
+        queued[job.job_class.name] = queued.get(job.job_class.name, 0) + 1
+    return [
+        ("aidae_scheduler_running_jobs", "gauge", "Enhancement jobs holding a worker slot.",
+         [({}, scheduler.running)]),
+        ("aidae_scheduler_queued_jobs", "gauge", "Enhancement jobs waiting for a worker slot, by class.",
+         [({"class": name}, queued.get(name, 0)) for name in JOB_CLASSES]),
+        ("aidae_scheduler_completed_jobs_total", "counter", "Enhancement jobs finished, by class.",
+         [({"class": name}, n) for name, n in sorted(scheduler.completed.items())]),
+        ("aidae_scheduler_wait_seconds_total", "counter", "Time jobs spent waiting for a slot, by class.",
+         [({"class": name}, round(s, 6)) for name, s in sorted(scheduler.wait_seconds.items())]),
+    ]
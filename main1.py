@@ -1,93 +1,12 @@
+"""
+Earlier revision of the AI-DAE API, now an alias for the unified app
+(``uvicorn main1:app`` keeps working). Routes live in the ``ai_dae`` package.
+"""
+from ai_dae import create_app
 
-from typing import Optional
-from fastapi import FastAPI, HTTPException, Path
-from pydantic import BaseModel
-from enum import Enum
-import uvicorn
-
-app = FastAPI(title="AI-DAE API Mock", description="Mock API for AI-Driven Accessibility Enabler (AI-DAE)", version="1.0")
-
-class ContentType(str, Enum):
-    document = "document"
-    image = "image"
-    video = "video"
-
-class LanguageType(str, Enum):
-    en = "English"
-    es = "Spanish"
-    fr = "French"
-
-class Content(BaseModel):
-    content_type: ContentType
-    source_url: Optional[str] = None
-    content_id: int
-
-class AnalysisResult(BaseModel):
-    content_id: int
-    accessibility_issues: str
-    suggested_actions: str
-
-class AudioEnhancement(BaseModel):
-    content_id: int
-    audio_url: str
-
-class VideoCaptioning(BaseModel):
-    video_file_url: str
-    captioned_video_url: str
-
-class DescriptiveAudio(BaseModel):
-    video_file_url: str
-    descriptive_audio_url: str
-
-class SignLanguageVideo(BaseModel):
-    video_file_url: str
-    sign_language_video_url: str
-
-class AccessibleDocument(BaseModel):
-    document_ids: list[int]
-    accessible_document_urls: list[str]
-
-class RealTimeTextResponse(BaseModel):
-    client_id: int
-    response_text: str
-
-class ComplianceReport(BaseModel):
-    content_id: int
-    compliance_report: str
-
-class UserFeedback(BaseModel):
-    content_id: int
-    user_feedback: str
-    satisfaction_rating: int
-
-# Mock data
-contents = [
-    Content(content_type=ContentType.document, source_url="http://example.com/doc1", content_id=1),
-    Content(content_type=ContentType.image, source_url="http://example.com/image1", content_id=2),
-    Content(content_type=ContentType.video, source_url="http://example.com/video1", content_id=3),
-]
-
-@app.post("/content/ingest")
-async def ingest_content(content: Content):
-    content.content_id = len(contents) + 1
-    contents.append(content)
-    return {"message": "Content ingestion started", "content_id": content.content_id}
-
-@app.get("/content/status/{contentId}")
-async def get_content_status(contentId: int):
-    for content in contents:
-        if content.content_id == contentId:
-            return {"status": "processing", "contentId": contentId}
-    raise HTTPException(status_code=404, detail="Content not found")
-
-@app.post("/content/analysis")
-async def analyze_content(content_id: int):
-    for content in contents:
-        if content.content_id == content_id:
-            return AnalysisResult(content_id=content_id, accessibility_issues="None", suggested_actions="None")
-    raise HTTPException(status_code=404, detail="Content not found")
-
-# Define more endpoints as needed based on the initial requirements
+app = create_app()
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(app, host="127.0.0.1", port=8000)
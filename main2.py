@@ -1,95 +1,12 @@
-from fastapi import FastAPI, HTTPException, Query, Path
-from pydantic import BaseModel, Field
-from typing import List, Optional
-from enum import Enum
+"""
+Earlier revision of the AI-DAE API, now an alias for the unified app
+(``uvicorn main2:app`` keeps working). Routes live in the ``ai_dae`` package.
+"""
+from ai_dae import create_app
 
-app = FastAPI(title="AI-DAE API Mock", description="Mock API for AI-Driven Accessibility Enabler (AI-DAE)", version="1.0")
+app = create_app()
 
-# Existing code for Enums, BaseModel classes, and some endpoints...
+if __name__ == "__main__":
+    import uvicorn
 
-# New Enums for additional endpoints
-class SignLanguage(str, Enum):
-    ASL = "American Sign Language"
-    BSL = "British Sign Language"
-
-class AccessibleFormat(str, Enum):
-    braille = "braille"
-    tagged_pdf = "tagged PDF"
-
-# New BaseModel classes for additional endpoints
-class TextToSpeechRequest(BaseModel):
-    content_id: int
-    language: Optional[LanguageType] = None
-    voice_type: Optional[str] = None
-
-class VideoCaptioningRequest(BaseModel):
-    video_file_url: str
-    language: LanguageType
-
-class DescriptiveAudioRequest(BaseModel):
-    video_file_url: str
-    description_detail_level: Optional[str] = None
-
-class SignLanguageRequest(BaseModel):
-    video_file_url: str
-    sign_language: SignLanguage
-
-class ConvertToAccessibleRequest(BaseModel):
-    document_ids: List[int]
-    desired_format: AccessibleFormat
-
-class RealTimeTextRequest(BaseModel):
-    client_id: int
-    inquiry_message: str
-
-class ComplianceCheckRequest(BaseModel):
-    content_id: int
-    standards: List[str]
-
-class FeedbackRequest(BaseModel):
-    content_id: int
-    user_feedback: str
-    satisfaction_rating: int
-
-# New endpoints
-@app.post("/enhancements/text-to-speech")
-async def text_to_speech(request: TextToSpeechRequest):
-    # Placeholder implementation
-    return {"audio_url": f"http://example.com/audio/{request.content_id}"}
-
-@app.post("/enhancements/video-captioning")
-async def video_captioning(request: VideoCaptioningRequest):
-    # Placeholder implementation
-    return {"captioned_video_url": f"http://example.com/captioned/{request.video_file_url}"}
-
-@app.post("/enhancements/video/descriptive-audio")
-async def descriptive_audio(request: DescriptiveAudioRequest):
-    # Placeholder implementation
-    return {"descriptive_audio_url": f"http://example.com/descriptive/{request.video_file_url}"}
-
-@app.post("/enhancements/sign-language")
-async def sign_language_video(request: SignLanguageRequest):
-    # Placeholder implementation
-    return {"sign_language_video_url": f"http://example.com/signlanguage/{request.video_file_url}"}
-
-@app.post("/documents/convert-to-accessible")
-async def convert_to_accessible(request: ConvertToAccessibleRequest):
-    # Placeholder implementation
-    return {"accessible_document_urls": [f"http://example.com/accessible/{doc_id}" for doc_id in request.document_ids]}
-
-@app.post("/communication/real-time-text")
-async def real_time_text(request: RealTimeTextRequest):
-    # Placeholder implementation
-    return {"response_text": "Real-time text response to the inquiry"}
-
-@app.post("/compliance/check")
-async def compliance_check(request: ComplianceCheckRequest):
-    # Placeholder implementation
-    return {"compliance_report": "Compliance report details"}
-
-@app.post("/feedback")
-async def submit_feedback(request: FeedbackRequest):
-    # Placeholder implementation
-    return {"message": "Feedback received"}
-
-# Add any additional utility functions or endpoints as needed...
+    uvicorn.run(app, host="127.0.0.1", port=8000)
@@ -1,251 +1,12 @@
-from fastapi import FastAPI, HTTPException, Query, Path, Body
-from pydantic import BaseModel, Field
-from typing import List, Optional
-from enum import Enum
-import uvicorn
+"""
+Earlier revision of the AI-DAE API, now an alias for the unified app
+(``uvicorn main3:app`` keeps working). Routes live in the ``ai_dae`` package.
+"""
+from ai_dae import create_app
 
-app = FastAPI(title="AI-DAE API Mock", description="Mock API for AI-Driven Accessibility Enabler (AI-DAE)", version="1.0")
-
-# Enums
-class ContentType(str, Enum):
-    document = "document"
-    image = "image"
-    video = "video"
-
-class LanguageType(str, Enum):
-    en = "English"
-    es = "Spanish"
-    fr = "French"
-
-class SignLanguage(str, Enum):
-    ASL = "American Sign Language"
-    BSL = "British Sign Language"
-
-class AccessibleFormat(str, Enum):
-    braille = "braille"
-    tagged_pdf = "tagged PDF"
-
-# Base Models for Content and Analysis
-class Content(BaseModel):
-    content_type: ContentType
-    source_url: Optional[str] = None
-    content_id: int
-
-class AnalysisResult(BaseModel):
-    content_id: int
-    accessibility_issues: str
-    suggested_actions: str
-
-class AudioEnhancement(BaseModel):
-    content_id: int
-    audio_url: str
-
-class VideoCaptioning(BaseModel):
-    video_file_url: str
-    captioned_video_url: str
-
-class DescriptiveAudio(BaseModel):
-    video_file_url: str
-    descriptive_audio_url: str
-
-class SignLanguageVideo(BaseModel):
-    video_file_url: str
-    sign_language_video_url: str
-
-class AccessibleDocument(BaseModel):
-    document_ids: list[int]
-    accessible_document_urls: list[str]
-
-class RealTimeTextResponse(BaseModel):
-    client_id: int
-    response_text: str
-
-class ComplianceReport(BaseModel):
-    content_id: int
-    compliance_report: str
-
-class UserFeedback(BaseModel):
-    content_id: int
-    user_feedback: str
-    satisfaction_rating: int
-
-# Request Models for Enhancements and Feedback
-class TextToSpeechRequest(BaseModel):
-    content_id: int
-    language: Optional[LanguageType] = None
-    voice_type: Optional[str] = None
-
-class VideoCaptioningRequest(BaseModel):
-    video_file_url: str
-    language: LanguageType
-
-class DescriptiveAudioRequest(BaseModel):
-    video_file_url: str
-    description_detail_level: Optional[str] = None
-
-class SignLanguageRequest(BaseModel):
-    video_file_url: str
-    sign_language: SignLanguage
-
-class ConvertToAccessibleRequest(BaseModel):
-    document_ids: List[int]
-    desired_format: AccessibleFormat
-
-class RealTimeTextRequest(BaseModel):
-    client_id: int
-    inquiry_message: str
-
-class ComplianceCheckRequest(BaseModel):
-    content_id: int
-    standards: List[str]
-
-class FeedbackRequest(BaseModel):
-    content_id: int
-    user_feedback: str
-    satisfaction_rating: int
-
-# Additional Payload Models for Archive and Accessibility
-class SpeechToTextPayload(BaseModel):
-    audio_file_url: str
-    language: str
-
-class ScreenReaderOptimizationPayload(BaseModel):
-    content_id: str
-    enhancements: dict
-
-class ArchiveIngestPayload(BaseModel):
-    archive_id: str
-    content_type: str
-    source: str
-
-class ArchiveVerifyPayload(BaseModel):
-    batch_process_id: str
-    standards: list[str]
-
-class InstructionalAccessibilityPayload(BaseModel):
-    video_file_url: str
-    sign_language: str
-    descriptive_audio_details: dict
-
-class RealTimeVoicePayload(BaseModel):
-    client_id: str
-    preferred_language: str
-
-# Mock data
-contents = [
-    Content(content_type=ContentType.document, source_url="http://example.com/doc1", content_id=1),
-    Content(content_type=ContentType.image, source_url="http://example.com/image1", content_id=2),
-    Content(content_type=ContentType.video, source_url="http://example.com/video1", content_id=3),
-]
-
-
-@app.post("/content/ingest")
-async def ingest_content(content: Content):
-    content.content_id = len(contents) + 1
-    contents.append(content)
-    return {"message": "Content ingestion started", "content_id": content.content_id}
-
-@app.get("/content/status/{contentId}")
-async def get_content_status(contentId: int):
-    for content in contents:
-        if content.content_id == contentId:
-            return {"status": "processing", "contentId": contentId}
-    raise HTTPException(status_code=404, detail="Content not found")
-
-@app.post("/content/analysis")
-async def analyze_content(content_id: int):
-    for content in contents:
-        if content.content_id == content_id:
-            return AnalysisResult(content_id=content_id, accessibility_issues="None", suggested_actions="None")
-    raise HTTPException(status_code=404, detail="Content not found")
-
-# New endpoints
-@app.post("/enhancements/text-to-speech")
-async def text_to_speech(request: TextToSpeechRequest):
-    # Placeholder implementation
-    return {"audio_url": f"http://example.com/audio/{request.content_id}"}
-
-@app.post("/enhancements/video-captioning")
-async def video_captioning(request: VideoCaptioningRequest):
-    # Placeholder implementation
-    return {"captioned_video_url": f"http://example.com/captioned/{request.video_file_url}"}
-
-@app.post("/enhancements/video/descriptive-audio")
-async def descriptive_audio(request: DescriptiveAudioRequest):
-    # Placeholder implementation
-    return {"descriptive_audio_url": f"http://example.com/descriptive/{request.video_file_url}"}
-
-@app.post("/enhancements/sign-language")
-async def sign_language_video(request: SignLanguageRequest):
-    # Placeholder implementation
-    return {"sign_language_video_url": f"http://example.com/signlanguage/{request.video_file_url}"}
-
-@app.post("/documents/convert-to-accessible")
-async def convert_to_accessible(request: ConvertToAccessibleRequest):
-    # Placeholder implementation
-    return {"accessible_document_urls": [f"http://example.com/accessible/{doc_id}" for doc_id in request.document_ids]}
-
-@app.post("/communication/real-time-text")
-async def real_time_text(request: RealTimeTextRequest):
-    # Placeholder implementation
-    return {"response_text": "Real-time text response to the inquiry"}
-
-@app.post("/compliance/check")
-async def compliance_check(request: ComplianceCheckRequest):
-    # Placeholder implementation
-    return {"compliance_report": "Compliance report details"}
-
-@app.post("/feedback")
-async def submit_feedback(request: FeedbackRequest):
-    # Placeholder implementation
-    return {"message": "Feedback received"}
-
-@app.post("/enhancements/audio-description")
-async def audio_description(request: DescriptiveAudioRequest):
-    # This endpoint can be assumed to be a duplicate or similar to `/enhancements/video/descriptive-audio`
-    return {"descriptive_audio_url": f"http://example.com/descriptive/{request.video_file_url}"}
-
-@app.post("/documents/convert-to-accessible-format")
-async def convert_to_accessible_format(request: ConvertToAccessibleRequest):
-    # This endpoint can be considered similar to `/documents/convert-to-accessible`
-    return {"accessible_document_urls": [f"http://example.com/accessible/{doc_id}" for doc_id in request.document_ids]}
-
-@app.post("/communication/accessibility-feedback")
-async def accessibility_feedback(request: FeedbackRequest):
-    # This endpoint can be considered similar to `/feedback`
-    return {"message": "Your accessibility feedback has been recorded"}
-
-@app.post("/content/ingest")
-async def archive_content_ingest(payload: ArchiveIngestPayload):
-    # Implement archive content ingest logic here
-    return {"batch_process_id": "unique_batch_process_id"}
-
-@app.get("/content/status/{batchProcessId}")
-async def archive_content_status(batchProcessId: str):
-    # Implement status check logic here
-    return {"status": "processing", "percentage_completed": 50, "manual_review_needed": ["content_id_1", "content_id_2"]}
-
-@app.post("/compliance/archive/verify")
-async def archive_compliance_verify(payload: ArchiveVerifyPayload):
-    # Implement compliance verification logic here
-    return {"compliance_report": "detailed_compliance_report_here"}
-
-@app.post("/speech-to-text")
-async def speech_to_text(payload: SpeechToTextPayload):
-    # Implement speech-to-text logic here
-    return {"transcript": "Transcribed text goes here"}
-
-@app.post("/screen-reader-optimization")
-async def screen_reader_optimization(payload: ScreenReaderOptimizationPayload):
-    # Implement optimization logic here
-    return {"message": "Screen reader optimization applied successfully"}
-
-@app.post("/video/instructional-accessibility")
-async def video_instructional_accessibility(payload: InstructionalAccessibilityPayload):
-    # Implement video accessibility logic here
-    return {"sign_language_video_url": "url_to_sign_language_video", "descriptive_audio_url": "url_to_descriptive_audio"}
-
-# Define more endpoints as needed based on the initial requirements
+app = create_app()
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(app, host="127.0.0.1", port=8000)
@@ -1,449 +1,20 @@
-from fastapi import FastAPI, HTTPException, Query, Path, Body
-from pydantic import BaseModel, Field ,  HttpUrl
-from typing import List, Optional
-from enum import Enum
-import uvicorn
+"""
+Entry point for the AI-DAE API (``uvicorn main5:app`` or ``python main5.py``).
 
-app = FastAPI(title="AI-DAE API Mock", description="Mock API for AI-Driven Accessibility Enabler (AI-DAE)", version="1.0")
+Routes and models live in the ``ai_dae`` package, one router per subsystem.
+"""
+import os
 
-# Enums
-class ContentType(str, Enum):
-    document = "document"
-    image = "image"
-    video = "video"
+from ai_dae import create_app
 
-class LanguageType(str, Enum):
-    en = "English"
-    es = "Spanish"
-    fr = "French"
-
-class SignLanguage(str, Enum):
-    ASL = "American Sign Language"
-    BSL = "British Sign Language"
-
-class AccessibleFormat(str, Enum):
-    braille = "braille"
-    tagged_pdf = "tagged PDF"
-
-# Base Models for Content and Analysis
-class Content(BaseModel):
-    content_type: ContentType
-    source_url: Optional[str] = None
-    content_id: int
-
-class AnalysisResult(BaseModel):
-    content_id: int
-    accessibility_issues: str
-    suggested_actions: str
-
-class AudioEnhancement(BaseModel):
-    content_id: int
-    audio_url: str
-
-class VideoCaptioning(BaseModel):
-    video_file_url: str
-    captioned_video_url: str
-
-class DescriptiveAudio(BaseModel):
-    video_file_url: str
-    descriptive_audio_url: str
-
-class SignLanguageVideo(BaseModel):
-    video_file_url: str
-    sign_language_video_url: str
-
-class AccessibleDocument(BaseModel):
-    document_ids: list[int]
-    accessible_document_urls: list[str]
-
-class RealTimeTextResponse(BaseModel):
-    client_id: int
-    response_text: str
-
-class ComplianceReport(BaseModel):
-    content_id: int
-    compliance_report: str
-
-class UserFeedback(BaseModel):
-    content_id: int
-    user_feedback: str
-    satisfaction_rating: int
-
-# Request Models for Enhancements and Feedback
-class TextToSpeechRequest(BaseModel):
-    content_id: int
-    language: Optional[LanguageType] = None
-    voice_type: Optional[str] = None
-
-class VideoCaptioningRequest(BaseModel):
-    video_file_url: str
-    language: LanguageType
-
-class DescriptiveAudioRequest(BaseModel):
-    video_file_url: str
-    description_detail_level: Optional[str] = None
-
-class SignLanguageRequest(BaseModel):
-    video_file_url: str
-    sign_language: SignLanguage
-
-class ConvertToAccessibleRequest(BaseModel):
-    document_ids: List[int]
-    desired_format: AccessibleFormat
-
-class RealTimeTextRequest(BaseModel):
-    client_id: int
-    inquiry_message: str
-
-class ComplianceCheckRequest(BaseModel):
-    content_id: int
-    standards: List[str]
-
-class FeedbackRequest(BaseModel):
-    content_id: int
-    user_feedback: str
-    satisfaction_rating: int
-
-# Additional Payload Models for Archive and Accessibility
-class SpeechToTextPayload(BaseModel):
-    audio_file_url: str
-    language: str
-
-class ScreenReaderOptimizationPayload(BaseModel):
-    content_id: str
-    enhancements: dict
-
-class ArchiveIngestPayload(BaseModel):
-    archive_id: str
-    content_type: str
-    source: str
-
-class ArchiveVerifyPayload(BaseModel):
-    batch_process_id: str
-    standards: list[str]
-
-class InstructionalAccessibilityPayload(BaseModel):
-    video_file_url: str
-    sign_language: str
-    descriptive_audio_details: dict
-
-class RealTimeVoicePayload(BaseModel):
-    client_id: str
-    preferred_language: str
-
-class InstructionalAccessibilityRequest(BaseModel):
-    video_file_url: HttpUrl
-    sign_language: str  # Example: "ASL", "BSL"
-    descriptive_audio_details: dict  # Example: {"level_of_detail": "high", "areas_of_focus": ["main_concepts", "visuals"]}
-
-class InstructionalAccessibilityResponse(BaseModel):
-    sign_language_video_url: HttpUrl
-    descriptive_audio_url: HttpUrl
-
-class TextToSpeechRequest(BaseModel):
-    content_id: str = Field(..., description="The unique identifier of the content to be converted to speech.")
-    language: str = Field(default="en", description="The language of the text to be converted.")
-    voice_type: str = Field(default="default", description="The type of voice to use for the speech synthesis.")
-
-class TextToSpeechResponse(BaseModel):
-    audio_url: str = Field(..., description="URL to the generated audio file.")
-    
-class ContentIngestRequest(BaseModel):
-    content_type: str = Field(..., description="Type of the content (document, image, video).")
-    source_url: HttpUrl = Field(None, description="URL of the content to be ingested.")
-    # Assuming direct file upload will be handled separately via FastAPI's File upload mechanism
-
-class ContentIngestResponse(BaseModel):
-    message: str = Field(..., description="Acknowledgment message of the ingestion process start.")
-    content_id: int = Field(..., description="Unique identifier for the ingested content.")
-
-class ContentStatusResponse(BaseModel):
-    status: str = Field(..., description="Current processing status of the content (processing, completed, error).")
-    contentId: int = Field(..., description="Unique identifier for the content.")
-
-class ContentAnalysisRequest(BaseModel):
-    content_id: int = Field(..., description="Unique identifier for the content to be analyzed.")
-    # Optional parameters for depth of analysis can be added here as needed
-
-class AnalysisResult(BaseModel):
-    content_id: int = Field(..., description="Unique identifier for the analyzed content.")
-    accessibility_issues: str = Field(..., description="Detected accessibility issues.")
-    suggested_actions: str = Field(..., description="Recommended actions for improving accessibility.")
-    
-class SignLanguageRequest(BaseModel):
-    video_file_url: HttpUrl = Field(..., description="URL of the video file for which sign language interpretation is requested.")
-    targeted_sign_language: str = Field(..., description="The sign language (e.g., ASL) for the interpretation.")
-
-class SignLanguageResponse(BaseModel):
-    sign_language_video_url: HttpUrl = Field(..., description="URL to the video featuring sign language interpretation.")
-
-class DescriptiveAudioRequest(BaseModel):
-    video_file_url: HttpUrl = Field(..., description="URL of the audio or video file for which descriptive audio is requested.")
-    specificity: str = Field(..., description="The level of detail for the audio description required (e.g., detailed, summary).")
-
-class DescriptiveAudioResponse(BaseModel):
-    descriptive_audio_url: HttpUrl = Field(..., description="URL to access the enhanced audio/video with descriptions.")
-
-# Assuming ConvertToAccessibleRequest is similar for both document conversion endpoints
-class ConvertToAccessibleRequest(BaseModel):
-    document_ids: list[str] = Field(..., description="List of document identifiers to be converted.")
-    desired_format: str = Field(None, description="The desired accessible format (e.g., braille, tagged PDF).")
-
-class ConvertToAccessibleResponse(BaseModel):
-    accessible_document_urls: list[HttpUrl] = Field(..., description="Links to download the documents in accessible formats.")
-
-class RealTimeTextRequest(BaseModel):
-    client_id: str = Field(..., description="Identifier for the client initiating the communication.")
-    inquiry: str = Field(..., description="The inquiry or message content for real-time text communication.")
-
-class RealTimeTextResponse(BaseModel):
-    response_text: str = Field(..., description="Real-time text responses or updates.")
-    
-class FeedbackRequest(BaseModel):
-    content_id: str = Field(..., description="Unique identifier for the content related to the feedback.")
-    user_feedback: str = Field(..., description="User feedback detailing their experience and suggestions.")
-    satisfaction_rating: int = Field(..., description="User satisfaction rating on a scale of 1 to 5.")
-
-class FeedbackResponse(BaseModel):
-    message: str = Field(..., description="Acknowledgment message confirming the receipt of feedback.")
-
-class ComplianceCheckRequest(BaseModel):
-    content_id: str = Field(None, description="Unique identifier for the content or service to be reviewed.")
-    service_id: str = Field(None, description="Unique identifier for the service to be reviewed.")
-    standards: list[str] = Field(..., description="List of standards to check against (e.g., WCAG 2.1 Level AA, ADA).")
-
-class ComplianceReportResponse(BaseModel):
-    compliance_report: str = Field(..., description="Comprehensive report outlining compliance adherence and improvement recommendations.")
-
-class ArchiveVerifyPayload(BaseModel):
-    batch_process_id: str = Field(..., description="Identifier for the batch process of the digital archive.")
-    standards: list[str] = Field(..., description="Standards to verify the digital archive against.")
-
-class ArchiveIngestPayload(BaseModel):
-    archive_id: str = Field(..., description="Identifier for the archive.")
-    content_type: str = Field(..., description="Type of content being ingested (e.g., document, image, video).")
-    source: str = Field(..., description="Source of the archive content.")
-
-class ArchiveIngestResponse(BaseModel):
-    batch_process_id: str = Field(..., description="Unique identifier for the batch process.")
-
-class ArchiveContentStatusResponse(BaseModel):
-    status: str = Field(..., description="Current status of the batch process (e.g., processing, completed).")
-    percentage_completed: int = Field(..., description="Percentage of the batch process completed.")
-    manual_review_needed: list[str] = Field(..., description="List of content IDs requiring manual review.")
-
-class SpeechToTextPayload(BaseModel):
-    audio_file_url: HttpUrl = Field(..., description="URL of the audio file to be transcribed.")
-    language: str = Field(..., description="Language of the audio content.")
-
-class SpeechToTextResponse(BaseModel):
-    transcript: str = Field(..., description="Transcribed text from the audio content.")
-
-class ScreenReaderOptimizationPayload(BaseModel):
-    content_id: str = Field(..., description="Unique identifier for the content.")
-    specific_enhancements: dict = Field(..., description="Details of the specific enhancements requested for screen reader optimization.")
-
-class ScreenReaderOptimizationResponse(BaseModel):
-    message: str = Field(..., description="Confirmation of the optimization process.")
-    
-# Mock data
-contents = [
-    Content(content_type=ContentType.document, source_url="http://example.com/doc1", content_id=1),
-    Content(content_type=ContentType.image, source_url="http://example.com/image1", content_id=2),
-    Content(content_type=ContentType.video, source_url="http://example.com/video1", content_id=3),
-]
-
-@app.post("/content/ingest", response_model=ContentIngestResponse)
-async def ingest_content(content: ContentIngestRequest = Body(...)):
-    """
-    Initiates the ingestion of digital content for subsequent analysis and enhancement, preparing it for accessibility improvements.
-    """
-    new_content_id = len(contents) + 1
-    contents.append(content.dict())  # Append content as dict for simplicity
-    return {"message": "Content ingestion started", "content_id": new_content_id}
-
-@app.get("/content/status/{contentId}", response_model=ContentStatusResponse)
-async def get_content_status(contentId: int):
-    """
-    Retrieves the current processing status of the ingested content, providing insights into its analysis or enhancement progress.
-    """
-    for content in contents:
-        if content['content_id'] == contentId:
-            return {"status": "processing", "contentId": contentId}
-    raise HTTPException(status_code=404, detail="Content not found")
-
-@app.post("/content/analysis", response_model=AnalysisResult)
-async def analyze_content(content_id: int = Body(..., embed=True)):
-    """
-    Analyzes the content to identify accessibility barriers and recommends enhancements to make the content compliant with accessibility standards.
-    """
-    for content in contents:
-        if content['content_id'] == content_id:
-            # Placeholder for actual analysis logic
-            return {"content_id": content_id, "accessibility_issues": "None", "suggested_actions": "None"}
-    raise HTTPException(status_code=404, detail="Content not found")
-# Enhancements Endpoints
-@app.post("/enhancements/text-to-speech",
-             response_model=TextToSpeechResponse,
-             summary="Text to Speech Conversion",
-             description="Converts text within documents or web content to spoken audio, facilitating auditory access for users with visual impairments.")
-async def text_to_speech(request: TextToSpeechRequest = Body(...)):
-    """
-    Converts text within documents or web content to spoken audio, facilitating auditory access for users with visual impairments.
-    
-    - **content_id**: The unique identifier of the content to be converted to speech.
-    - **language**: The language of the text to be converted (default is "en").
-    - **voice_type**: The type of voice to use for the speech synthesis (default is "default").
-    """
-    # Implementation logic here. Example response:
-    return {"audio_url": f"http://example.com/audio/{request.content_id}"}
-
-@app.post("/enhancements/video-captioning")
-async def video_captioning(request: VideoCaptioningRequest):
-    return {"captioned_video_url": f"http://example.com/captioned/{request.video_file_url}"}
-
-@app.post("/enhancements/video/descriptive-audio")
-async def descriptive_audio(request: DescriptiveAudioRequest):
-    return {"descriptive_audio_url": f"http://example.com/descriptive/{request.video_file_url}"}
-
-
-@app.post("/enhancements/video/instructional-accessibility",
-             response_model=InstructionalAccessibilityResponse,
-             summary="Enhance Instructional Videos",
-             description="Enhances instructional videos with AI-generated sign language interpretation and descriptive audio tracks to ensure comprehensive accessibility.")
-async def enhance_instructional_videos(request: InstructionalAccessibilityRequest = Body(...)):
-    """
-    Enhances instructional videos with AI-generated sign language interpretation and descriptive audio tracks to ensure comprehensive accessibility.
-
-    - **video_file_url**: URL to the video file.
-    - **sign_language**: Options for sign language, e.g., ASL, BSL.
-    - **descriptive_audio_details**: Details for the descriptive audio track, including level of detail and specific areas of focus.
-    """
-    # Implementation logic here
-    return {
-        "sign_language_video_url": "https://example.com/sign_language_video.mp4",
-        "descriptive_audio_url": "https://example.com/descriptive_audio.mp3"
-    }
-
-
-@app.post("/enhancements/sign-language", response_model=SignLanguageResponse,
-             summary="Sign Language Interpretation",
-             description="Provides sign language interpretation for video content through AI-generated avatars, catering to users who rely on sign language.")
-async def sign_language_video(request: SignLanguageRequest = Body(...)):
-    """
-    Provides sign language interpretation for video content through AI-generated avatars, catering to users who rely on sign language.
-    """
-    # Placeholder for implementation logic
-    return {"sign_language_video_url": f"http://example.com/signlanguage/{request.video_file_url}"}
-
-@app.post("/enhancements/audio-description", response_model=DescriptiveAudioResponse,
-             summary="Audio Description for Archived Content",
-             description="Generates audio descriptions for archived audio and video content, aiding users with hearing impairments.")
-async def audio_description(request: DescriptiveAudioRequest = Body(...)):
-    """
-    Generates audio descriptions for archived audio and video content, aiding users with hearing impairments.
-    """
-    # Placeholder for implementation logic
-    return {"descriptive_audio_url": f"http://example.com/descriptive/{request.video_file_url}"}
-
-
-
-# Document Conversion Endpoints
-@app.post("/documents/convert-to-accessible", response_model=ConvertToAccessibleResponse,
-             summary="Convert Documents to Accessible Formats",
-             description="Converts compliance certificates, instructional content, and other documents into formats accessible for various disabilities.")
-async def convert_to_accessible(request: ConvertToAccessibleRequest = Body(...)):
-    """
-    Converts compliance certificates, instructional content, and other documents into formats accessible for various disabilities.
-    """
-    # Placeholder for implementation logic
-    return {"accessible_document_urls": [f"http://example.com/accessible/{doc_id}" for doc_id in request.document_ids]}
-
-@app.post("/documents/convert-to-accessible-format", response_model=ConvertToAccessibleResponse,
-             summary="Convert Documents to Specific Accessible Formats",
-             description="Converts documents into specific formats accessible for various disabilities, based on the requested format.")
-async def convert_to_accessible_format(request: ConvertToAccessibleRequest = Body(...)):
-    """
-    Converts documents into specific formats accessible for various disabilities, based on the requested format.
-    """
-    # Implementation logic is assumed to be similar to convert_to_accessible
-    return {"accessible_document_urls": [f"http://example.com/accessible/{doc_id}" for doc_id in request.document_ids]}
-
-@app.post("/communication/real-time-text", response_model=RealTimeTextResponse,
-             summary="Real-Time Text Communication",
-             description="Facilitates real-time text-based communication, ensuring clients with hearing impairments can interact and receive updates effectively.")
-async def real_time_text(request: RealTimeTextRequest = Body(...)):
-    """
-    Facilitates real-time text-based communication, ensuring clients with hearing impairments can interact and receive updates effectively.
-    """
-    # Placeholder for real implementation
-    return {"response_text": "Real-time text response to the inquiry"}
-
-
-
-@app.post("/communication/accessibility-feedback", response_model=FeedbackResponse,
-             summary="Submit Accessibility Feedback",
-             description="Collects user feedback on the accessibility features, serving as a crucial part of the continuous improvement loop.")
-async def accessibility_feedback(request: FeedbackRequest = Body(...)):
-    """
-    Collects user feedback on the accessibility features.
-    """
-    return {"message": "Your accessibility feedback has been recorded"}
-
-@app.post("/feedback", response_model=FeedbackResponse,
-             summary="Submit General Feedback",
-             description="Allows users to submit feedback on any aspect of the service.")
-async def submit_feedback(request: FeedbackRequest = Body(...)):
-    """
-    Allows users to submit general feedback.
-    """
-    return {"message": "Feedback received"}
-
-@app.post("/compliance/check", response_model=ComplianceReportResponse,
-             summary="Accessibility Compliance Check",
-             description="Submits content or service details for an accessibility compliance review against standards like WCAG and ADA.")
-async def compliance_check(request: ComplianceCheckRequest = Body(...)):
-    """
-    Submits content or service for accessibility compliance review.
-    """
-    return {"compliance_report": "Compliance report details"}
-
-@app.post("/compliance/archive/verify", response_model=ComplianceReportResponse,
-             summary="Verify Archive Compliance",
-             description="Verifies the accessibility compliance of the digital archive against ADA and other international regulations.")
-async def archive_compliance_verify(payload: ArchiveVerifyPayload = Body(...)):
-    """
-    Verifies the accessibility compliance of the digital archive.
-    """
-    return {"compliance_report": "Detailed compliance report here"}
-
-# Archive Ingestion and Status Endpoints
-@app.post("/archives/content/ingest", response_model=ArchiveIngestResponse,
-             summary="Archive Content Ingestion",
-             description="Specifically designed for bulk ingestion of archival content, facilitating large-scale processing.")
-async def archive_content_ingest(payload: ArchiveIngestPayload = Body(...)):
-    return {"batch_process_id": "unique_batch_process_id"}
-
-@app.get("/archives/content/status/{batchProcessId}", response_model=ArchiveContentStatusResponse,
-            summary="Check Archive Processing Status",
-            description="Checks the status of bulk processing for archival content, useful for large datasets.")
-async def archive_content_status(batchProcessId: str):
-    return {"status": "processing", "percentage_completed": 50, "manual_review_needed": ["content_id_1", "content_id_2"]}
-
-@app.post("/enhancements/speech-to-text", response_model=SpeechToTextResponse,
-             summary="Speech to Text Conversion",
-             description="Transcribes audio content to text, supporting content accessibility for hearing-impaired users.")
-async def speech_to_text(payload: SpeechToTextPayload = Body(...)):
-    return {"transcript": "Transcribed text goes here"}
-
-@app.post("/enhancements/screen-reader-optimization", response_model=ScreenReaderOptimizationResponse,
-             summary="Screen Reader Content Optimization",
-             description="Applies screen-reader-friendly tags and alternative text to content, enhancing accessibility for visually impaired users.")
-async def screen_reader_optimization(payload: ScreenReaderOptimizationPayload = Body(...)):
-    return {"message": "Screen reader optimization applied successfully"}
-
-
-# Define more endpoints as needed based on the initial requirements
+app = create_app()
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="127.0.0.1", port=8000)
+    import uvicorn
+
+    workers = int(os.environ.get("AI_DAE_WORKERS", "1"))
+    if workers > 1:
+        # Workers re-import this module by name; state is shared through shared_state's database.
+        uvicorn.run("main5:app", host="127.0.0.1", port=8000, workers=workers)
+    else:
+        uvicorn.run(app, host="127.0.0.1", port=8000)
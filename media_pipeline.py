@@ -0,0 +1,320 @@
+"""
+Decode-once media pipeline shared by the video enhancement endpoints.
+
+A single producer fetches and decodes the source video and publishes
+``MediaChunk`` objects (frames + audio) into a bounded ``BroadcastBuffer``.
+Every enhancement track (sign language, descriptive audio, ...) reads the
+same chunks concurrently, so a video needed by several tracks is only ever
+fetched and decoded once.
+"""
+import asyncio
+import collections
+import hashlib
+import io
+import weakref
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+import artifact_store
+import placeholder_artifacts
+import scene_detection
+import sign_rendering
+
+
+@dataclass
+class MediaChunk:
+    index: int
+    start: float  # seconds from the start of the video
+    fps: int
+    sample_rate: int
+    frames: np.ndarray  # (n_frames, height, width, 3) uint8
+    audio: np.ndarray  # (n_samples,) float32 in [-1, 1]
+
+
+# Worker metrics, exported to /metrics through metric_samples()
+pipeline_stats = {"active": 0, "completed": 0, "chunks_decoded": 0}
+_active_buffers = weakref.WeakSet()
+
+
+def metric_samples():
+    return [
+        ("aidae_media_pipelines_active", "gauge", "Decode pipelines currently running.",
+         [({}, pipeline_stats["active"])]),
+        ("aidae_media_pipelines_completed_total", "counter", "Decode pipelines finished.",
+         [({}, pipeline_stats["completed"])]),
+        ("aidae_media_chunks_decoded_total", "counter", "Media chunks decoded.",
+         [({}, pipeline_stats["chunks_decoded"])]),
+        ("aidae_media_buffered_chunks", "gauge", "Decoded chunks waiting in fan-out buffers.",
+         [({}, sum(len(b) for b in list(_active_buffers)))]),
+    ]
+
+
+# Decoding
+class SyntheticDecoder:
+    """
+    Placeholder decoder until a real media backend (ffmpeg/PyAV) is wired in.
+
+    Produces deterministic frames and audio derived from the URL: the video is
+    cut into shots of flat colour with a moving block, and the audio track
+    alternates between speech-like noise and silence.
+    """
+
+    def __init__(self, video_file_url: str, duration: float = 60.0, fps: int = 25,
+                 width: int = 320, height: int = 180, sample_rate: int = 16000,
+                 chunk_seconds: float = 1.0):
+        self.video_file_url = video_file_url
+        self.duration = duration
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.sample_rate = sample_rate
+        self.chunk_seconds = chunk_seconds
+        seed = int.from_bytes(hashlib.sha256(video_file_url.encode()).digest()[:8], "little")
+        self._rng = np.random.default_rng(seed)
+
+    def __iter__(self):
+        rng = self._rng
+        frames_per_chunk = max(1, int(self.fps * self.chunk_seconds))
+        samples_per_frame = self.sample_rate // self.fps
+        total_frames = int(self.duration * self.fps)
+        shot_end = 0
+        speech_end = 0
+        speaking = False
+        colour = np.zeros(3, dtype=np.uint8)
+        block = max(4, self.height // 6)
+        index = 0
+        for first in range(0, total_frames, frames_per_chunk):
+            n = min(frames_per_chunk, total_frames - first)
+            frames = np.empty((n, self.height, self.width, 3), dtype=np.uint8)
+            audio = np.empty(n * samples_per_frame, dtype=np.float32)
+            for i in range(n):
+                frame_no = first + i
+                if frame_no >= shot_end:
+                    colour = rng.integers(0, 256, 3, dtype=np.uint8)
+                    shot_end = frame_no + int(rng.integers(2, 8) * self.fps)
+                if frame_no >= speech_end:
+                    speaking = not speaking
+                    speech_end = frame_no + int(rng.uniform(0.5, 4.0) * self.fps)
+                frames[i] = colour
+                x = (frame_no * 3) % max(1, self.width - block)
+                frames[i, :block, x:x + block] = 255 - colour
+                span = slice(i * samples_per_frame, (i + 1) * samples_per_frame)
+                if speaking:
+                    audio[span] = rng.standard_normal(samples_per_frame, dtype=np.float32) * 0.3
+                else:
+                    audio[span] = rng.standard_normal(samples_per_frame, dtype=np.float32) * 0.002
+            yield MediaChunk(index=index, start=first / self.fps, fps=self.fps,
+                             sample_rate=self.sample_rate, frames=frames, audio=audio)
+            index += 1
+
+
+def open_decoder(video_file_url: str):
+    """Fetch and open ``video_file_url`` for decoding."""
+    return SyntheticDecoder(video_file_url)
+
+
+PLACEHOLDER_BITRATE = 2_000_000  # bits/second assumed for size estimates
+
+
+@dataclass
+class MediaInfo:
+    duration: float  # seconds
+    size_bytes: int
+
+
+def probe(video_file_url: str) -> MediaInfo:
+    """
+    Duration and size of ``video_file_url`` without decoding it.
+
+    Placeholder until container probing (ffprobe / HTTP HEAD) is wired in:
+    reads the decoder's nominal duration and assumes a fixed bitrate.
+    """
+    duration = open_decoder(video_file_url).duration
+    return MediaInfo(duration=duration, size_bytes=int(duration * PLACEHOLDER_BITRATE / 8))
+
+
+# Fan-out
+class BroadcastBuffer:
+    """
+    Bounded single-producer, multi-consumer buffer.
+
+    Each consumer keeps its own read cursor over one shared deque; an item is
+    dropped once every consumer has read it, and the producer blocks while the
+    slowest consumer is ``capacity`` items behind.
+    """
+
+    def __init__(self, capacity: int, consumers: int):
+        self.capacity = capacity
+        self._items = collections.deque()
+        self._base = 0
+        self._cursors = [0] * consumers
+        self._closed = False
+        self._cond = asyncio.Condition()
+
+    def __len__(self):
+        return len(self._items)
+
+    async def put(self, item) -> bool:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._closed or len(self._items) < self.capacity)
+            if self._closed:
+                return False
+            self._items.append(item)
+            self._cond.notify_all()
+            return True
+
+    async def get(self, consumer: int):
+        async with self._cond:
+            await self._cond.wait_for(
+                lambda: self._closed or self._cursors[consumer] - self._base < len(self._items))
+            offset = self._cursors[consumer] - self._base
+            if offset >= len(self._items):
+                return None
+            item = self._items[offset]
+            self._cursors[consumer] += 1
+            low = min(self._cursors)
+            while self._base < low:
+                self._items.popleft()
+                self._base += 1
+            self._cond.notify_all()
+            return item
+
+    async def close(self):
+        async with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+async def run_pipeline(decoder, tracks: list, buffer_size: int = 8) -> List[str]:
+    """
+    Decode once and feed every chunk to all ``tracks`` concurrently, then
+    finish each track. If decoding or any track fails, the rest are cancelled
+    and no track is finished.
+    """
+    buffer = BroadcastBuffer(buffer_size, len(tracks))
+    _active_buffers.add(buffer)
+
+    async def produce():
+        chunks = iter(decoder)
+        try:
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None or not await buffer.put(chunk):
+                    break
+                pipeline_stats["chunks_decoded"] += 1
+        finally:
+            await buffer.close()
+
+    async def consume(index, track):
+        try:
+            while (chunk := await buffer.get(index)) is not None:
+                await asyncio.to_thread(track.feed, chunk)
+        except BaseException:
+            await buffer.close()
+            raise
+
+    pipeline_stats["active"] += 1
+    try:
+        tasks = [asyncio.ensure_future(produce())]
+        tasks += [asyncio.ensure_future(consume(i, t)) for i, t in enumerate(tracks)]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # The first failure aborts the run: stop the other tracks, and finish none of them, so no
+            # artifact is stored from truncated input.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return list(await asyncio.gather(*(asyncio.to_thread(track.finish) for track in tracks)))
+    finally:
+        pipeline_stats["active"] -= 1
+        pipeline_stats["completed"] += 1
+        _active_buffers.discard(buffer)
+
+
+# Enhancement tracks
+class SignLanguageTrack:
+    """
+    Sign language avatar track.
+
+    Tracks per-chunk motion to time the avatar and assembles the pose track
+    from cached gloss clips; glosses come from a placeholder source until
+    speech-to-text and translation are wired in.
+    """
+
+    def __init__(self, video_file_url: str, sign_language: str):
+        self.video_file_url = video_file_url
+        self.sign_language = sign_language
+        self.motion: List[float] = []
+        self.duration = 0.0
+        self.pose: Optional[np.ndarray] = None
+        self._last: Optional[np.ndarray] = None
+
+    def feed(self, chunk: MediaChunk):
+        grey = chunk.frames[:, ::4, ::4, 1].astype(np.int16)
+        previous = grey[:1] if self._last is None else self._last[None]
+        diffs = np.abs(np.diff(np.concatenate([previous, grey]), axis=0)).mean(axis=(1, 2))
+        self.motion.extend(diffs.tolist())
+        self.duration += len(chunk.frames) / chunk.fps
+        self._last = grey[-1]
+
+    def finish(self) -> str:
+        glosses = sign_rendering.placeholder_glosses(self.video_file_url, int(self.duration))
+        self.pose = sign_rendering.renderer.render(self.sign_language, glosses)
+        # The avatar pose track is stored as-is until a video encoder is wired in.
+        pose = io.BytesIO()
+        np.save(pose, self.pose.astype(np.float32, copy=False))
+        return artifact_store.store.url(artifact_store.store.put(pose.getvalue(), ".pose.npy"))
+
+
+class DescriptiveAudioTrack:
+    """
+    Placeholder descriptive audio generator.
+
+    Scene changes and dialogue gaps are analysed for real; ``slots`` holds the
+    points where descriptions fit once synthesis is wired in.
+    """
+
+    def __init__(self, video_file_url: str, detail_level: Optional[str] = None):
+        self.video_file_url = video_file_url
+        self.detail_level = detail_level
+        self.detector = scene_detection.SceneDetector(scene_detection.detail_profile(detail_level))
+        self.slots: List[scene_detection.DescriptionSlot] = []
+        self.duration = 0.0
+
+    def feed(self, chunk: MediaChunk):
+        self.detector.feed(chunk)
+        self.duration += len(chunk.frames) / chunk.fps
+
+    def finish(self) -> str:
+        self.detector.finish()
+        self.slots = self.detector.description_slots()
+        # Streamed to the store a second at a time; a tone marks each slot until synthesis is wired in.
+        audio = placeholder_artifacts.wav_stream(self.duration, [(s.start, min(s.duration, 1.0)) for s in self.slots])
+        return artifact_store.store.url(artifact_store.store.put_stream(audio, ".wav"))
+
+
+# Entry points used by the endpoints
+async def sign_language_video(video_file_url: str, sign_language: str) -> str:
+    (url,) = await run_pipeline(open_decoder(video_file_url),
+                                [SignLanguageTrack(video_file_url, sign_language)])
+    return url
+
+
+async def descriptive_audio(video_file_url: str, detail_level: Optional[str] = None) -> str:
+    (url,) = await run_pipeline(open_decoder(video_file_url),
+                                [DescriptiveAudioTrack(video_file_url, detail_level)])
+    return url
+
+
+async def instructional_accessibility(video_file_url: str, sign_language: str,
+                                      descriptive_audio_details: dict) -> tuple:
+    """Produce the sign language video and descriptive audio from a single decode."""
+    detail_level = descriptive_audio_details.get("level_of_detail")
+    return tuple(await run_pipeline(open_decoder(video_file_url), [
+        SignLanguageTrack(video_file_url, sign_language),
+        DescriptiveAudioTrack(video_file_url, detail_level),
+    ]))
@@ -0,0 +1,251 @@
+"""
+Bounded registry of speech, captioning and sign language models.
+
+Every (kind, variant) pair - a text-to-speech language and voice, a
+captioning or speech-to-text language, a sign language - is a separate
+model, and keeping all of them resident would exhaust memory. The registry
+loads a model the first time a request needs it and keeps at most
+``max_bytes`` (``AI_DAE_MODEL_MEMORY_MB``) of models resident, evicting the
+least recently used one to make room.
+
+* Requests hold a model with ``async with registry.use(kind, variant)``;
+  a model in use is never evicted. If every resident model is in use the
+  load goes ahead over budget, which is logged and counted.
+* Scheduled jobs take their model inside their ``job_scheduler`` slot with
+  ``registry.holding(kind, variant, work)``, so a job waiting in the queue
+  neither loads nor pins a model.
+* Concurrent requests for a model that is loading wait for that one load;
+  a model is never loaded twice at the same time. Failed loads are not
+  cached.
+* Loads run in a worker thread, so the event loop keeps serving.
+* ``AI_DAE_MODEL_WARMUP`` (e.g. ``text_to_speech:en/default,sign_language:ASL``)
+  names models to load at startup.
+
+Loads and evictions are logged on the ``aidae.models`` logger and exported
+as metrics.
+"""
+import asyncio
+import collections
+import contextlib
+import hashlib
+import inspect
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Tuple, Union
+
+DEFAULT_MAX_BYTES = int(float(os.environ.get("AI_DAE_MODEL_MEMORY_MB", "512")) * 2 ** 20)
+WARMUP = os.environ.get("AI_DAE_MODEL_WARMUP", "")
+# Nominal resident size per model kind.
+MODEL_SIZES = {"text_to_speech": 64 * 2 ** 20, "video_captioning": 128 * 2 ** 20,
+               "speech_to_text": 128 * 2 ** 20, "sign_language": 96 * 2 ** 20}
+LANGUAGE_CODES = {"english": "en", "spanish": "es", "french": "fr"}
+
+logger = logging.getLogger("aidae.models")
+
+Key = Tuple[str, str]
+
+
+def normalize_language(language: Any) -> str:
+    """Map language names and codes ("English", "en", LanguageType.en) to one code."""
+    value = str(getattr(language, "value", language)).strip().lower()
+    return LANGUAGE_CODES.get(value, value)
+
+
+class StubModel:
+    """
+    Placeholder model until the speech, captioning and avatar models are
+    wired in: loading takes time in proportion to its nominal size, and it
+    holds nothing but that size.
+    """
+
+    LOAD_BYTES_PER_SECOND = 2 * 2 ** 30
+
+    def __init__(self, kind: str, variant: str):
+        self.kind = kind
+        self.variant = variant
+        self.size_bytes = MODEL_SIZES.get(kind, 64 * 2 ** 20)
+        self.fingerprint = hashlib.sha256(f"{kind}|{variant}".encode()).hexdigest()[:16]
+        time.sleep(self.size_bytes / self.LOAD_BYTES_PER_SECOND)
+
+    def close(self):
+        pass
+
+
+@dataclass
+class Resident:
+    model: Any
+    size_bytes: int
+    loaded: float
+    pins: int = 0
+
+
+class ModelRegistry:
+    def __init__(self, loader: Callable[[str, str], Any] = StubModel, max_bytes: int = DEFAULT_MAX_BYTES,
+                 size_of: Callable[[str, str], int] = lambda kind, variant: MODEL_SIZES.get(kind, 64 * 2 ** 20)):
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self.size_of = size_of
+        self.models: "collections.OrderedDict[Key, Resident]" = collections.OrderedDict()
+        self.resident_bytes = 0
+        self.reserved_bytes = 0  # loads in progress
+        self._loading: Dict[Key, asyncio.Task] = {}
+        self.requests = dict.fromkeys(("hit", "wait", "load"), 0)
+        self.loads: Dict[str, int] = collections.Counter()
+        self.load_seconds: Dict[str, float] = collections.Counter()
+        self.evictions: Dict[str, int] = collections.Counter()
+        self.load_failures = 0
+        self.over_budget_loads = 0
+
+    @contextlib.asynccontextmanager
+    async def use(self, kind: str, variant: str) -> AsyncIterator[Any]:
+        """Hold the (kind, variant) model, loading it first if needed."""
+        key = (kind, variant)
+        resident = await self._acquire(key)
+        try:
+            yield resident.model
+        finally:
+            resident.pins -= 1
+            if self.resident_bytes > self.max_bytes:
+                self._make_room(0)
+
+    async def holding(self, kind: str, variant: str, work: Callable[[], Union[Awaitable, Any]]):
+        """Run ``work()`` (awaiting its result if needed) while holding the (kind, variant) model."""
+        async with self.use(kind, variant):
+            result = work()
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+
+    async def _acquire(self, key: Key) -> Resident:
+        while True:
+            resident = self.models.get(key)
+            if resident is not None:
+                self.models.move_to_end(key)
+                self.requests["hit"] += 1
+                resident.pins += 1
+                return resident
+            task = self._loading.get(key)
+            if task is None:
+                self.requests["load"] += 1
+                task = self._loading[key] = asyncio.get_running_loop().create_task(self._load(key))
+            else:
+                self.requests["wait"] += 1
+            resident = await asyncio.shield(task)
+            if self.models.get(key) is resident:
+                resident.pins += 1
+                self.models.move_to_end(key)
+                return resident
+            # Evicted between the load finishing and this request resuming: look again.
+
+    async def _load(self, key: Key) -> Resident:
+        kind, variant = key
+        size = self.size_of(kind, variant)
+        self._make_room(size)
+        self.reserved_bytes += size
+        start = time.perf_counter()
+        try:
+            model = await asyncio.to_thread(self.loader, kind, variant)
+        except Exception:
+            self.load_failures += 1
+            logger.exception("model %s/%s failed to load", kind, variant)
+            raise
+        finally:
+            self.reserved_bytes -= size
+            self._loading.pop(key, None)
+        seconds = time.perf_counter() - start
+        resident = self.models[key] = Resident(model, size, time.time())
+        self.resident_bytes += size
+        self.loads[kind] += 1
+        self.load_seconds[kind] += seconds
+        logger.info("model %s/%s loaded in %.2fs (%d MiB resident of %d MiB)", kind, variant, seconds,
+                    self.resident_bytes >> 20, self.max_bytes >> 20)
+        return resident
+
+    def _make_room(self, size: int):
+        """Evict least recently used models not in use until ``size`` more bytes fit."""
+        for key in list(self.models):
+            if self.resident_bytes + self.reserved_bytes + size <= self.max_bytes:
+                return
+            resident = self.models[key]
+            if resident.pins == 0:
+                self._evict(key)
+        if size and self.resident_bytes + self.reserved_bytes + size > self.max_bytes:
+            self.over_budget_loads += 1
+            logger.warning("loading a %d MiB model over the %d MiB budget: every resident model is in use",
+                           size >> 20, self.max_bytes >> 20)
+
+    def _evict(self, key: Key):
+        resident = self.models.pop(key)
+        self.resident_bytes -= resident.size_bytes
+        self.evictions[key[0]] += 1
+        close = getattr(resident.model, "close", None)
+        if close is not None:
+            close()
+        logger.info("model %s/%s evicted after %.0fs resident (%d MiB resident)", key[0], key[1],
+                    time.time() - resident.loaded, self.resident_bytes >> 20)
+
+    async def warm(self, specs: List[Key]):
+        """Load ``specs`` (kind, variant) in order, e.g. at startup."""
+        for kind, variant in specs:
+            async with self.use(kind, variant):
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "resident": [{"kind": kind, "variant": variant, "size_bytes": r.size_bytes, "in_use": r.pins}
+                         for (kind, variant), r in self.models.items()],
+            "resident_bytes": self.resident_bytes,
+            "max_bytes": self.max_bytes,
+            "loading": len(self._loading),
+            "hits": self.requests["hit"],
+            "waits": self.requests["wait"],
+            "loads": sum(self.loads.values()),
+            "evictions": sum(self.evictions.values()),
+            "load_failures": self.load_failures,
+            "over_budget_loads": self.over_budget_loads,
+        }
+
+
+def parse_warmup(spec: str) -> List[Key]:
+    """``"kind:variant,kind:variant"`` as (kind, variant) pairs; ValueError on a malformed entry."""
+    pairs = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        kind, sep, variant = item.partition(":")
+        if not sep or kind not in MODEL_SIZES or not variant:
+            raise ValueError(f"Bad model warmup entry {item!r}; expected one of {', '.join(MODEL_SIZES)}:<variant>")
+        pairs.append((kind, variant))
+    return pairs
+
+
+registry = ModelRegistry()
+
+
+async def warm_configured():
+    specs = parse_warmup(WARMUP)
+    if specs:
+        start = time.perf_counter()
+        await registry.warm(specs)
+        logger.info("warmed %d models in %.2fs", len(specs), time.perf_counter() - start)
+
+
+def metric_samples():
+    kinds = sorted(MODEL_SIZES)
+    return [
+        ("aidae_model_requests_total", "counter", "Model lookups: resident (hit), joined a load (wait) or loaded.",
+         [({"result": result}, n) for result, n in registry.requests.items()]),
+        ("aidae_model_loads_total", "counter", "Models loaded, by kind.",
+         [({"kind": kind}, registry.loads[kind]) for kind in kinds]),
+        ("aidae_model_load_seconds_total", "counter", "Time spent loading models, by kind.",
+         [({"kind": kind}, registry.load_seconds[kind]) for kind in kinds]),
+        ("aidae_model_evictions_total", "counter", "Models evicted to stay within the memory budget, by kind.",
+         [({"kind": kind}, registry.evictions[kind]) for kind in kinds]),
+        ("aidae_model_load_failures_total", "counter", "Model loads that failed.", [({}, registry.load_failures)]),
+        ("aidae_model_over_budget_loads_total", "counter", "Loads made over budget because every model was in use.",
+         [({}, registry.over_budget_loads)]),
+        ("aidae_model_resident_bytes", "gauge", "Nominal memory held by resident models.",
+         [({}, registry.resident_bytes)]),
+        ("aidae_model_memory_limit_bytes", "gauge", "Model memory budget.", [({}, registry.max_bytes)]),
+        ("aidae_models_resident", "gauge", "Resident models.", [({}, len(registry.models))]),
+    ]
@@ -0,0 +1,162 @@
+"""
+Placeholder artifact generators, until real speech synthesis, captioning
+and document conversion backends are wired in.
+
+Each produces a well-formed file of the right type (WAV, WebVTT, BRF,
+tagged PDF) so that clients, players and the download endpoint can be
+exercised end to end; the content itself is a stand-in.
+"""
+import asyncio
+import hashlib
+import struct
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from artifact_store import store
+
+SAMPLE_RATE = 16000
+WAV_HEADER_BYTES = 44
+SPEECH_CHARS_PER_SECOND = 15.0  # about 150 words a minute
+
+
+# Audio
+def wav_header(frames: Optional[int], sample_rate: int = SAMPLE_RATE) -> bytes:
+    """
+    Header of a 16-bit mono WAV of ``frames`` samples; ``None`` for a stream
+    of unknown length, which players read to the end of.
+    """
+    data_size = 0xFFFFFFFF if frames is None else frames * 2
+    return (b"RIFF" + struct.pack("<I", min(0xFFFFFFFF, 36 + data_size)) + b"WAVE"
+            + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+            + b"data" + struct.pack("<I", data_size))
+
+
+def wav_stream(duration: float, beeps: Iterable[Tuple[float, float]] = (), sample_rate: int = SAMPLE_RATE,
+               frequency: float = 880.0) -> Iterator[bytes]:
+    """16-bit mono WAV of silence with a tone at each (start, length) in ``beeps``, one second per chunk."""
+    total = int(duration * sample_rate)
+    yield wav_header(total, sample_rate)
+    spans = sorted((int(s * sample_rate), int((s + n) * sample_rate)) for s, n in beeps)
+    for first in range(0, total, sample_rate):
+        last = min(total, first + sample_rate)
+        block = np.zeros(last - first, dtype=np.int16)
+        for start, end in spans:
+            lo, hi = max(start, first), min(end, last)
+            if lo < hi:
+                t = np.arange(lo, hi) / sample_rate
+                block[lo - first:hi - first] = (np.sin(2 * np.pi * frequency * t) * 6000).astype(np.int16)
+        yield block.tobytes()
+
+
+def _seconds_from(key: str, low: float, high: float) -> float:
+    fraction = int.from_bytes(hashlib.sha256(key.encode()).digest()[:4], "little") / 2 ** 32
+    return low + (high - low) * fraction
+
+
+def speech_artifact(content_id: str, language: str, voice_type: str) -> str:
+    duration = _seconds_from(f"{content_id}|{language}|{voice_type}", 5.0, 60.0)
+    return store.url(store.put_stream(wav_stream(duration, [(0.0, 0.2)]), ".wav"))
+
+
+def speech_chunk_artifact(text: str, language: str, voice_type: str) -> str:
+    """One chunk of streamed speech as a WAV artifact, as long as reading ``text`` aloud; returns its id."""
+    duration = max(0.3, len(text) / SPEECH_CHARS_PER_SECOND)
+    return store.put_stream(wav_stream(duration, [(0.0, 0.05)]), ".wav")
+
+
+# Captions
+def _timestamp(seconds: float) -> str:
+    hours, rest = divmod(seconds, 3600)
+    minutes, rest = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{rest:06.3f}"
+
+
+def webvtt(cues: Sequence[Tuple[float, float, str]]) -> bytes:
+    lines = ["WEBVTT", ""]
+    for start, end, text in cues:
+        lines += [f"{_timestamp(start)} --> {_timestamp(end)}", text, ""]
+    return "\n".join(lines).encode()
+
+
+def captions_artifact(video_file_url: str, language: str) -> str:
+    cues = [(0.0, 4.0, f"[{language} captions for {video_file_url} pending speech recognition]")]
+    return store.url(store.put(webvtt(cues), ".vtt"))
+
+
+# Documents
+_BRAILLE_DIGITS = "JABCDEFGHI"
+
+
+def braille_ready(text: str, width: int = 40) -> bytes:
+    """Uncontracted North American ASCII braille (BRF), wrapped to ``width`` cells."""
+    cells = []
+    in_number = False
+    for ch in text.upper():
+        if ch.isdigit():
+            cells.append(("" if in_number else "#") + _BRAILLE_DIGITS[int(ch)])
+            in_number = True
+        else:
+            cells.append(ch if ch.isalpha() or ch == " " else {".": "4", ",": "1", "-": "-"}.get(ch, ""))
+            in_number = False
+    words, lines, line = "".join(cells).split(), [], ""
+    for word in words:
+        if line and len(line) + 1 + len(word) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    lines.append(line)
+    return ("\r\n".join(lines) + "\r\n\x0c").encode("ascii")
+
+
+def _pdf_string(text: str) -> bytes:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)").encode("latin-1", "replace")
+
+
+def tagged_pdf(title: str, text: str) -> bytes:
+    """Single-page PDF with a structure tree (/Document -> /P) and marked content, i.e. a tagged PDF."""
+    content = b"/P <</MCID 0>> BDC BT /F1 12 Tf 72 720 Td (" + _pdf_string(text) + b") Tj ET EMC"
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R /MarkInfo << /Marked true >> /StructTreeRoot 6 0 R /Lang (en)"
+        b" /ViewerPreferences << /DisplayDocTitle true >> >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R"
+        b" /Resources << /Font << /F1 5 0 R >> >> /StructParents 0 >>",
+        b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Type /StructTreeRoot /K 7 0 R /ParentTree << /Nums [0 [8 0 R]] >> >>",
+        b"<< /Type /StructElem /S /Document /P 6 0 R /K [8 0 R] >>",
+        b"<< /Type /StructElem /S /P /P 7 0 R /Pg 3 0 R /K 0 >>",
+    ]
+    out = bytearray(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R /Info << /Title (%s) >> >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, _pdf_string(title), xref)
+    return bytes(out)
+
+
+def document_artifact(document_id: str, desired_format: str) -> str:
+    text = f"Accessible version of document {document_id}."
+    if (desired_format or "").lower() == "braille":
+        return store.url(store.put(braille_ready(text), ".brf"))
+    return store.url(store.put(tagged_pdf(f"Document {document_id}", text), ".pdf"))
+
+
+# Async entry points for the endpoints; file writes happen off the event loop.
+async def text_to_speech(content_id: str, language: str, voice_type: str) -> str:
+    return await asyncio.to_thread(speech_artifact, content_id, language, voice_type)
+
+
+async def video_captions(video_file_url: str, language: str) -> str:
+    return await asyncio.to_thread(captions_artifact, video_file_url, language)
+
+
+async def accessible_documents(document_ids: Sequence[str], desired_format: str) -> List[str]:
+    return await asyncio.to_thread(lambda: [document_artifact(str(d), desired_format) for d in document_ids])
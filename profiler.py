@@ -0,0 +1,218 @@
+"""
+On-demand sampling profiler with per-route attribution.
+
+Nothing is installed on the request path while the profiler is off: the
+sampler thread only exists for the duration of a capture, and the hook used
+to count "the next N requests" for a route is swapped into that one route
+and removed again when the capture ends.
+
+Each sample walks every thread's stack; samples from the event loop thread
+are attributed to the route whose endpoint function is on the stack, so the
+output splits into one flamegraph per route handler. Output is collapsed
+stacks (flamegraph.pl / speedscope import) or native speedscope JSON.
+"""
+import asyncio
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+ADMIN_TOKEN_ENV = "AI_DAE_ADMIN_TOKEN"
+MAX_SECONDS = 300
+IDLE_LEAVES = frozenset(("select", "poll", "wait", "_worker", "run_forever"))
+
+Frame = Tuple[str, str, int]  # (function, file, first line)
+
+
+class SamplingProfiler:
+    """
+    Samples every thread's stack each ``interval`` seconds from a background thread.
+
+    Stacks on the event loop thread are attributed to the route whose endpoint
+    is on the stack. Worker-thread stacks (``asyncio.to_thread`` work) carry no
+    route, so they are attributed to the only route with requests in flight
+    according to ``in_flight``, or to ``<thread pool>`` when several are busy.
+    """
+
+    def __init__(self, route_codes: Dict[object, str], interval: float = 0.005,
+                 only_route: Optional[str] = None, include_idle: bool = False,
+                 in_flight: Optional[Dict[str, int]] = None, ignore_routes: Tuple[str, ...] = ()):
+        self.route_codes = route_codes
+        self.in_flight = in_flight if in_flight is not None else {}
+        self.ignore_routes = ignore_routes
+        self.interval = interval
+        self.only_route = only_route
+        self.include_idle = include_idle
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.started = 0.0
+        self.stopped = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop_thread = None
+
+    def start(self):
+        """Start sampling; call from the event loop thread."""
+        self.started = time.perf_counter()
+        self._loop_thread = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name="aidae-profiler", daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        """Stop sampling; the join (up to one interval plus a sample) runs off the event loop."""
+        self._stop.set()
+        if self._thread is not None:
+            await asyncio.to_thread(self._thread.join)
+        self.stopped = time.perf_counter()
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            busy = [path for path, n in self.in_flight.items() if n and path not in self.ignore_routes]
+            worker_route = busy[0] if len(busy) == 1 else "<thread pool>"
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                fallback = f"<thread {names.get(thread_id, thread_id)}>" if thread_id == self._loop_thread else worker_route
+                self._sample(frame, fallback)
+            self.sample_count += 1
+
+    def _sample(self, frame, fallback: str):
+        stack = []
+        route = None
+        route_codes = self.route_codes
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+            if route is None:
+                route = route_codes.get(code)
+            frame = frame.f_back
+        if not stack or (not self.include_idle and route is None and stack[0][0] in IDLE_LEAVES):
+            return
+        route = route or fallback
+        if route in self.ignore_routes or (self.only_route is not None and route != self.only_route):
+            return
+        stack.reverse()
+        self.samples[(route, tuple(stack))] += 1
+
+    # Output
+    def collapsed(self) -> str:
+        lines = []
+        for (route, stack), n in sorted(self.samples.items(), key=lambda item: -item[1]):
+            names = ";".join(f"{name} ({os.path.basename(path)}:{line})" for name, path, line in stack)
+            lines.append(f"{route};{names} {n}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self) -> dict:
+        frames: Dict[Frame, int] = {}
+        profiles: Dict[str, dict] = {}
+        duration = (self.stopped or time.perf_counter()) - self.started
+        for (route, stack), n in self.samples.items():
+            indexes = [frames.setdefault(f, len(frames)) for f in stack]
+            profile = profiles.setdefault(route, {
+                "type": "sampled", "name": route, "unit": "seconds",
+                "startValue": 0, "endValue": duration, "samples": [], "weights": []})
+            profile["samples"].append(indexes)
+            profile["weights"].append(n * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": [{"name": name, "file": path, "line": line} for name, path, line in frames]},
+            "profiles": sorted(profiles.values(), key=lambda p: -sum(p["weights"])),
+            "name": "AI-DAE sampling profile",
+            "exporter": "aidae-profiler",
+        }
+
+
+class _CountCompletions:
+    """Temporarily wraps one route's ASGI app to count finished requests."""
+
+    def __init__(self, app, target: int, done: asyncio.Event):
+        self.app = app
+        self.target = target
+        self.done = done
+        self.completed = 0
+        self._loop = asyncio.get_running_loop()
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.completed += 1
+            if self.completed == self.target:
+                # The request may be served on another event loop (multiple loops, test clients).
+                self._loop.call_soon_threadsafe(self.done.set)
+
+
+def _route_codes(app: FastAPI) -> Dict[object, str]:
+    codes = {}
+    for route in app.router.routes:
+        endpoint = getattr(route, "endpoint", None)
+        code = getattr(endpoint, "__code__", None)
+        if code is not None:
+            codes[code] = route.path
+    return codes
+
+
+def install(app: FastAPI):
+    """Add the admin-only ``POST /admin/profile`` endpoint to ``app``."""
+    lock = asyncio.Lock()
+
+    @app.post("/admin/profile", include_in_schema=False)
+    async def capture_profile(seconds: float = Query(None, gt=0, le=MAX_SECONDS),
+                              route: str = Query(None, description="Route template, e.g. /content/status/{contentId}"),
+                              requests: int = Query(None, gt=0),
+                              interval_ms: float = Query(5.0, ge=1.0, le=100.0),
+                              format: str = Query("collapsed", pattern="^(collapsed|speedscope)$"),
+                              include_idle: bool = False,
+                              x_admin_token: str = Header(None)):
+        """
+        Sample the running service for ``seconds``, or until ``requests`` requests to ``route`` have finished.
+        """
+        token = os.environ.get(ADMIN_TOKEN_ENV)
+        if not token or not x_admin_token or not hmac.compare_digest(token, x_admin_token):
+            raise HTTPException(status_code=403, detail="Admin token required")
+        if requests is not None and route is None:
+            raise HTTPException(status_code=400, detail="requests needs a route")
+        if seconds is None and requests is None:
+            raise HTTPException(status_code=400, detail="Give seconds, or route and requests")
+        if lock.locked():
+            raise HTTPException(status_code=409, detail="A profile is already being captured")
+
+        async with lock:
+            targets = [r for r in app.router.routes if getattr(r, "path", None) == route] if route else []
+            if route and not targets:
+                raise HTTPException(status_code=404, detail="Route not found")
+            http_metrics = getattr(app.state, "metrics", None)
+            profiler = SamplingProfiler(_route_codes(app), interval=interval_ms / 1000,
+                                        only_route=route, include_idle=include_idle,
+                                        in_flight=http_metrics.in_flight if http_metrics else None,
+                                        ignore_routes=("/admin/profile",))
+            done = asyncio.Event()
+            wrappers = []
+            if requests is not None:
+                for target in targets:
+                    wrapper = _CountCompletions(target.app, requests, done)
+                    wrappers.append((target, wrapper))
+                    target.app = wrapper
+            profiler.start()
+            try:
+                await asyncio.wait_for(done.wait(), seconds if seconds is not None else MAX_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                for target, wrapper in wrappers:
+                    target.app = wrapper.app
+                await profiler.stop()
+
+        if format == "speedscope":
+            return JSONResponse(profiler.speedscope())
+        return PlainTextResponse(profiler.collapsed())
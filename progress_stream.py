@@ -0,0 +1,184 @@
+"""
+Server-Sent Events progress for archive batches.
+
+``GET /archives/content/status/{batchProcessId}/events`` streams
+
+    id: <version>
+    event: progress            (``completed`` for the last one)
+    data: {"batch_process_id": ..., "status": ..., "percentage_completed": ...,
+           "items_total": ..., "items_completed": ..., "manual_review_needed": [<new ids>]}
+
+One ``BatchProgress`` source per watched batch reads the shared state every
+``poll_interval`` seconds (at once when a local worker completes the batch)
+and publishes a new version only when something changed: it encodes the
+snapshot once and appends newly flagged item IDs to an append-only log.
+Subscribers never query the store. Each one waits for a newer version, no
+sooner than ``1 / max_rate`` seconds after its previous event, then sends
+the latest snapshot with the log entries it has not seen yet, so a slow or
+rate-limited dashboard skips intermediate versions instead of queueing them.
+The first event carries every ID flagged so far.
+"""
+import asyncio
+import json
+import os
+from typing import AsyncIterator, Dict, List, Optional
+
+from shared_state import StateStore, state
+
+DEFAULT_POLL_INTERVAL = float(os.environ.get("AI_DAE_PROGRESS_POLL_INTERVAL", "0.25"))
+DEFAULT_MAX_RATE = 2.0  # events per second per subscriber
+KEEPALIVE_SECONDS = 15.0
+
+
+class BatchProgress:
+    """The shared progress source for one batch."""
+
+    def __init__(self, batch_id: str, shared: StateStore, poll_interval: float):
+        self.batch_id = batch_id
+        self.shared = shared
+        self.poll_interval = poll_interval
+        self.version = 0
+        self.snapshot: Optional[dict] = None
+        self.encoded = b""  # the snapshot's JSON without manual_review_needed, built once per version
+        self.flagged: List[str] = []
+        self.finished = False
+        self.subscribers = 0
+        self.polls = 0
+        self._flagged_set = set()
+        self._changed = asyncio.get_running_loop().create_future()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self) -> bool:
+        """Read the store; publish a new version if anything changed. False if the batch does not exist."""
+        self.polls += 1
+        batch = await asyncio.to_thread(self.shared.batch_status, self.batch_id)
+        if batch is None:
+            return False
+        total, completed = batch["total"], batch["completed"]
+        new_flags = [item for item in batch["manual_review_needed"] if item not in self._flagged_set]
+        if self.snapshot is not None and not new_flags and completed == self.snapshot["items_completed"]:
+            return True
+        self.flagged.extend(new_flags)
+        self._flagged_set.update(new_flags)
+        self.finished = completed >= total
+        self.snapshot = {
+            "batch_process_id": self.batch_id,
+            "status": "completed" if self.finished else "processing",
+            "percentage_completed": completed * 100 // total if total else 100,
+            "items_total": total,
+            "items_completed": completed,
+        }
+        self.encoded = json.dumps(self.snapshot, separators=(",", ":")).encode()
+        self.version += 1
+        changed, self._changed = self._changed, asyncio.get_running_loop().create_future()
+        changed.set_result(None)
+        return True
+
+    def ensure_polling(self):
+        if self._task is None and not self.finished:
+            self._task = asyncio.get_running_loop().create_task(self._poll())
+
+    def notify(self):
+        self._wake.set()
+
+    async def _poll(self):
+        try:
+            while self.subscribers and not self.finished:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                await self.refresh()
+        finally:
+            self._task = None
+
+    async def changed(self, after_version: int, timeout: float) -> bool:
+        """Wait until ``version`` exceeds ``after_version``; False on timeout."""
+        if self.version > after_version:
+            return True
+        try:
+            await asyncio.wait_for(asyncio.shield(self._changed), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+class ProgressHub:
+    def __init__(self, shared: StateStore = state, poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.shared = shared
+        self.poll_interval = poll_interval
+        self.sources: Dict[str, BatchProgress] = {}
+        self.events_sent = 0
+        self.events_skipped = 0
+
+    def notify(self, batch_id: str):
+        source = self.sources.get(batch_id)
+        if source is not None:
+            source.notify()
+
+    async def open(self, batch_id: str) -> Optional[BatchProgress]:
+        """The batch's progress source (registered on first subscription); None if there is no such batch."""
+        source = self.sources.get(batch_id)
+        if source is None:
+            source = BatchProgress(batch_id, self.shared, self.poll_interval)
+            if not await source.refresh():
+                return None
+        return source
+
+    def _close(self, source: BatchProgress):
+        source.subscribers -= 1
+        if source.subscribers == 0 and self.sources.get(source.batch_id) is source:
+            del self.sources[source.batch_id]
+
+    async def subscribe(self, source: BatchProgress, max_rate: float = DEFAULT_MAX_RATE,
+                        keepalive: float = KEEPALIVE_SECONDS) -> AsyncIterator[bytes]:
+        """SSE frames for one subscriber, ending after the ``completed`` event."""
+        loop = asyncio.get_running_loop()
+        source = self.sources.setdefault(source.batch_id, source)
+        source.subscribers += 1
+        source.ensure_polling()
+        min_interval = 1.0 / max_rate
+        sent_version, sent_flags, last_sent = 0, 0, float("-inf")
+        try:
+            yield b"retry: 2000\n\n"
+            while True:
+                if not await source.changed(sent_version, keepalive):
+                    yield b": keepalive\n\n"
+                    continue
+                wait = last_sent + min_interval - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)  # coalesce: whatever version is current after this is sent
+                if sent_version:
+                    self.events_skipped += source.version - sent_version - 1
+                sent_version = source.version
+                if len(source.flagged) > sent_flags:
+                    flags = json.dumps(source.flagged[sent_flags:], separators=(",", ":")).encode()
+                    sent_flags = len(source.flagged)
+                else:
+                    flags = b"[]"
+                event = b"completed" if source.finished else b"progress"
+                yield (b"id: %d\nevent: %s\ndata: %s,\"manual_review_needed\":%s}\n\n"
+                       % (sent_version, event, source.encoded[:-1], flags))
+                self.events_sent += 1
+                last_sent = loop.time()
+                if source.finished:
+                    return
+        finally:
+            self._close(source)
+
+
+hub = ProgressHub()
+
+
+def metric_samples():
+    return [
+        ("aidae_progress_sources", "gauge", "Archive batches with a shared progress source.",
+         [({}, len(hub.sources))]),
+        ("aidae_progress_subscribers", "gauge", "Open archive progress streams.",
+         [({}, sum(s.subscribers for s in hub.sources.values()))]),
+        ("aidae_progress_events_total", "counter", "Progress events sent to subscribers.", [({}, hub.events_sent)]),
+        ("aidae_progress_versions_coalesced_total", "counter",
+         "Progress versions a subscriber skipped because of its rate limit.", [({}, hub.events_skipped)]),
+    ]
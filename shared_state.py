@@ -0,0 +1,662 @@
+"""
+Process-shared application state, so main5 can run under several uvicorn
+workers (``AI_DAE_WORKERS=4 python main5.py`` or
+``uvicorn main5:app --workers 4``).
+
+Content records, archive batches, the batch job queue, compliance reports
+(including the progress of unfinished archive verifications),
+the book catalogue (rows, version, change log and tombstones), the
+feedback rating aggregates and ``Idempotency-Key`` responses live in one SQLite database (``AI_DAE_STATE_DB``, default ``ai_dae_state.db``) opened in
+WAL mode, so every worker reads what any worker has committed and readers
+never block the writer. IDs come from the database (``AUTOINCREMENT``)
+instead of ``len(contents) + 1``, and jobs are claimed with a single
+``UPDATE ... RETURNING`` so each runs on exactly one worker. A claimed job
+carries a lease; if its worker dies the job is claimed again once the lease
+runs out.
+
+Each process opens its own connection (re-opened after a fork). Async code
+calls the store through ``asyncio.to_thread``: statements are point lookups
+or small writes, but a write can wait up to ``busy_timeout`` for another
+worker's transaction, and that wait must not stall the event loop. Calls
+are serialized per process by a lock, so the shared connection is only ever
+used by one thread at a time.
+
+``AI_DAE_STATE_DB=:memory:`` keeps the database in process memory (one
+worker only); ``image()`` and ``restore_image()`` let ``snapshots`` save it
+and bring it back, indexes included, across restarts.
+"""
+import collections
+import functools
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from conditional import next_version
+
+DEFAULT_PATH = os.environ.get("AI_DAE_STATE_DB", "ai_dae_state.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contents (
+    content_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    content_type TEXT NOT NULL,
+    source_url TEXT,
+    status TEXT NOT NULL,
+    created REAL NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    modified REAL
+);
+CREATE TABLE IF NOT EXISTS batches (
+    batch_id TEXT PRIMARY KEY,
+    archive_id TEXT NOT NULL,
+    content_type TEXT NOT NULL,
+    source TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    callback_url TEXT,
+    version INTEGER NOT NULL DEFAULT 0,
+    modified REAL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch_id TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    worker TEXT,
+    claimed_at REAL,
+    manual_review INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_by_state ON jobs (state, job_id);
+CREATE INDEX IF NOT EXISTS jobs_for_review ON jobs (batch_id, manual_review);
+CREATE INDEX IF NOT EXISTS jobs_by_batch ON jobs (batch_id, job_id);
+CREATE TABLE IF NOT EXISTS reports (
+    report_id TEXT PRIMARY KEY,
+    subject TEXT NOT NULL,
+    standards TEXT NOT NULL,
+    status TEXT NOT NULL,
+    items_total INTEGER NOT NULL,
+    items_checked INTEGER NOT NULL DEFAULT 0,
+    items_failing INTEGER NOT NULL DEFAULT 0,
+    findings_total INTEGER NOT NULL DEFAULT 0,
+    severity_counts TEXT NOT NULL DEFAULT '{}',
+    rule_counts TEXT NOT NULL DEFAULT '{}',
+    created REAL NOT NULL,
+    completed REAL,
+    checker TEXT NOT NULL DEFAULT 'placeholder',
+    batch_id TEXT,
+    content_type TEXT,
+    checked_through INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    claimed_at REAL
+);
+CREATE TABLE IF NOT EXISTS findings (
+    report_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    item_id TEXT NOT NULL,
+    rule_id TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    message TEXT NOT NULL,
+    PRIMARY KEY (report_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS books (
+    book_id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    author TEXT NOT NULL,
+    description TEXT NOT NULL,
+    rating INTEGER NOT NULL,
+    published_date INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    modified REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS book_tombstones (
+    book_id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL,
+    modified REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS book_tombstones_by_version ON book_tombstones (version);
+CREATE TABLE IF NOT EXISTS catalogue (
+    catalogue_id INTEGER PRIMARY KEY CHECK (catalogue_id = 1),
+    version INTEGER NOT NULL,
+    modified REAL NOT NULL,
+    horizon INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ratings (
+    content_id TEXT NOT NULL,
+    rating INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (content_id, rating)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    client TEXT NOT NULL,
+    method TEXT NOT NULL,
+    path TEXT NOT NULL,
+    key TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    claimed_at REAL NOT NULL,
+    expires REAL NOT NULL,
+    status INTEGER,
+    headers TEXT,
+    body BLOB,
+    PRIMARY KEY (client, method, path, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idempotency_keys_by_expiry ON idempotency_keys (expires);
+"""
+_IDEMPOTENCY_KEY = "client = ? AND method = ? AND path = ? AND key = ?"
+BOOK_COLUMNS = ("title", "author", "description", "rating", "published_date")
+# Columns added after a table was first created: (table, column, definition).
+MIGRATIONS = [
+    ("batches", "callback_url", "TEXT"),
+    ("contents", "version", "INTEGER NOT NULL DEFAULT 0"),
+    ("contents", "modified", "REAL"),
+    ("batches", "version", "INTEGER NOT NULL DEFAULT 0"),
+    ("batches", "modified", "REAL"),
+    ("reports", "checker", "TEXT NOT NULL DEFAULT 'placeholder'"),
+    ("reports", "batch_id", "TEXT"),
+    ("reports", "content_type", "TEXT"),
+    ("reports", "checked_through", "INTEGER NOT NULL DEFAULT 0"),
+    ("reports", "worker", "TEXT"),
+    ("reports", "claimed_at", "REAL"),
+]
+
+
+def _serialized(method):
+    """Run ``method`` holding the store's lock, so one thread at a time uses the connection."""
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return locked
+
+
+class StateStore:
+    def __init__(self, path: str = DEFAULT_PATH, busy_timeout: float = 5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.RLock()
+        self._lock_pid = os.getpid()
+
+    @property
+    def lock(self) -> threading.RLock:
+        # A lock copied into a forked child may be held by a thread that does not exist there.
+        if self._lock_pid != os.getpid():
+            self._lock, self._lock_pid = threading.RLock(), os.getpid()
+        return self._lock
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                                   check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._migrate(conn)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection):
+        conn.executescript(SCHEMA)
+        for table, column, definition in MIGRATIONS:
+            if column not in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    @property
+    def in_memory(self) -> bool:
+        return self.path == ":memory:"
+
+    def _transaction(self, work: Callable[[sqlite3.Connection], object]):
+        """Run ``work(conn)`` in one write transaction and return its result."""
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = work(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    # Snapshots
+    def image(self) -> bytes:
+        """
+        The whole database as SQLite's on-disk format. Reads through the
+        connection already open, so in a forked child it is the child's
+        point-in-time copy of an in-memory database.
+        """
+        return (self._conn or self.conn).serialize()
+
+    @_serialized
+    def restore_image(self, image) -> None:
+        """Replace the database with ``image`` (any buffer), then bring its schema up to date."""
+        conn = self.conn
+        conn.deserialize(image)
+        self._migrate(conn)
+
+    # Content
+    @_serialized
+    def seed_contents(self, rows: Sequence[Tuple[int, str, Optional[str]]], status: str = "processing"):
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO contents (content_id, content_type, source_url, status, created, version, modified) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(cid, ctype, url, status, now, next_version(), now) for cid, ctype, url in rows])
+
+    @_serialized
+    def add_content(self, content_type: str, source_url: Optional[str], status: str = "processing") -> int:
+        now = time.time()
+        cursor = self.conn.execute(
+            "INSERT INTO contents (content_type, source_url, status, created, version, modified) "
+            "VALUES (?, ?, ?, ?, ?, ?)", (content_type, source_url, status, now, next_version(), now))
+        return cursor.lastrowid
+
+    @_serialized
+    def set_content_status(self, content_id: int, status: str):
+        """Set the status, moving the record to a new version if it changed."""
+        self.conn.execute("UPDATE contents SET status = ?, version = MAX(version + 1, ?), modified = ? "
+                          "WHERE content_id = ? AND status IS NOT ?",
+                          (status, next_version(), time.time(), content_id, status))
+
+    @_serialized
+    def get_content(self, content_id: int) -> Optional[Dict]:
+        row = self.conn.execute("SELECT content_id, content_type, source_url, status, version, "
+                                "COALESCE(modified, created) AS modified FROM contents "
+                                "WHERE content_id = ?", (content_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    # Batches
+    @_serialized
+    def create_batch(self, batch_id: str, archive_id: str, content_type: str, source: str, items: Sequence[str],
+                     callback_url: Optional[str] = None):
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            conn.execute("INSERT INTO batches (batch_id, archive_id, content_type, source, total, created, callback_url, "
+                         "version, modified) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         (batch_id, archive_id, content_type, source, len(items), now, callback_url, next_version(),
+                          now))
+            conn.executemany("INSERT INTO jobs (batch_id, item_id) VALUES (?, ?)", [(batch_id, i) for i in items])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    @_serialized
+    def batch_version(self, batch_id: str) -> Optional[Tuple[int, float]]:
+        """(version, modified) of a batch; its status changes only with its version."""
+        row = self.conn.execute("SELECT version, COALESCE(modified, created) FROM batches WHERE batch_id = ?",
+                                (batch_id,)).fetchone()
+        return tuple(row) if row is not None else None
+
+    @_serialized
+    def batch_status(self, batch_id: str) -> Optional[Dict]:
+        row = self.conn.execute("SELECT total, completed FROM batches WHERE batch_id = ?", (batch_id,)).fetchone()
+        if row is None:
+            return None
+        review = [r[0] for r in self.conn.execute(
+            "SELECT item_id FROM jobs WHERE batch_id = ? AND manual_review = 1 ORDER BY job_id", (batch_id,))]
+        return {"total": row["total"], "completed": row["completed"], "manual_review_needed": review}
+
+    @_serialized
+    def batch(self, batch_id: str) -> Optional[Dict]:
+        row = self.conn.execute("SELECT batch_id, archive_id, content_type, source, total, completed FROM batches "
+                                "WHERE batch_id = ?", (batch_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    @_serialized
+    def batch_items(self, batch_id: str, after_job_id: int = 0, limit: int = 500) -> List[Tuple[int, str]]:
+        """(job_id, item_id) of a batch's items in order, ``limit`` at a time after ``after_job_id``."""
+        return [tuple(r) for r in self.conn.execute(
+            "SELECT job_id, item_id FROM jobs WHERE batch_id = ? AND job_id > ? ORDER BY job_id LIMIT ?",
+            (batch_id, after_job_id, limit))]
+
+    # Jobs
+    @_serialized
+    def claim_jobs(self, worker: str, limit: int, lease: float) -> List[Tuple[int, str, str]]:
+        """Claim up to ``limit`` queued jobs (or jobs whose lease expired) for ``worker``."""
+        now = time.time()
+        rows = self.conn.execute(
+            "UPDATE jobs SET state = 'running', worker = ?, claimed_at = ? WHERE job_id IN ("
+            " SELECT job_id FROM jobs WHERE state = 'queued' OR (state = 'running' AND claimed_at < ?)"
+            " ORDER BY job_id LIMIT ?) RETURNING job_id, batch_id, item_id",
+            (worker, now, now - lease, limit)).fetchall()
+        return [tuple(r) for r in rows]
+
+    @_serialized
+    def complete_job(self, job_id: int, worker: str, manual_review: bool = False) -> Optional[Dict]:
+        """
+        Mark a claimed job done and return its batch's progress (batch_id,
+        total, completed, callback_url); None if the job was re-claimed by
+        another worker in the meantime.
+        """
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            updated = conn.execute("UPDATE jobs SET state = 'done', manual_review = ? "
+                                   "WHERE job_id = ? AND state = 'running' AND worker = ? RETURNING batch_id",
+                                   (int(manual_review), job_id, worker)).fetchall()
+            batch = None
+            if updated:
+                batch = conn.execute("UPDATE batches SET completed = completed + 1, version = MAX(version + 1, ?), "
+                                     "modified = ? WHERE batch_id = ? RETURNING batch_id, total, completed, callback_url",
+                                     (next_version(), time.time(), updated[0][0])).fetchall()
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return dict(batch[0]) if batch else None
+
+    # Compliance reports
+    @_serialized
+    def create_report(self, report_id: str, subject: str, standards: Sequence[str], items_total: int, checker: str,
+                      batch_id: Optional[str] = None, content_type: Optional[str] = None):
+        """A running report; with ``batch_id`` it waits for a worker to claim it and check the batch's items."""
+        self.conn.execute("INSERT INTO reports (report_id, subject, standards, status, items_total, created, checker, "
+                          "batch_id, content_type) VALUES (?, ?, ?, 'running', ?, ?, ?, ?, ?)",
+                          (report_id, subject, json.dumps(list(standards)), items_total, time.time(), checker,
+                           batch_id, content_type))
+
+    @_serialized
+    def claim_report(self, worker: str, lease: float) -> Optional[Dict]:
+        """
+        Claim a running batch report nobody holds (or whose holder's lease
+        ran out) for ``worker``: its report_id, batch_id, content_type and
+        the job_id it has been checked through.
+        """
+        now = time.time()
+        row = self.conn.execute(
+            "UPDATE reports SET worker = ?, claimed_at = ? WHERE report_id = ("
+            " SELECT report_id FROM reports WHERE status = 'running' AND batch_id IS NOT NULL"
+            " AND (worker IS NULL OR claimed_at < ?) ORDER BY created LIMIT 1)"
+            " RETURNING report_id, batch_id, content_type, checked_through",
+            (worker, now, now - lease)).fetchone()
+        return dict(row) if row is not None else None
+
+    @_serialized
+    def add_findings(self, report_id: str, items_checked: int, items_failing: int,
+                     findings: Sequence[Tuple[str, str, str, str]], finished: bool = False,
+                     checked_through: int = 0, worker: Optional[str] = None) -> bool:
+        """
+        Append ``findings`` (item_id, rule_id, severity, message) for the
+        next ``items_checked`` items and fold them into the report's summary
+        counts, in one transaction. With ``worker``, only while that worker
+        holds the report: it records the job_id checked through and renews
+        the lease, or returns False and writes nothing.
+        """
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT findings_total, severity_counts, rule_counts FROM reports WHERE report_id = ? "
+                               "AND (? IS NULL OR worker = ?)", (report_id, worker, worker)).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return False
+            severity_counts, rule_counts = json.loads(row["severity_counts"]), json.loads(row["rule_counts"])
+            for _, rule_id, severity, _ in findings:
+                severity_counts[severity] = severity_counts.get(severity, 0) + 1
+                rule_counts[rule_id] = rule_counts.get(rule_id, 0) + 1
+            first = row["findings_total"]
+            conn.executemany("INSERT INTO findings (report_id, seq, item_id, rule_id, severity, message) "
+                             "VALUES (?, ?, ?, ?, ?, ?)",
+                             [(report_id, first + n, *finding) for n, finding in enumerate(findings, 1)])
+            now = time.time()
+            conn.execute("UPDATE reports SET items_checked = items_checked + ?, items_failing = items_failing + ?, "
+                         "findings_total = findings_total + ?, severity_counts = ?, rule_counts = ?, "
+                         "status = CASE WHEN ? THEN 'completed' ELSE status END, "
+                         "completed = CASE WHEN ? THEN ? ELSE completed END, "
+                         "checked_through = MAX(checked_through, ?), claimed_at = ? WHERE report_id = ?",
+                         (items_checked, items_failing, len(findings), json.dumps(severity_counts),
+                          json.dumps(rule_counts), finished, finished, now, checked_through, now, report_id))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return True
+
+    @_serialized
+    def fail_report(self, report_id: str):
+        self.conn.execute("UPDATE reports SET status = 'failed', completed = ? WHERE report_id = ?",
+                          (time.time(), report_id))
+
+    @_serialized
+    def report(self, report_id: str) -> Optional[Dict]:
+        row = self.conn.execute("SELECT * FROM reports WHERE report_id = ?", (report_id,)).fetchone()
+        if row is None:
+            return None
+        report = dict(row)
+        for column in ("standards", "severity_counts", "rule_counts"):
+            report[column] = json.loads(report[column])
+        return report
+
+    @_serialized
+    def findings(self, report_id: str, after_seq: int = 0, limit: int = 100, severity: Optional[str] = None,
+                 rule_id: Optional[str] = None) -> List[Dict]:
+        """A page of findings in order, keyset-paginated on ``seq``."""
+        sql = "SELECT seq, item_id, rule_id, severity, message FROM findings WHERE report_id = ? AND seq > ?"
+        params: list = [report_id, after_seq]
+        if severity:
+            sql += " AND severity = ?"
+            params.append(severity)
+        if rule_id:
+            sql += " AND rule_id = ?"
+            params.append(rule_id)
+        params.append(limit)
+        return [dict(r) for r in self.conn.execute(sql + " ORDER BY seq LIMIT ?", params)]
+
+    @_serialized
+    def job_counts(self) -> Dict[str, int]:
+        return {state: n for state, n in self.conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state")}
+
+    # Books
+    @staticmethod
+    def _bump_catalogue(conn: sqlite3.Connection) -> Tuple[int, float]:
+        now = time.time()
+        return tuple(conn.execute("UPDATE catalogue SET version = MAX(version + 1, ?), modified = ? "
+                                  "WHERE catalogue_id = 1 RETURNING version, modified",
+                                  (next_version(), now)).fetchone())
+
+    @_serialized
+    def seed_books(self, rows: Sequence[Sequence]):
+        """Create the catalogue with ``rows`` (id, title, author, description, rating, published_date), once."""
+        def seed(conn):
+            if conn.execute("SELECT 1 FROM catalogue").fetchone() is not None:
+                return
+            version, now = next_version(), time.time()
+            conn.executemany("INSERT INTO books (book_id, title, author, description, rating, published_date, "
+                             "version, modified) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             [(*row, version, now) for row in rows])
+            conn.execute("INSERT INTO catalogue (catalogue_id, version, modified, horizon) VALUES (1, ?, ?, ?)",
+                         (version, now, version))
+        self._transaction(seed)
+
+    @_serialized
+    def catalogue(self) -> Tuple[int, float]:
+        """(version, modified) of the book catalogue; it goes up on every change to any book."""
+        return tuple(self.conn.execute("SELECT version, modified FROM catalogue").fetchone())
+
+    @_serialized
+    def books(self, rating: Optional[int] = None, published_date: Optional[int] = None) -> List[Dict]:
+        sql, params = "SELECT book_id AS id, " + ", ".join(BOOK_COLUMNS) + " FROM books", []
+        if rating is not None:
+            sql, params = sql + " WHERE rating = ?", [rating]
+        elif published_date is not None:
+            sql, params = sql + " WHERE published_date = ?", [published_date]
+        return [dict(r) for r in self.conn.execute(sql + " ORDER BY book_id", params)]
+
+    @_serialized
+    def book(self, book_id: int) -> Optional[Dict]:
+        """A book with the (version, modified) of its last change."""
+        row = self.conn.execute("SELECT book_id AS id, " + ", ".join(BOOK_COLUMNS) + ", version, modified "
+                                "FROM books WHERE book_id = ?", (book_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    @_serialized
+    def book_delta(self, since: int) -> Dict:
+        """
+        The books changed and the IDs deleted after catalogue version
+        ``since``, read in one transaction. ``reset`` (with every book in
+        ``changed``) when ``since`` is older than the oldest tombstone kept
+        or newer than the catalogue.
+        """
+        conn = self.conn
+        conn.execute("BEGIN")
+        try:
+            version, horizon = conn.execute("SELECT version, horizon FROM catalogue").fetchone()
+            reset = since < horizon or since > version
+            changed = [dict(r) for r in conn.execute(
+                "SELECT book_id AS id, " + ", ".join(BOOK_COLUMNS) + " FROM books WHERE version > ? "
+                "ORDER BY book_id", (-1 if reset else since,))]
+            deleted = [] if reset else [r[0] for r in conn.execute(
+                "SELECT book_id FROM book_tombstones WHERE version > ? ORDER BY version", (since,))]
+        finally:
+            conn.execute("COMMIT")
+        return {"version": version, "reset": reset, "changed": changed, "deleted": deleted}
+
+    @_serialized
+    def add_book(self, book: Dict) -> int:
+        """Append ``book`` with the next ID after the highest one; returns that ID."""
+        def add(conn):
+            version, now = self._bump_catalogue(conn)
+            book_id = conn.execute("SELECT COALESCE(MAX(book_id), 0) + 1 FROM books").fetchone()[0]
+            conn.execute("INSERT INTO books (book_id, " + ", ".join(BOOK_COLUMNS) + ", version, modified) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                         (book_id, *(book[c] for c in BOOK_COLUMNS), version, now))
+            conn.execute("DELETE FROM book_tombstones WHERE book_id = ?", (book_id,))
+            return book_id
+        return self._transaction(add)
+
+    @_serialized
+    def update_book(self, book_id: int, book: Dict) -> bool:
+        """Replace a book's fields; False if there is no such book."""
+        def update(conn):
+            if conn.execute("SELECT 1 FROM books WHERE book_id = ?", (book_id,)).fetchone() is None:
+                return False
+            version, now = self._bump_catalogue(conn)
+            conn.execute("UPDATE books SET " + ", ".join(f"{c} = ?" for c in BOOK_COLUMNS) + ", version = ?, "
+                         "modified = ? WHERE book_id = ?", (*(book[c] for c in BOOK_COLUMNS), version, now, book_id))
+            return True
+        return self._transaction(update)
+
+    @_serialized
+    def delete_book(self, book_id: int, max_tombstones: int) -> bool:
+        """
+        Delete a book, leaving a tombstone for deltas; past ``max_tombstones``
+        the oldest are dropped and the catalogue's horizon moves up to them.
+        False if there is no such book.
+        """
+        def delete(conn):
+            if not conn.execute("DELETE FROM books WHERE book_id = ? RETURNING book_id", (book_id,)).fetchall():
+                return False
+            version, now = self._bump_catalogue(conn)
+            conn.execute("INSERT OR REPLACE INTO book_tombstones (book_id, version, modified) VALUES (?, ?, ?)",
+                         (book_id, version, now))
+            dropped = conn.execute("DELETE FROM book_tombstones WHERE book_id IN (SELECT book_id FROM book_tombstones "
+                                   "ORDER BY version DESC LIMIT -1 OFFSET ?) RETURNING version",
+                                   (max_tombstones,)).fetchall()
+            if dropped:
+                conn.execute("UPDATE catalogue SET horizon = MAX(horizon, ?)", (max(r[0] for r in dropped),))
+            return True
+        return self._transaction(delete)
+
+    # Feedback ratings
+    @staticmethod
+    def _count_ratings(conn: sqlite3.Connection, ratings: Iterable[Tuple[str, int]]):
+        conn.executemany("INSERT INTO ratings (content_id, rating, count) VALUES (?, ?, ?) "
+                         "ON CONFLICT (content_id, rating) DO UPDATE SET count = count + excluded.count",
+                         [(content_id, rating, n)
+                          for (content_id, rating), n in collections.Counter(ratings).items()])
+
+    @_serialized
+    def add_ratings(self, ratings: Iterable[Tuple[str, int]]):
+        """Count (content_id, rating) pairs into the per-content histograms."""
+        self._transaction(lambda conn: self._count_ratings(conn, ratings))
+
+    @_serialized
+    def seed_ratings(self, load: Callable[[], Iterable[Tuple[str, int]]]) -> bool:
+        """
+        Count ``load()`` into the histograms unless this database has been
+        seeded before; True if it was seeded now. Workers starting together
+        seed it exactly once.
+        """
+        def seed(conn):
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'ratings_seeded'").fetchone() is not None:
+                return False
+            self._count_ratings(conn, load())
+            conn.execute("INSERT INTO meta (key, value) VALUES ('ratings_seeded', ?)", (str(time.time()),))
+            return True
+        return self._transaction(seed)
+
+    @_serialized
+    def rating_histogram(self, content_id: str) -> Dict[int, int]:
+        return {rating: n for rating, n in self.conn.execute(
+            "SELECT rating, count FROM ratings WHERE content_id = ? ORDER BY rating", (content_id,))}
+
+
+    # Idempotency keys
+    @_serialized
+    def begin_idempotent(self, key: Tuple[str, str, str, str], fingerprint: str, owner: str, ttl: float,
+                         lease: float, max_keys: int) -> Tuple[Optional[Dict], Optional[int], int]:
+        """
+        Start the call for ``key`` (client, method, path, Idempotency-Key)
+        as ``owner`` unless a live entry holds it. Returns that entry
+        (fingerprint, status, headers, body, claimed_at; status None while
+        it runs), or None if ``owner`` now holds the key together with the
+        number of keys stored and how many the ``max_keys`` bound evicted.
+        An expired entry, or a running one not finished within ``lease``
+        (its worker died), is replaced.
+        """
+        def begin(conn):
+            now = time.time()
+            conn.execute(f"DELETE FROM idempotency_keys WHERE {_IDEMPOTENCY_KEY} "
+                         "AND (expires <= ? OR (status IS NULL AND claimed_at < ?))", (*key, now, now - lease))
+            row = conn.execute("SELECT fingerprint, status, headers, body, claimed_at FROM idempotency_keys "
+                               f"WHERE {_IDEMPOTENCY_KEY}", key).fetchone()
+            if row is not None:
+                return dict(row), None, 0
+            conn.execute("INSERT INTO idempotency_keys (client, method, path, key, fingerprint, owner, claimed_at, "
+                         "expires) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (*key, fingerprint, owner, now, now + ttl))
+            conn.execute("DELETE FROM idempotency_keys WHERE expires <= ?", (now,))
+            keys = conn.execute("SELECT COUNT(*) FROM idempotency_keys").fetchone()[0]
+            evicted = 0
+            if keys > max_keys:
+                evicted = len(conn.execute(
+                    "DELETE FROM idempotency_keys WHERE (client, method, path, key) IN ("
+                    " SELECT client, method, path, key FROM idempotency_keys ORDER BY expires LIMIT ?) RETURNING 1",
+                    (keys - max_keys,)).fetchall())
+            return None, keys - evicted, evicted
+        return self._transaction(begin)
+
+    @_serialized
+    def finish_idempotent(self, key: Tuple[str, str, str, str], owner: str, status: Optional[int] = None,
+                          headers: Sequence[Tuple[str, str]] = (), body: bytes = b""):
+        """
+        Store the response of ``owner``'s call for ``key``; with no status,
+        drop the entry so that a retry runs the call again.
+        """
+        if status is None:
+            self.conn.execute(f"DELETE FROM idempotency_keys WHERE {_IDEMPOTENCY_KEY} AND owner = ? "
+                              "AND status IS NULL", (*key, owner))
+        else:
+            self.conn.execute(f"UPDATE idempotency_keys SET status = ?, headers = ?, body = ? "
+                              f"WHERE {_IDEMPOTENCY_KEY} AND owner = ?",
+                              (status, json.dumps(list(headers)), body, *key, owner))
+
+    @_serialized
+    def idempotent_entry(self, key: Tuple[str, str, str, str]) -> Optional[Dict]:
+        row = self.conn.execute("SELECT fingerprint, status, headers, body, claimed_at FROM idempotency_keys "
+                                f"WHERE {_IDEMPOTENCY_KEY} AND expires > ?", (*key, time.time())).fetchone()
+        return dict(row) if row is not None else None
+
+
+state = StateStore()
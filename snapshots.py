@@ -0,0 +1,316 @@
+"""
+Periodic point-in-time snapshots of in-process state, restored at startup.
+
+With ``AI_DAE_STATE_DB=:memory:`` the content, archive batch, job, report,
+book and rating tables live in process memory, as do the alt-text and
+result caches in every mode, and all of it is lost on restart. With
+``AI_DAE_SNAPSHOT_PATH`` set the app writes that state to one file every
+``AI_DAE_SNAPSHOT_INTERVAL`` seconds and on shutdown, and loads it back
+before serving.
+
+* Copy-on-write: a forked child writes the snapshot from its copy of the
+  process as it was at the fork. The server pauses only for the fork and
+  keeps handling requests while the child writes. Without ``os.fork`` the
+  snapshot is written inline.
+* Fork after threads: the server has other threads (``asyncio.to_thread``
+  workers, the model loader), and the child gets only the forking thread.
+  Any lock another thread held at the fork - logging's handler locks, a
+  store's connection lock, SQLite's own mutexes - stays held forever in
+  the child. So the child only serializes the sections and writes them to
+  a file descriptor the parent opened, then leaves with ``os._exit``; it
+  never logs, prints a traceback or runs cleanup, and reports failure
+  through its exit status (1 serializing, 2 writing). ``dump`` functions
+  must not take locks other threads use. A section whose state is guarded
+  by a lock names it, and the parent holds it across the fork so the child
+  never sees that state mid-update. The parent fsyncs, renames and logs.
+* Format: a magic number, then sections of ``name, length, payload``. The
+  database is stored as its SQLite image, so tables and indexes come back
+  without re-inserting a row. Other state is stored as columnar tables:
+  packed 8-byte number columns, and per string column one UTF-8 blob plus
+  offsets.
+* Restore memory-maps the file and hands each section a memoryview over its
+  payload. Sections the running app does not have are skipped.
+* The file is written under a temporary name, fsynced and renamed, so a
+  crash mid-write leaves the previous snapshot in place.
+
+A snapshot belongs to one process. With several workers, use the
+file-backed database instead.
+"""
+import asyncio
+import contextlib
+import itertools
+import logging
+import mmap
+import os
+import struct
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, List, Optional, Sequence
+
+DEFAULT_PATH = os.environ.get("AI_DAE_SNAPSHOT_PATH", "")
+DEFAULT_INTERVAL = float(os.environ.get("AI_DAE_SNAPSHOT_INTERVAL", "300"))
+MAGIC = b"AIDAESN\x01"
+
+logger = logging.getLogger("aidae.snapshots")
+
+
+@dataclass
+class Section:
+    name: str
+    dump: Callable[[], Optional[bytes]]  # None leaves the section out of this snapshot
+    load: Callable[[memoryview], None]
+    lock: Any = None  # held by the parent across the fork, so the child's copy is not mid-update
+
+
+# Columnar tables
+def pack_table(types: str, rows: Sequence[Sequence]) -> bytes:
+    """
+    ``rows`` as columns; ``types`` has one code per column: ``q`` int64,
+    ``Q`` uint64, ``d`` float64 or ``s`` str.
+    """
+    columns = list(zip(*rows)) if rows else [()] * len(types)
+    parts = [struct.pack("<Q", len(rows))]
+    for code, values in zip(types, columns):
+        if code == "s":
+            encoded = [value.encode() for value in values]
+            blob = b"".join(encoded)
+            parts += [array("Q", itertools.accumulate(map(len, encoded), initial=0)).tobytes(),
+                      struct.pack("<Q", len(blob)), blob]
+        else:
+            parts.append(array(code, values).tobytes())
+    return b"".join(parts)
+
+
+def unpack_table(types: str, view: memoryview) -> List[tuple]:
+    (count,) = struct.unpack_from("<Q", view, 0)
+    pos = 8
+    columns = []
+    for code in types:
+        if code == "s":
+            offsets = array("Q")
+            offsets.frombytes(view[pos:pos + 8 * (count + 1)])
+            pos += 8 * (count + 1)
+            (size,) = struct.unpack_from("<Q", view, pos)
+            blob = bytes(view[pos + 8:pos + 8 + size])
+            pos += 8 + size
+            columns.append([blob[start:end].decode() for start, end in zip(offsets, offsets[1:])])
+        else:
+            values = array(code)
+            values.frombytes(view[pos:pos + 8 * count])
+            pos += 8 * count
+            columns.append(values.tolist())
+    return list(zip(*columns)) if count else []
+
+
+# Files
+WRITE_FAILED = 2  # exit status of a snapshot child that could not write (OSError); 1 for any other failure
+
+
+def _write_all(fd: int, data) -> None:
+    with memoryview(data) as view:
+        while view:
+            view = view[os.write(fd, view):]
+
+
+def write_to(fd: int, sections: Sequence[Section]) -> None:
+    """Serialize ``sections`` onto the file descriptor ``fd``."""
+    _write_all(fd, MAGIC)
+    for section in sections:
+        payload = section.dump()
+        if payload is None:
+            continue
+        name = section.name.encode()
+        _write_all(fd, struct.pack("<B", len(name)) + name + struct.pack("<Q", len(payload)))
+        _write_all(fd, payload)
+
+
+def _install(fd: int, tmp: str, path: str) -> int:
+    """fsync and close ``fd``, then rename ``tmp`` over ``path``; returns the snapshot's size."""
+    try:
+        os.fsync(fd)
+        size = os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+    os.replace(tmp, path)
+    return size
+
+
+def _discard(fd: int, tmp: str):
+    os.close(fd)
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(tmp)
+
+
+def write(path: str, sections: Sequence[Section]) -> int:
+    """Write a snapshot of ``sections`` to ``path``, replacing it atomically; returns its size."""
+    tmp = f"{path}.tmp-{os.getpid()}"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        write_to(fd, sections)
+    except BaseException:
+        _discard(fd, tmp)
+        raise
+    return _install(fd, tmp, path)
+
+
+def read(path: str, sections: Sequence[Section]) -> List[str]:
+    """
+    Load the sections of the snapshot at ``path`` into ``sections``; returns
+    the names loaded. The whole file is checked before any section is
+    loaded, so a truncated snapshot raises ValueError and changes nothing.
+    """
+    by_name = {section.name: section for section in sections}
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a snapshot")
+        parts, pos = [], len(MAGIC)
+        while pos < len(mm):
+            (size,) = struct.unpack_from("<B", mm, pos)
+            name = mm[pos + 1:pos + 1 + size].decode()
+            (length,) = struct.unpack_from("<Q", mm, pos + 1 + size)
+            pos += 9 + size
+            if pos + length > len(mm):
+                raise ValueError(f"{path} is truncated in section {name!r}")
+            parts.append((name, pos, length))
+            pos += length
+        loaded = []
+        with memoryview(mm) as view:
+            for name, start, length in parts:
+                if name in by_name:
+                    with view[start:start + length] as payload:
+                        by_name[name].load(payload)
+                    loaded.append(name)
+        return loaded
+
+
+# Scheduling
+class Snapshotter:
+    def __init__(self, sections: Sequence[Section], path: str = DEFAULT_PATH, interval: float = DEFAULT_INTERVAL):
+        self.sections = list(sections)
+        self.path = path
+        self.interval = interval
+        self.results = {"ok": 0, "failed": 0}
+        self.last_pause_seconds = 0.0
+        self.last_seconds = 0.0
+        self.last_bytes = 0
+        self.last_success: Optional[float] = None
+        self.restore_seconds = 0.0
+        self._taking = False
+
+    def restore(self) -> List[str]:
+        """Load the snapshot at ``path`` if there is one; a bad snapshot is logged and skipped."""
+        if not self.path or not os.path.exists(self.path):
+            return []
+        start = time.perf_counter()
+        try:
+            loaded = read(self.path, self.sections)
+        except (OSError, ValueError):
+            logger.exception("snapshot %s could not be restored; starting without it", self.path)
+            return []
+        self.restore_seconds = time.perf_counter() - start
+        logger.info("restored %s from %s in %.2fs", ", ".join(loaded) or "nothing", self.path, self.restore_seconds)
+        return loaded
+
+    async def take(self) -> bool:
+        """Write a snapshot; the event loop waits only for the fork. One runs at a time."""
+        if not self.path or self._taking:
+            return False
+        self._taking = True
+        start = time.perf_counter()
+        try:
+            if hasattr(os, "fork"):
+                ok = await self._take_forked(start)
+            else:
+                write(self.path, self.sections)
+                self.last_pause_seconds = time.perf_counter() - start
+                ok = True
+        except Exception:
+            logger.exception("snapshot to %s failed", self.path)
+            ok = False
+        finally:
+            self._taking = False
+        self.results["ok" if ok else "failed"] += 1
+        if ok:
+            self.last_seconds = time.perf_counter() - start
+            self.last_bytes = os.path.getsize(self.path)
+            self.last_success = time.time()
+            logger.info("snapshot of %d bytes written to %s in %.2fs (paused %.1f ms)", self.last_bytes, self.path,
+                        self.last_seconds, self.last_pause_seconds * 1e3)
+        else:
+            logger.error("snapshot to %s failed; the previous snapshot is kept", self.path)
+        return ok
+
+    async def _take_forked(self, start: float) -> bool:
+        tmp = f"{self.path}.tmp-{os.getpid()}"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            locks = [section.lock for section in self.sections if section.lock is not None]
+            with contextlib.ExitStack() as held:
+                for lock in locks:
+                    held.enter_context(lock)
+                pid = os.fork()
+                if pid == 0:
+                    self._write_in_child(fd)
+            self.last_pause_seconds = time.perf_counter() - start
+            _, status = await asyncio.to_thread(os.waitpid, pid, 0)
+            code = os.waitstatus_to_exitcode(status)
+            if code != 0:
+                reason = "could not write it" if code == WRITE_FAILED else f"exited with status {code}"
+                logger.error("snapshot child for %s %s", self.path, reason)
+                _discard(fd, tmp)
+                return False
+        except BaseException:
+            _discard(fd, tmp)
+            raise
+        await asyncio.to_thread(_install, fd, tmp, self.path)
+        return True
+
+    def _write_in_child(self, fd: int):
+        # Forked child: only this thread exists, and locks other threads held at the fork stay held. Serialize,
+        # write to the parent's fd and leave; no logging, tracebacks or cleanup (atexit handlers, buffered output).
+        code = 1
+        try:
+            write_to(fd, self.sections)
+            code = 0
+        except OSError:
+            code = WRITE_FAILED
+        except BaseException:
+            pass
+        finally:
+            os._exit(code)
+
+    async def _periodic(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.take()
+
+    @contextlib.asynccontextmanager
+    async def running(self) -> AsyncIterator["Snapshotter"]:
+        """Restore, snapshot every ``interval`` seconds while the app runs, and once more on shutdown."""
+        if not self.path:
+            yield self
+            return
+        self.restore()
+        periodic = asyncio.ensure_future(self._periodic()) if self.interval > 0 else None
+        try:
+            yield self
+        finally:
+            if periodic is not None:
+                periodic.cancel()
+            await self.take()
+
+    def metric_samples(self):
+        return [
+            ("aidae_snapshots_total", "counter", "State snapshots written, by result.",
+             [({"result": result}, n) for result, n in self.results.items()]),
+            ("aidae_snapshot_pause_seconds", "gauge", "Time request handling paused for the last snapshot.",
+             [({}, self.last_pause_seconds)]),
+            ("aidae_snapshot_seconds", "gauge", "Time to write the last successful snapshot.",
+             [({}, self.last_seconds)]),
+            ("aidae_snapshot_bytes", "gauge", "Size of the last successful snapshot.", [({}, self.last_bytes)]),
+            ("aidae_snapshot_last_success_timestamp_seconds", "gauge", "When the last successful snapshot was written.",
+             [({}, self.last_success or 0)]),
+            ("aidae_snapshot_restore_seconds", "gauge", "Time to restore state from the snapshot at startup.",
+             [({}, self.restore_seconds)]),
+        ]
@@ -0,0 +1,459 @@
+"""
+Fetching remote inputs (``source_url``, ``video_file_url``, ``audio_file_url``,
+archive sources) into the artifact store.
+
+* Pooling: every fetch shares one ``httpx.AsyncClient`` with keep-alive
+  connections, capped at ``max_connections`` in total and at
+  ``max_per_host`` concurrent downloads per origin, so one slow archive
+  cannot take every connection.
+* Streaming: response bodies are written to a spool file next to the store
+  as they arrive, hashed on the way, then moved into place under their
+  content hash. A download never sits in memory, and identical media from
+  two URLs is stored once.
+* Resuming: a connection that drops mid-body, or a 5xx/429, is retried with
+  backoff. The retry asks only for the missing bytes (``Range`` plus
+  ``If-Range`` with the validator of the first response) and starts over
+  if the origin sends the whole file instead. A fetch that gives up keeps
+  its spool file, and the next fetch of the URL resumes it, in this process
+  or the next one.
+* Validator cache: per URL, the artifact it produced and its ``ETag`` /
+  ``Last-Modified``. Within the response's ``max-age`` the artifact is used
+  without a request. After that the fetch is conditional, and a 304 reuses
+  it. Concurrent fetches of one URL share a single download.
+
+With ``AI_DAE_FETCH_SOURCES=1`` every remote input goes through
+``local_source(url)`` (content ingest, the enhancement endpoints' video and
+audio URLs, archive sources), which fetches it and returns the stored
+file's path for the decoder or listing to read. It is off by default: the
+decoders are still placeholders that never read the bytes, and the mock
+API's example URLs would otherwise have to resolve.
+"""
+import asyncio
+import collections
+import email.utils
+import hashlib
+import mimetypes
+import os
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, OrderedDict
+from urllib.parse import urlsplit
+
+import httpx
+
+import snapshots
+from artifact_store import ArtifactStore, store
+
+try:
+    import fcntl
+except ImportError:  # no advisory locks: spool files are private to each fetch
+    fcntl = None
+
+DEFAULT_MAX_CONNECTIONS = int(os.environ.get("AI_DAE_FETCH_MAX_CONNECTIONS", "64"))
+DEFAULT_MAX_PER_HOST = int(os.environ.get("AI_DAE_FETCH_MAX_PER_HOST", "6"))
+DEFAULT_MAX_BYTES = int(os.environ.get("AI_DAE_FETCH_MAX_BYTES", str(4 << 30)))
+DEFAULT_CACHE_ENTRIES = int(os.environ.get("AI_DAE_FETCH_CACHE_ENTRIES", "10000"))
+FETCH_SOURCES = os.environ.get("AI_DAE_FETCH_SOURCES", "0") == "1"
+CHUNK_SIZE = 256 * 1024
+RETRYABLE_STATUS = frozenset((408, 425, 429, 500, 502, 503, 504))
+USER_AGENT = "AI-DAE-Fetcher/1.0"
+_EXTENSION = re.compile(r"^\.[a-z0-9]{1,8}$")
+_CONTENT_RANGE = re.compile(r"^bytes (\d+)-\d+/(\d+|\*)$")
+
+
+class FetchError(Exception):
+    """The source could not be fetched: a non-retryable answer, too large, or out of attempts."""
+
+    def __init__(self, url: str, reason: str, status: Optional[int] = None):
+        super().__init__(f"{url}: {reason}")
+        self.url = url
+        self.status = status
+
+
+@dataclass
+class Fetched:
+    url: str
+    artifact_id: str
+    size: int
+    content_type: str
+    source: str  # "network", "resumed", "revalidated", "fresh"
+
+
+@dataclass
+class CacheEntry:
+    artifact_id: str
+    size: int
+    content_type: str
+    etag: str  # "" when the origin sent none
+    last_modified: str
+    fresh_until: float  # unix time; revalidate after
+
+
+def _max_age(response: httpx.Response) -> Optional[float]:
+    """Seconds the response may be reused without revalidating; None if it must not be cached."""
+    directives = {}
+    for part in response.headers.get("cache-control", "").lower().split(","):
+        name, _, value = part.strip().partition("=")
+        directives[name] = value.strip('"')
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    try:
+        return max(0.0, float(directives["max-age"]))
+    except (KeyError, ValueError):
+        return 0.0
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def extension_for(url: str, content_type: str) -> str:
+    """The artifact extension: the URL's, else one for the content type, else ``.bin``."""
+    extension = os.path.splitext(urlsplit(url).path)[1].lower()
+    if _EXTENSION.match(extension):
+        return extension
+    extension = mimetypes.guess_extension(content_type.split(";", 1)[0].strip()) or ""
+    return extension if _EXTENSION.match(extension) else ".bin"
+
+
+# Spooling
+class Spool:
+    """
+    A partial download: the file under the store's spool directory, the
+    SHA-256 of the bytes in it so far, and the validator that must still
+    match for a Range request to continue it (kept in a ``.validator`` file
+    beside it, so a later process can resume too).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.shared = True
+        self.file = open(path, "a+b")
+        if fcntl is not None:
+            try:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:  # another worker process is fetching this URL: download privately
+                self.file.close()
+                self.path = f"{path}-{os.getpid()}-{id(self):x}"
+                self.shared = False
+                self.file = open(self.path, "a+b")
+        self.digest = hashlib.sha256()
+        self.offset = 0
+        self.validator = ""
+        try:
+            with open(self.path + ".validator") as f:
+                self.validator = f.read()
+        except OSError:
+            pass
+        if self.validator:
+            self.file.seek(0)
+            for block in iter(lambda: self.file.read(1 << 20), b""):
+                self.digest.update(block)
+                self.offset += len(block)
+        else:
+            self.file.truncate(0)
+
+    def restart(self, validator: str):
+        self.file.truncate(0)
+        self.digest = hashlib.sha256()
+        self.offset = 0
+        self.validator = validator
+        with open(self.path + ".validator", "w") as f:
+            f.write(validator)
+
+    def write(self, block: bytes):
+        self.file.write(block)  # append mode: always at the end
+        self.digest.update(block)
+        self.offset += len(block)
+
+    def finish(self, artifacts: ArtifactStore, extension: str) -> str:
+        self.file.flush()
+        if artifacts.fsync:
+            os.fsync(self.file.fileno())
+        artifact_id = artifacts.adopt(self.path, self.digest.hexdigest(), self.offset, extension)
+        self.discard()
+        return artifact_id
+
+    def discard(self):
+        self.file.close()
+        for path in (self.path, self.path + ".validator"):
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def close(self):
+        """Keep the partial file for a later fetch to resume, if it can be resumed."""
+        if self.file.closed:
+            return
+        if self.shared and self.validator and self.offset:
+            self.file.close()
+        else:
+            self.discard()
+
+
+class _Retry(Exception):
+    def __init__(self, reason: str, retry_after: Optional[float] = None):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+# Fetching
+class SourceFetcher:
+    def __init__(self, artifacts: ArtifactStore = store, max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_per_host: int = DEFAULT_MAX_PER_HOST, max_bytes: int = DEFAULT_MAX_BYTES,
+                 cache_entries: int = DEFAULT_CACHE_ENTRIES, max_attempts: int = 6, base_backoff: float = 0.5,
+                 max_backoff: float = 30.0, timeout: float = 30.0,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.artifacts = artifacts
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.max_bytes = max_bytes
+        self.cache_entries = cache_entries
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.transport = transport
+        self.cache: OrderedDict[str, CacheEntry] = collections.OrderedDict()
+        self.counts = dict.fromkeys(("network", "resumed", "revalidated", "fresh", "joined", "failed"), 0)
+        self.retries = 0
+        self.bytes_received = 0
+        self.active = 0
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # A new event loop (e.g. a test client's): the old client, slots and downloads belong to the old one.
+            self._close_client()
+            self._loop = loop
+            self._hosts = {}
+            self._inflight = {}
+            self._client = httpx.AsyncClient(
+                transport=self.transport, timeout=self.timeout, follow_redirects=True,
+                headers={"user-agent": USER_AGENT, "accept-encoding": "identity"},
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections))
+
+    def _close_client(self):
+        """Stop the downloads and close the client on the loop they belong to, if it is still open."""
+        client, loop = self._client, self._loop
+        self._client = self._loop = None
+        if loop is None or loop.is_closed():
+            return
+        for task in self._inflight.values():
+            loop.call_soon_threadsafe(task.cancel)
+        if client is not None and not client.is_closed:
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+    async def fetch(self, url: str) -> Fetched:
+        """
+        ``url`` as a stored artifact, downloaded, resumed, revalidated or
+        straight from the validator cache. ValueError for a URL that is not
+        http(s); FetchError if it cannot be fetched.
+        """
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.netloc:
+            raise ValueError(f"Not an http(s) URL: {url!r}")
+        self._bind_loop()
+        task = self._inflight.get(url)
+        if task is None:
+            task = self._inflight[url] = asyncio.get_running_loop().create_task(self._fetch(url, parts.netloc))
+            task.add_done_callback(lambda done: self._inflight.pop(url, None)
+                                   if self._inflight.get(url) is done else None)
+        else:
+            self.counts["joined"] += 1
+        return await asyncio.shield(task)
+
+    def _cached(self, url: str) -> Optional[CacheEntry]:
+        entry = self.cache.get(url)
+        if entry is not None and not self.artifacts.exists(entry.artifact_id):
+            del self.cache[url]  # the artifact was cleaned up: fetch it again
+            return None
+        return entry
+
+    def _remember(self, url: str, entry: Optional[CacheEntry]):
+        if entry is None:
+            self.cache.pop(url, None)
+            return
+        self.cache[url] = entry
+        self.cache.move_to_end(url)
+        while len(self.cache) > self.cache_entries:
+            self.cache.popitem(last=False)
+
+    async def _fetch(self, url: str, host: str) -> Fetched:
+        entry = self._cached(url)
+        if entry is not None and time.time() < entry.fresh_until:
+            self.cache.move_to_end(url)
+            self.counts["fresh"] += 1
+            return Fetched(url, entry.artifact_id, entry.size, entry.content_type, "fresh")
+        slot = self._hosts.get(host)
+        if slot is None:
+            slot = self._hosts[host] = asyncio.Semaphore(self.max_per_host)
+        async with slot:
+            self.active += 1
+            try:
+                return await self._download(url, entry)
+            except FetchError:
+                self.counts["failed"] += 1
+                raise
+            finally:
+                self.active -= 1
+
+    async def _download(self, url: str, entry: Optional[CacheEntry]) -> Fetched:
+        name = hashlib.sha256(url.encode()).hexdigest()[:32]
+        spool = await asyncio.to_thread(Spool, os.path.join(self.artifacts.temp_dir, f"fetch-{name}.part"))
+        resumed = False
+        try:
+            for attempt in range(1, self.max_attempts + 1):
+                try:
+                    result = await self._attempt(url, entry, spool)
+                except _Retry as retry:
+                    if attempt == self.max_attempts:
+                        raise FetchError(url, f"gave up after {attempt} attempts: {retry}")
+                    self.retries += 1
+                    delay = random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** (attempt - 1)))
+                    await asyncio.sleep(max(delay, min(retry.retry_after or 0.0, self.max_backoff)))
+                    resumed = resumed or spool.offset > 0
+                    continue
+                if isinstance(result, Fetched):
+                    return result
+                response = result
+                content_type = response.headers.get("content-type", "application/octet-stream")
+                artifact_id = await asyncio.to_thread(spool.finish, self.artifacts,
+                                                      extension_for(url, content_type))
+                max_age = _max_age(response)
+                self._remember(url, None if max_age is None else CacheEntry(
+                    artifact_id, spool.offset, content_type, response.headers.get("etag", ""),
+                    response.headers.get("last-modified", ""), time.time() + max_age))
+                source = "resumed" if resumed or response.status_code == 206 else "network"
+                self.counts[source] += 1
+                return Fetched(url, artifact_id, spool.offset, content_type, source)
+        finally:
+            await asyncio.to_thread(spool.close)
+
+    async def _attempt(self, url: str, entry: Optional[CacheEntry], spool: Spool):
+        """
+        One request. Returns a Fetched for a 304, or the response once its
+        whole body is in ``spool``; raises _Retry or FetchError.
+        """
+        headers = {}
+        if spool.offset and spool.validator:
+            headers["range"] = f"bytes={spool.offset}-"
+            headers["if-range"] = spool.validator
+        elif entry is not None:
+            if entry.etag:
+                headers["if-none-match"] = entry.etag
+            if entry.last_modified:
+                headers["if-modified-since"] = entry.last_modified
+        pending = bytearray()
+        try:
+            async with self._client.stream("GET", url, headers=headers) as response:
+                status = response.status_code
+                if status == 304 and entry is not None and "range" not in headers:
+                    max_age = _max_age(response)
+                    entry.fresh_until = time.time() + (max_age or 0.0)
+                    entry.etag = response.headers.get("etag", entry.etag)
+                    entry.last_modified = response.headers.get("last-modified", entry.last_modified)
+                    self._remember(url, entry if max_age is not None else None)
+                    self.counts["revalidated"] += 1
+                    return Fetched(url, entry.artifact_id, entry.size, entry.content_type, "revalidated")
+                if status in RETRYABLE_STATUS:
+                    raise _Retry(f"HTTP {status}", _retry_after(response))
+                if status == 416:
+                    await asyncio.to_thread(spool.restart, "")  # stale partial file: start over
+                    raise _Retry("HTTP 416")
+                match = _CONTENT_RANGE.match(response.headers.get("content-range", "")) if status == 206 else None
+                if match is not None and spool.offset and int(match.group(1)) == spool.offset:
+                    total = None if match.group(2) == "*" else int(match.group(2))
+                elif status == 200:
+                    etag = response.headers.get("etag", "")
+                    validator = "" if etag.startswith("W/") else etag or response.headers.get("last-modified", "")
+                    await asyncio.to_thread(spool.restart, validator)
+                    length = response.headers.get("content-length")
+                    total = int(length) if length and length.isdigit() else None
+                else:
+                    raise FetchError(url, f"unexpected HTTP {status}", status)
+                if total is not None and total > self.max_bytes:
+                    raise FetchError(url, f"{total} bytes is over the {self.max_bytes}-byte limit", status)
+                async for block in response.aiter_raw():
+                    if spool.offset + len(pending) + len(block) > self.max_bytes:
+                        raise FetchError(url, f"over the {self.max_bytes}-byte limit", status)
+                    pending += block
+                    if len(pending) >= CHUNK_SIZE:
+                        await self._spool(spool, pending)
+        except httpx.HTTPError as exc:  # connection refused or reset, timeout, body cut short
+            await self._spool(spool, pending)  # keep what arrived, so the retry asks only for the rest
+            raise _Retry(f"{type(exc).__name__}: {exc}")
+        await self._spool(spool, pending)
+        if total is not None and spool.offset != total:
+            raise _Retry(f"body ended at {spool.offset} of {total} bytes")
+        return response
+
+    async def _spool(self, spool: Spool, pending: bytearray):
+        """Write the buffered body bytes to ``spool`` off the loop and empty the buffer."""
+        if pending:
+            await asyncio.to_thread(spool.write, bytes(pending))
+            self.bytes_received += len(pending)
+            pending.clear()
+
+    # Snapshots
+    def dump(self) -> bytes:
+        return snapshots.pack_table("sssssqd", [
+            (url, e.artifact_id, e.content_type, e.etag, e.last_modified, e.size, e.fresh_until)
+            for url, e in self.cache.items()])
+
+    def load(self, payload: memoryview):
+        for url, artifact_id, content_type, etag, last_modified, size, fresh_until in \
+                snapshots.unpack_table("sssssqd", payload):
+            self.cache[url] = CacheEntry(artifact_id, size, content_type, etag, last_modified, fresh_until)
+
+    async def aclose(self):
+        for task in list(self._inflight.values()):
+            task.cancel()
+        client, self._client, self._loop = self._client, None, None
+        if client is not None:
+            await client.aclose()
+
+
+fetcher = SourceFetcher()
+snapshot_section = snapshots.Section("fetch_validators", fetcher.dump, fetcher.load)
+
+
+async def local_source(url: str) -> str:
+    """
+    Where to read the input ``url`` from: the artifact store path of its
+    fetched copy, or ``url`` itself while fetching is off or when it is not
+    an http(s) URL. FetchError if it cannot be fetched.
+    """
+    if not FETCH_SOURCES or urlsplit(url).scheme not in ("http", "https"):
+        return url
+    fetched = await fetcher.fetch(url)
+    return fetcher.artifacts.path(fetched.artifact_id)
+
+
+def metric_samples():
+    return [
+        ("aidae_fetches_total", "counter", "Source fetches, by how they were answered.",
+         [({"source": source}, n) for source, n in fetcher.counts.items()]),
+        ("aidae_fetch_retries_total", "counter", "Source fetch requests retried or resumed after a failure.",
+         [({}, fetcher.retries)]),
+        ("aidae_fetch_bytes_total", "counter", "Source bytes downloaded.", [({}, fetcher.bytes_received)]),
+        ("aidae_fetches_active", "gauge", "Source downloads in progress.", [({}, fetcher.active)]),
+        ("aidae_fetch_cache_entries", "gauge", "URLs in the validator cache.", [({}, len(fetcher.cache))]),
+    ]
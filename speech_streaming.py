@@ -0,0 +1,220 @@
+"""
+Chunked text-to-speech streamed back as it is synthesized.
+
+Whole-document synthesis makes a client wait for the last sentence of a
+chapter before it hears the first. Instead the text is split into chunks
+at paragraph and sentence boundaries. Each chunk is synthesized as its own
+job on the shared ``job_scheduler`` pool, ``lookahead`` chunks ahead of
+playback. The audio is streamed back in order as a single WAV, so
+playback starts once the first chunk is ready.
+
+* Segmentation knows each language's sentence punctuation and
+  abbreviations (``Dr.``, ``p. ej.``, ``Mme.``; French spaces before ``!``
+  and ``?``; Spanish ``¿``/``¡``). The first chunk is a single sentence so
+  it comes back fast. Later chunks pack whole sentences of one paragraph up
+  to ``max_chars``, and over-long sentences are broken at clause
+  punctuation, then at spaces.
+* Every chunk is stored in the artifact store and keyed in the enhancement
+  result cache by (text, language, voice). A chunk heard before, in any
+  document, is not synthesized again, and concurrent streams share
+  in-flight chunks.
+"""
+import asyncio
+import collections
+import os
+import re
+import time
+from typing import AsyncIterator, Callable, Deque, List, Tuple
+
+import coalescing
+import job_scheduler
+import model_registry
+import placeholder_artifacts
+from artifact_store import store
+
+DEFAULT_MAX_CHARS = int(os.environ.get("AI_DAE_TTS_CHUNK_CHARS", "400"))
+DEFAULT_LOOKAHEAD = int(os.environ.get("AI_DAE_TTS_STREAM_LOOKAHEAD", "4"))
+READ_SIZE = 64 * 1024
+
+# Words ending in "." that do not end a sentence, by language (lower case, without the final ".").
+ABBREVIATIONS = {
+    "en": {"mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e", "fig", "no", "vol",
+           "ch", "p", "pp", "approx", "dept", "inc", "ltd"},
+    "es": {"sr", "sra", "srta", "dr", "dra", "d", "dña", "ud", "uds", "prof", "etc", "ej", "p. ej", "pág",
+           "págs", "núm", "cap", "aprox", "av", "vol"},
+    "fr": {"m", "mm", "mme", "mmes", "mlle", "dr", "pr", "me", "st", "ste", "etc", "cf", "ex", "p", "pp", "vol",
+           "chap", "env", "av", "bd", "n°"},
+}
+_PARAGRAPH = re.compile(r"\n[ \t]*\n\s*")
+# A sentence ends at ., !, ? or an ellipsis, plus any closing quotes and brackets. French sets a space
+# before !, ? and », which belongs to the sentence it ends.
+_SENTENCE_END = re.compile(r"(?:\s?[!?]+|[.…]+)(?:\s?»|[\"'”’)\]])*(?=\s|$)")
+_OPENERS = re.compile(r"\s*[\"'«“‘(\[¿¡]*")
+_CLAUSE = re.compile(r"(?<=[,;:])\s+")
+
+
+# Segmentation
+def split_sentences(paragraph: str, language: str) -> List[str]:
+    abbreviations = ABBREVIATIONS.get(language, ABBREVIATIONS["en"])
+    sentences, start = [], 0
+    for match in _SENTENCE_END.finditer(paragraph):
+        end = match.end()
+        if end < len(paragraph):
+            following = paragraph[_OPENERS.match(paragraph, end).end():][:1]
+            if following.islower():
+                continue  # "e.g. a list", "3.5 kg", "Hmm... maybe"
+            if match.group().startswith("."):
+                word = paragraph[start:match.start()].rsplit(None, 1)[-1:] or [""]
+                word = word[0].lstrip("\"'«“‘(¿¡").lower()
+                two_words = " ".join(paragraph[start:match.start()].split()[-2:]).lower()
+                if word in abbreviations or two_words in abbreviations or (len(word) == 1 and word.isalpha()):
+                    continue  # "Dr. Smith", "p. ej. Madrid", "J. K. Rowling"
+        sentence = paragraph[start:end].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = end
+    rest = paragraph[start:].strip()
+    if rest:
+        sentences.append(rest)
+    return sentences
+
+
+def _wrap(sentence: str, max_chars: int) -> List[str]:
+    """``sentence`` in pieces of at most ``max_chars``, broken at clause punctuation, then spaces."""
+    if len(sentence) <= max_chars:
+        return [sentence]
+    pieces, current = [], ""
+    for clause in _CLAUSE.split(sentence):
+        words = clause.split() if len(clause) > max_chars else [clause]
+        for word in words:
+            while len(word) > max_chars:  # no space to break at
+                if current:
+                    pieces.append(current)
+                    current = ""
+                pieces.append(word[:max_chars])
+                word = word[max_chars:]
+            if current and len(current) + 1 + len(word) > max_chars:
+                pieces.append(current)
+                current = word
+            else:
+                current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def segment(text: str, language: str = "en", max_chars: int = DEFAULT_MAX_CHARS) -> List[str]:
+    """
+    Chunks of ``text`` to synthesize in order: the first sentence alone, then
+    whole sentences of one paragraph up to ``max_chars`` each.
+    """
+    language = model_registry.normalize_language(language)
+    chunks: List[str] = []
+    for paragraph in _PARAGRAPH.split(text.strip()):
+        current = ""
+        for sentence in split_sentences(" ".join(paragraph.split()), language):
+            for piece in _wrap(sentence, max_chars):
+                if current and (not chunks or len(current) + 1 + len(piece) > max_chars):
+                    chunks.append(current)
+                    current = piece
+                else:
+                    current = f"{current} {piece}" if current else piece
+        if current:
+            chunks.append(current)
+    return chunks
+
+
+# Streaming
+class SpeechStreamer:
+    def __init__(self, synthesize: Callable[[str, str, str], str] = placeholder_artifacts.speech_chunk_artifact,
+                 lookahead: int = DEFAULT_LOOKAHEAD, max_chars: int = DEFAULT_MAX_CHARS):
+        self.synthesize = synthesize  # (text, language, voice_type) -> artifact id of a WAV, run in a thread
+        self.lookahead = max(1, lookahead)
+        self.max_chars = max_chars
+        self.streams = 0
+        self.chunks = {"synthesized": 0, "cached": 0}
+        self.first_chunk_seconds = 0.0
+        self.bytes_streamed = 0
+
+    async def chunk(self, text: str, language: str, voice_type: str) -> str:
+        """Artifact id of ``text`` spoken, from the result cache or synthesized on the scheduler pool."""
+        code = model_registry.normalize_language(language)
+        synthesized = False
+
+        async def synthesize():
+            nonlocal synthesized
+            synthesized = True
+            return await job_scheduler.scheduler.run(
+                "text_to_speech", lambda: model_registry.registry.holding(
+                    "text_to_speech", f"{code}/{voice_type}",
+                    lambda: asyncio.to_thread(self.synthesize, text, language, voice_type)),
+                size_bytes=len(text.encode()))
+
+        artifact_id = await coalescing.coalescer.run(
+            "text_to_speech_chunk", {"text": text, "language": code, "voice_type": voice_type}, synthesize)
+        self.chunks["synthesized" if synthesized else "cached"] += 1
+        return artifact_id
+
+    async def open(self, text: str, language: str, voice_type: str) -> Tuple[int, AsyncIterator[bytes]]:
+        """
+        Start synthesizing ``text`` and wait for its first chunk, so a failure
+        can still become an error response; returns the chunk count and the
+        WAV byte stream. ValueError if there is nothing to speak.
+        """
+        chunks = segment(text, language, self.max_chars)
+        if not chunks:
+            raise ValueError("No text to speak")
+        start = time.monotonic()
+        pending: Deque[asyncio.Future] = collections.deque(
+            asyncio.ensure_future(self.chunk(c, language, voice_type)) for c in chunks[:self.lookahead])
+        try:
+            await asyncio.shield(pending[0])
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            raise
+        self.streams += 1
+        self.first_chunk_seconds += time.monotonic() - start
+        return len(chunks), self._stream(chunks, language, voice_type, pending)
+
+    async def _stream(self, chunks: List[str], language: str, voice_type: str,
+                      pending: Deque[asyncio.Future]) -> AsyncIterator[bytes]:
+        following = iter(chunks[len(pending):])
+        try:
+            yield placeholder_artifacts.wav_header(None)
+            while pending:
+                artifact_id = await pending.popleft()
+                text = next(following, None)
+                if text is not None:
+                    pending.append(asyncio.ensure_future(self.chunk(text, language, voice_type)))
+                async for block in self._samples(artifact_id):
+                    self.bytes_streamed += len(block)
+                    yield block
+        finally:
+            for task in pending:  # client went away or a chunk failed
+                task.cancel()
+
+    @staticmethod
+    async def _samples(artifact_id: str) -> AsyncIterator[bytes]:
+        """The sample data of a WAV artifact, read off the event loop."""
+        with open(store.path(artifact_id), "rb") as f:
+            await asyncio.to_thread(f.seek, placeholder_artifacts.WAV_HEADER_BYTES)
+            while True:
+                block = await asyncio.to_thread(f.read, READ_SIZE)
+                if not block:
+                    return
+                yield block
+
+
+streamer = SpeechStreamer()
+
+
+def metric_samples():
+    return [
+        ("aidae_tts_streams_total", "counter", "Streaming text-to-speech requests started.", [({}, streamer.streams)]),
+        ("aidae_tts_stream_chunks_total", "counter", "Speech chunks streamed, synthesized or from the cache.",
+         [({"source": source}, n) for source, n in streamer.chunks.items()]),
+        ("aidae_tts_stream_first_chunk_seconds_total", "counter",
+         "Time from request to first chunk ready, summed over streams.", [({}, streamer.first_chunk_seconds)]),
+        ("aidae_tts_stream_bytes_total", "counter", "Audio bytes streamed.", [({}, streamer.bytes_streamed)]),
+    ]
@@ -0,0 +1,16 @@
+"""
+Test setup: the repository root on ``sys.path``, and the state database,
+artifact store and feedback log in a temporary directory, set before any
+module reads its ``AI_DAE_*`` defaults.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_scratch = tempfile.mkdtemp(prefix="aidae-tests-")
+os.environ.setdefault("AI_DAE_STATE_DB", os.path.join(_scratch, "state.db"))
+os.environ.setdefault("AI_DAE_ARTIFACT_DIR", os.path.join(_scratch, "artifacts"))
+os.environ.setdefault("AI_DAE_FEEDBACK_LOG", os.path.join(_scratch, "feedback.jsonl"))
@@ -0,0 +1,158 @@
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+import admission
+import job_scheduler
+import metrics
+from ai_dae import create_app
+
+
+def build_app(controller: admission.AdmissionController, work_seconds: float = 0.0,
+              stream_until: asyncio.Event = None) -> FastAPI:
+    app = FastAPI()
+    metrics.instrument(app)
+
+    @app.get("/archives/content/status/{batch_id}/events")
+    async def events(batch_id: str):
+        async def progress():
+            yield b"data: {}\n\n"
+            await stream_until.wait()
+
+        return StreamingResponse(progress(), media_type="text/event-stream")
+
+    @app.get("/work")
+    async def work():
+        await asyncio.sleep(work_seconds)
+        return {"ok": True}
+
+    @app.post("/enhancements/render")
+    async def render():
+        return {"ok": True}
+
+    admission.install(app, controller=controller)
+    return app
+
+
+async def send_all(app: FastAPI, requests):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async def one(method, path, headers):
+            start = time.perf_counter()
+            response = await client.request(method, path, headers=headers)
+            return response, time.perf_counter() - start
+
+        return await asyncio.gather(*(one(*request) for request in requests))
+
+
+def test_overload_is_shed_and_admitted_latency_stays_bounded():
+    route_class = admission.RouteClass("all", max_concurrency=4, queue_watermark=8, queue_timeout=0.2)
+    controller = admission.AdmissionController(rate=1e6, burst=1e6, route_classes=[("/", (), route_class)])
+    app = build_app(controller, work_seconds=0.05)
+    results = asyncio.run(send_all(app, [("GET", "/work", {})] * 200))
+
+    statuses = [response.status_code for response, _ in results]
+    assert statuses.count(200) >= 4
+    assert statuses.count(503) > 100
+    assert all(response.headers["retry-after"] for response, _ in results if response.status_code == 503)
+    latencies = sorted(elapsed for _, elapsed in results)
+    # Unbounded queueing would take 200 / 4 * 0.05 = 2.5 s for the last request.
+    assert latencies[int(0.99 * (len(latencies) - 1))] < 0.2 + 0.05 + 0.25
+    assert route_class.in_flight == 0 and not route_class.waiters
+
+
+def test_rotating_client_headers_do_not_refill_the_bucket():
+    controller = admission.AdmissionController(rate=0.001, burst=3)
+    app = build_app(controller)
+    results = asyncio.run(send_all(app, [("GET", "/work", {"x-api-key": f"key-{n}"}) for n in range(10)]))
+    assert [r.status_code for r, _ in results].count(429) == 7
+    assert list(controller.buckets) == ["addr:127.0.0.1"]
+
+
+def test_trusted_proxy_may_name_the_client():
+    controller = admission.AdmissionController(rate=0.001, burst=3, trusted_proxies="127.0.0.0/8")
+    app = build_app(controller)
+    results = asyncio.run(send_all(app, [("GET", "/work", {"x-api-key": f"key-{n}"}) for n in range(10)]))
+    assert all(r.status_code == 200 for r, _ in results)
+    assert len(controller.buckets) == 10
+
+
+def test_bucket_count_is_capped():
+    controller = admission.AdmissionController(rate=1.0, burst=10, max_clients=50)
+    for n in range(1000):
+        controller.take_token(f"addr:10.0.{n // 256}.{n % 256}", now=0.0)
+    assert len(controller.buckets) <= 50
+    assert controller.evicted_clients >= 950
+    assert "addr:10.0.3.231" in controller.buckets  # the most recent client survives
+
+
+def test_backlog_sheds_sheddable_routes_only():
+    controller = admission.AdmissionController(backlog_watermark=10)
+    controller.backlog_probes.append(lambda: 11)
+    app = build_app(controller)
+    results = asyncio.run(send_all(app, [("POST", "/enhancements/render", {}), ("GET", "/work", {})]))
+    assert [r.status_code for r, _ in results] == [503, 200]
+    assert controller.rejected == {("enhancement", "backlog"): 1}
+
+
+def test_rejections_reach_route_metrics():
+    controller = admission.AdmissionController(rate=0.001, burst=1)
+    app = build_app(controller)
+    asyncio.run(send_all(app, [("GET", "/work", {})] * 3))
+    assert app.state.metrics.routes[("GET", "/work")].statuses == {200: 1, 429: 2}
+
+
+def test_scheduler_queue_counts_as_backlog(monkeypatch):
+    app = create_app(["books"])
+    queue = job_scheduler.FairQueue()
+    monkeypatch.setattr(job_scheduler.scheduler, "queue", queue)
+    before = app.state.admission.backlog()
+    queue.push("tenant", job_scheduler.JOB_CLASSES["text_to_speech"], 1.0, 0.0)
+    assert app.state.admission.backlog() == before + 1
+
+
+def test_open_event_streams_do_not_hold_read_slots():
+    async def scenario():
+        read = admission.RouteClass("read", max_concurrency=2, queue_watermark=0, queue_timeout=0.1)
+        controller = admission.AdmissionController(rate=1e6, burst=1e6, route_classes=[("/", (), read)])
+        done = asyncio.Event()
+        app = build_app(controller, stream_until=done)
+        streams = [asyncio.ensure_future(send_all(app, [("GET", f"/archives/content/status/b{n}/events", {})]))
+                   for n in range(8)]
+        await asyncio.sleep(0.05)
+        assert controller.streams == 8
+        results = await send_all(app, [("GET", "/work", {})] * 2)
+        assert [r.status_code for r, _ in results] == [200, 200]
+        assert read.in_flight == 0 and controller.rejected == {}
+        done.set()
+        await asyncio.gather(*streams)
+        assert controller.streams == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_jobs_leave_the_backlog(monkeypatch):
+    async def scenario():
+        app = create_app(["books"])
+        scheduler = job_scheduler.JobScheduler(workers=1)
+        monkeypatch.setattr(job_scheduler, "scheduler", scheduler)
+        before = app.state.admission.backlog()
+        release = asyncio.Event()
+        busy = asyncio.ensure_future(scheduler.run("text_to_speech", release.wait, tenant="t"))
+        waiting = [asyncio.ensure_future(scheduler.run("text_to_speech", lambda: None, tenant=f"t{n}"))
+                   for n in range(20)]
+        await asyncio.sleep(0)
+        assert app.state.admission.backlog() == before + 20
+        for task in waiting[:15]:
+            task.cancel()  # clients that disconnected while queued
+        await asyncio.gather(*waiting[:15], return_exceptions=True)
+        assert app.state.admission.backlog() == before + 5
+        assert len(scheduler.queue.queued()) == 5
+        release.set()
+        await asyncio.gather(busy, *waiting[15:])
+        assert app.state.admission.backlog() == before and scheduler.running == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,37 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import coalescing
+from ai_dae import create_app
+
+
+def test_identical_requests_share_one_computation():
+    async def scenario():
+        flight = coalescing.SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        requests = [{"video_file_url": url} for url in
+                    ("https://Media.example/a.mp4", "https://media.example:443/a.mp4", " https://media.example/a.mp4")]
+        results = await asyncio.gather(*(flight.run("captions", r, work) for r in requests))
+        assert results == ["result"] * 3 and len(calls) == 1
+        assert await flight.run("captions", requests[0], work) == "result" and len(calls) == 1
+        assert (flight.coalesced, flight.cache_hits) == ({"captions": 2}, {"captions": 1})
+
+    asyncio.run(scenario())
+
+
+def test_text_to_speech_language_names_and_codes_share_a_result(monkeypatch):
+    flight = coalescing.SingleFlight()
+    monkeypatch.setattr(coalescing, "coalescer", flight)
+    with TestClient(create_app(["enhancements"])) as client:
+        urls = {client.post("/enhancements/text-to-speech",
+                            json={"content_id": "coalesce-1", "language": language}).json()["audio_url"]
+                for language in ("English", "en", "EN")}
+    assert len(urls) == 1
+    assert flight.executions == {"text_to_speech": 1} and flight.cache_hits == {"text_to_speech": 2}
@@ -0,0 +1,45 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import compliance_reports
+import shared_state
+from ai_dae import create_app
+
+
+def test_placeholder_reports_make_no_compliance_determination():
+    with TestClient(create_app(["compliance"])) as client:
+        report = client.post("/compliance/check", json={"service_id": "portal", "standards": ["WCAG 2.1"]}).json()
+    assert report["status"] == "completed"
+    assert report["checker"] == "placeholder" and report["compliant"] is None
+
+
+def test_unfinished_verification_resumes_on_another_worker(tmp_path):
+    shared = shared_state.StateStore(str(tmp_path / "state.db"))
+    items = [f"item-{n:03d}" for n in range(25)]
+    shared.create_batch("b1", "a1", "document", "test", items)
+    shared.create_report("r1", "batch:b1", ["ADA"], len(items), "placeholder", "b1", "document")
+    expected = [f for item in items for f in compliance_reports.check_item(item, "document")]
+
+    # A worker claims the report, checks the first chunk and dies.
+    claimed = shared.claim_report("dead:1", lease=60)
+    rows = shared.batch_items("b1", 0, 10)
+    first = [f for _, item in rows for f in compliance_reports.check_item(item, "document")]
+    assert shared.add_findings("r1", len(rows), len({f[0] for f in first}), first,
+                               checked_through=rows[-1][0], worker="dead:1")
+    assert claimed["report_id"] == "r1" and shared.claim_report("other:2", lease=60) is None
+
+    runner = compliance_reports.ReportRunner(shared, chunk_size=10, poll_interval=0.01, lease=0.05)
+
+    async def scenario():
+        runner.start()
+        while shared.report("r1")["status"] != "completed":
+            await asyncio.sleep(0.01)
+        await runner.stop()
+
+    asyncio.run(asyncio.wait_for(scenario(), 10))
+    report = shared.report("r1")
+    assert report["items_checked"] == len(items) and runner.reports_resumed == 1
+    assert [tuple(f.values())[1:] for f in shared.findings("r1", limit=1000)] == expected
+    # The dead worker's late write is refused rather than counted twice.
+    assert not shared.add_findings("r1", 1, 0, [], worker="dead:1")
@@ -0,0 +1,84 @@
+import asyncio
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+import feedback_log
+import shared_state
+from ai_dae import create_app
+
+
+def test_aggregates_count_only_durable_entries(tmp_path):
+    shared = shared_state.StateStore(str(tmp_path / "state.db"))
+    log = feedback_log.FeedbackLog(str(tmp_path / "feedback.jsonl"), fsync=False, shared=shared)
+
+    async def scenario():
+        await asyncio.gather(*(log.append("c1", "fine", rating) for rating in (5, 4, 3)))
+        assert log.summary("c1")["count"] == 3
+
+        def broken_write(data):
+            raise OSError("disk full")
+
+        log._write = broken_write
+        with pytest.raises(OSError):
+            await log.append("c1", "lost", 1)
+
+    asyncio.run(scenario())
+    summary = log.summary("c1")
+    assert summary["count"] == 3
+    assert summary["average_rating"] == 4.0
+
+
+def test_failed_aggregate_update_does_not_fail_a_logged_entry(tmp_path):
+    path = str(tmp_path / "feedback.jsonl")
+    shared = shared_state.StateStore(str(tmp_path / "state.db"))
+    log = feedback_log.FeedbackLog(path, fsync=False, shared=shared)
+    add_ratings = shared.add_ratings
+
+    def locked(ratings):
+        raise sqlite3.OperationalError("database is locked")
+
+    async def scenario():
+        shared.add_ratings = locked
+        await log.append("c5", "logged", 2)  # durable, so the client is not told to retry
+        assert log.summary("c5") is None and log.count_failures == 1
+        shared.add_ratings = add_ratings
+        await log.append("c5", "next", 4)
+
+    asyncio.run(scenario())
+    with open(path) as f:
+        assert len(f.readlines()) == 2
+    assert log.summary("c5")["rating_histogram"] == {"2": 1, "4": 1} and not log._uncounted
+
+
+def test_workers_share_aggregates(tmp_path):
+    path, db = str(tmp_path / "feedback.jsonl"), str(tmp_path / "state.db")
+    first = feedback_log.FeedbackLog(path, fsync=False, shared=shared_state.StateStore(db))
+    second = feedback_log.FeedbackLog(path, fsync=False, shared=shared_state.StateStore(db))
+    asyncio.run(first.append("c4", "good", 5))
+    asyncio.run(second.append("c4", "poor", 2))
+    assert first.summary("c4") == second.summary("c4")
+    assert first.summary("c4")["rating_histogram"] == {"2": 1, "5": 1}
+    # A worker starting later does not count the log again.
+    third = feedback_log.FeedbackLog(path, shared=shared_state.StateStore(db))
+    assert third.summary("c4")["count"] == 2
+
+
+def test_replay_seeds_a_new_database(tmp_path):
+    path = str(tmp_path / "feedback.jsonl")
+    log = feedback_log.FeedbackLog(path, fsync=False, shared=shared_state.StateStore(str(tmp_path / "a.db")))
+    asyncio.run(log.append("c2", "good", 5))
+    log.close()
+    with open(path, "a") as f:
+        f.write('{"content_id": "c2", "satisfaction_rating": 99}\n{"content_id": "c2", "satis')
+    fresh = feedback_log.FeedbackLog(path, shared=shared_state.StateStore(str(tmp_path / "b.db")))
+    assert fresh.summary("c2")["rating_histogram"] == {"5": 1}
+
+
+@pytest.mark.parametrize("rating", [0, 6, -1])
+def test_out_of_range_rating_is_rejected(rating):
+    with TestClient(create_app(["communication"])) as client:
+        response = client.post("/feedback", json={"content_id": "c3", "user_feedback": "x",
+                                                  "satisfaction_rating": rating})
+    assert response.status_code == 422
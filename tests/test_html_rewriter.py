@@ -0,0 +1,33 @@
+from fastapi.testclient import TestClient
+
+import html_rewriter
+from ai_dae import create_app
+
+DOCUMENT = ('<html><body><div id="nav"><a href="/">Home</a></div><h2>Chapter</h2>'
+            '<img src="/figures/cell_640x480.png"><header>Top</header></body></html>')
+
+
+def test_rewrite_in_pieces_matches_one_pass():
+    whole = []
+    html_rewriter.rewrite([DOCUMENT], whole.append)
+    pieces = []
+    html_rewriter.rewrite([DOCUMENT[i:i + 7] for i in range(0, len(DOCUMENT), 7)], pieces.append)
+    assert "".join(pieces) == "".join(whole)
+
+
+def test_html_endpoint_streams_rewritten_document():
+    with TestClient(create_app(["enhancements"])) as client:
+        response = client.post("/enhancements/screen-reader-optimization/html", content=DOCUMENT.encode(),
+                               headers={"content-type": "text/html"})
+    assert response.status_code == 200
+    assert 'role="navigation"' in response.text
+    assert "<h1" in response.text and "<h2" not in response.text
+    assert 'alt="' in response.text
+    assert 'role="banner"' in response.text
+
+
+def test_unknown_enhancement_is_rejected():
+    with TestClient(create_app(["enhancements"])) as client:
+        response = client.post("/enhancements/screen-reader-optimization/html?enhancements=sparkles",
+                               content=b"<p>x</p>")
+    assert response.status_code == 400
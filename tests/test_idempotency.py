@@ -0,0 +1,143 @@
+import asyncio
+import itertools
+import json
+
+import idempotency
+import shared_state
+
+
+def request(path="/content/ingest", key=b"k-1", body=b'{"content_type": "document"}', chunks=1):
+    scope = {"type": "http", "method": "POST", "path": path, "client": ("127.0.0.1", 5000),
+             "headers": [(b"idempotency-key", key), (b"content-type", b"application/json")]}
+    size = -(-len(body) // chunks)
+    messages = [{"type": "http.request", "body": body[i:i + size], "more_body": i + size < len(body)}
+                for i in range(0, len(body), size)]
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    return scope, receive
+
+
+async def call(app, scope, receive):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    start = next(m for m in sent if m["type"] == "http.response.start")
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    return start["status"], dict(start["headers"]), body
+
+
+class Backend:
+    """Answers with a new id per call, then runs 'background work' until released."""
+
+    def __init__(self):
+        self.ids = itertools.count(1)
+        self.release = asyncio.Event()
+        self.received = []
+
+    async def __call__(self, scope, receive, send):
+        while True:
+            message = await receive()
+            self.received.append(message)
+            if not message.get("more_body"):
+                break
+        body = json.dumps({"content_id": next(self.ids)}).encode()
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": body})
+        await self.release.wait()  # BackgroundTasks run here, inside the app call
+
+
+def middleware(backend, db):
+    """The middleware as one worker would run it: its own connection to the shared database ``db``."""
+    store = idempotency.IdempotencyStore(shared_state.StateStore(str(db)), poll_interval=0.01)
+    return idempotency.IdempotencyMiddleware(backend, store)
+
+
+def test_retry_replays_without_waiting_for_background_work(tmp_path):
+    async def scenario():
+        backend = Backend()
+        app = middleware(backend, tmp_path / "state.db")
+        first = asyncio.ensure_future(call(app, *request()))
+        while not backend.received:
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+        status, headers, body = await asyncio.wait_for(call(app, *request()), 1.0)
+        assert (status, json.loads(body), headers[b"idempotent-replayed"]) == (200, {"content_id": 1}, b"true")
+        assert not first.done()
+        backend.release.set()
+        assert (await first)[2] == body
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_retry_waits_for_the_first_response(tmp_path):
+    async def scenario():
+        backend = Backend()
+        backend.release.set()
+        app = middleware(backend, tmp_path / "state.db")
+        results = await asyncio.gather(*(call(app, *request()) for _ in range(5)))
+        assert {body for _, _, body in results} == {b'{"content_id": 1}'}
+        assert app.store.counts["executed"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_reused_key_with_different_body_is_rejected(tmp_path):
+    async def scenario():
+        backend = Backend()
+        backend.release.set()
+        app = middleware(backend, tmp_path / "state.db")
+        await call(app, *request())
+        status, _, _ = await call(app, *request(body=b'{"content_type": "video"}'))
+        assert status == 422
+
+    asyncio.run(scenario())
+
+
+def test_streaming_endpoints_pass_the_body_through_unbuffered(tmp_path):
+    async def scenario():
+        backend = Backend()
+        backend.release.set()
+        app = middleware(backend, tmp_path / "state.db")
+        path = "/enhancements/screen-reader-optimization/html"
+        for _ in range(2):
+            await call(app, *request(path=path, body=b"<p>" * 1000, chunks=4))
+        assert len(backend.received) == 8  # every chunk reached the endpoint as sent
+        assert app.store.counts["executed"] == 0 and app.store.keys == 0
+
+    asyncio.run(scenario())
+
+
+def test_retry_on_another_worker_replays_the_first_response(tmp_path):
+    async def scenario():
+        first_backend, second_backend = Backend(), Backend()
+        first_backend.release.set()
+        second_backend.release.set()
+        gate = asyncio.Event()
+
+        async def slow_first(scope, receive, send):
+            await gate.wait()
+            await first_backend(scope, receive, send)
+
+        first = middleware(slow_first, tmp_path / "state.db")
+        second = middleware(second_backend, tmp_path / "state.db")
+        running = asyncio.ensure_future(call(first, *request()))
+        while not first.store.running:
+            await asyncio.sleep(0)
+        retry = asyncio.ensure_future(call(second, *request()))  # waits on the other worker's call
+        await asyncio.sleep(0.05)
+        assert not retry.done()
+        gate.set()
+        assert (await running)[2] == b'{"content_id": 1}'
+        status, headers, body = await asyncio.wait_for(retry, 1.0)
+        assert (status, body, headers[b"idempotent-replayed"]) == (200, b'{"content_id": 1}', b"true")
+        status, _, body = await call(second, *request())
+        assert (status, body) == (200, b'{"content_id": 1}')
+        assert [second.store.counts[k] for k in ("executed", "waited", "replayed")] == [0, 1, 1]
+        assert not second_backend.received
+
+    asyncio.run(scenario())
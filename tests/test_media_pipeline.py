@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+import media_pipeline
+
+
+class RecordingTrack:
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self.fed = 0
+        self.finished = False
+
+    def feed(self, chunk):
+        self.fed += 1
+        if self.fed == self.fail_at:
+            raise RuntimeError("track failed")
+
+    def finish(self):
+        self.finished = True
+        return self.fed
+
+
+class FailingDecoder:
+    def __iter__(self):
+        yield from media_pipeline.SyntheticDecoder("https://media.example.org/a.mp4", duration=2.0)
+        raise OSError("decode failed")
+
+
+def decoder(seconds=4.0):
+    return media_pipeline.SyntheticDecoder("https://media.example.org/a.mp4", duration=seconds)
+
+
+def test_every_track_sees_every_chunk():
+    tracks = [RecordingTrack(), RecordingTrack(), RecordingTrack()]
+    assert asyncio.run(media_pipeline.run_pipeline(decoder(), tracks, buffer_size=2)) == [4, 4, 4]
+    assert all(track.finished for track in tracks)
+
+
+def test_failing_track_aborts_the_run_without_finishing_any_track():
+    tracks = [RecordingTrack(), RecordingTrack(fail_at=2)]
+    with pytest.raises(RuntimeError):
+        asyncio.run(media_pipeline.run_pipeline(decoder(), tracks))
+    assert not any(track.finished for track in tracks)
+
+
+def test_decoder_failure_finishes_no_track():
+    tracks = [RecordingTrack(), RecordingTrack()]
+    with pytest.raises(OSError):
+        asyncio.run(media_pipeline.run_pipeline(FailingDecoder(), tracks))
+    assert not any(track.finished for track in tracks)
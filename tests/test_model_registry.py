@@ -0,0 +1,109 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import job_scheduler
+import model_registry
+from ai_dae import create_app
+
+UNIT = 2 ** 20
+
+
+class Loads:
+    """Stub loader: records each load and returns the key as the model."""
+
+    def __init__(self):
+        self.keys = []
+
+    def __call__(self, kind, variant):
+        self.keys.append((kind, variant))
+        return (kind, variant)
+
+
+def registry(models: int):
+    loads = Loads()
+    return model_registry.ModelRegistry(loads, max_bytes=models * UNIT, size_of=lambda kind, variant: UNIT), loads
+
+
+def test_least_recently_used_model_is_evicted():
+    async def scenario():
+        models, loads = registry(2)
+        for variant in ("a", "b", "a", "c"):
+            async with models.use("tts", variant):
+                pass
+        assert list(models.models) == [("tts", "a"), ("tts", "c")]
+        assert loads.keys == [("tts", "a"), ("tts", "b"), ("tts", "c")]
+
+    asyncio.run(scenario())
+
+
+def test_models_in_use_are_not_evicted():
+    async def scenario():
+        models, _ = registry(2)
+        async with models.use("tts", "a"):
+            for variant in ("b", "c"):
+                async with models.use("tts", variant):
+                    pass
+            assert ("tts", "a") in models.models and ("tts", "b") not in models.models
+            async with models.use("tts", "d"), models.use("tts", "e"):
+                pass  # a, d and e all pinned: the last load goes over budget
+            assert models.over_budget_loads == 1
+        assert models.resident_bytes <= models.max_bytes
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_requests_share_one_load():
+    async def scenario():
+        models, loads = registry(2)
+
+        async def use():
+            async with models.use("tts", "a") as model:
+                return model
+
+        assert await asyncio.gather(*(use() for _ in range(5))) == [("tts", "a")] * 5
+        assert loads.keys == [("tts", "a")] and models.requests["wait"] == 4
+
+    asyncio.run(scenario())
+
+
+def test_queued_jobs_do_not_load_or_pin_models():
+    async def scenario():
+        models, loads = registry(1)
+        scheduler = job_scheduler.JobScheduler(workers=1)
+        release = asyncio.Event()
+        busy = asyncio.ensure_future(scheduler.run("text_to_speech", release.wait, tenant="t1"))
+        await asyncio.sleep(0)
+        queued = asyncio.ensure_future(scheduler.run(
+            "text_to_speech", lambda: models.holding("tts", "b", lambda: "spoken"), tenant="t2"))
+        await asyncio.sleep(0.01)
+        assert len(scheduler.queue) == 1 and loads.keys == []
+        release.set()
+        assert await queued == "spoken"
+        await busy
+        assert [r.pins for r in models.models.values()] == [0]
+
+    asyncio.run(scenario())
+
+
+def test_enhancement_endpoints_take_their_model_inside_a_scheduler_slot(monkeypatch):
+    models, loads = registry(8)
+    scheduler = job_scheduler.JobScheduler(workers=1)
+    monkeypatch.setattr(model_registry, "registry", models)
+    monkeypatch.setattr(job_scheduler, "scheduler", scheduler)
+    with TestClient(create_app(["enhancements"])) as client:
+        for path, body in [
+            ("/enhancements/text-to-speech", {"content_id": "slot-test", "language": "English"}),
+            ("/enhancements/video-captioning", {"video_file_url": "https://media.example/slot.mp4",
+                                                "language": "English"}),
+            ("/enhancements/speech-to-text", {"audio_file_url": "https://media.example/slot.wav", "language": "en"}),
+            ("/enhancements/video/instructional-accessibility", {
+                "video_file_url": "https://media.example/slot-lesson.mp4", "sign_language": "ASL",
+                "descriptive_audio_details": {"level_of_detail": "high"}}),
+        ]:
+            assert client.post(path, json=body).status_code == 200
+    assert sorted(loads.keys) == [("sign_language", "ASL"), ("speech_to_text", "en"), ("text_to_speech", "en/default"),
+                                  ("video_captioning", "en")]
+    assert scheduler.completed == dict.fromkeys(
+        ("text_to_speech", "video_captioning", "speech_to_text", "instructional_accessibility"), 1)
+    assert all(r.pins == 0 for r in models.models.values())
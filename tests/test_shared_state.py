@@ -0,0 +1,52 @@
+import time
+
+from fastapi.testclient import TestClient
+
+import archive_batches
+import shared_state
+from ai_dae import create_app
+
+
+def _version(etag: str) -> int:
+    return int(etag.strip('"').rsplit("-", 1)[1])
+
+
+def test_book_changes_are_visible_to_other_workers():
+    other_worker = shared_state.StateStore(shared_state.state.path)
+    with TestClient(create_app(["books"])) as client:
+        first = client.get("/books")
+        assert _version(first.headers["etag"]) == other_worker.catalogue()[0]
+        client.post("/create-book", json={"id": None, "title": "Shared Shelf", "author": "A", "description": "d",
+                                          "rating": 4, "published_date": 2025})
+        added = next(b for b in other_worker.books() if b["title"] == "Shared Shelf")
+        assert client.get("/books", headers={"if-none-match": first.headers["etag"]}).status_code == 200
+        assert client.get("/books", headers={"if-none-match": client.get("/books").headers["etag"]}).status_code == 304
+
+        other_worker.delete_book(added["id"], max_tombstones=100)
+        delta = client.get("/books", params={"since": _version(first.headers["etag"])}).json()
+        assert delta["reset"] is False and added["id"] in delta["deleted"]
+        assert client.get(f"/books/{added['id']}").status_code == 404
+
+
+def test_dropped_tombstones_turn_old_deltas_into_resets(tmp_path):
+    shared = shared_state.StateStore(str(tmp_path / "state.db"))
+    shared.seed_books([(n, f"Book {n}", "A", "d", 3, 2020) for n in range(1, 5)])
+    start = shared.catalogue()[0]
+    for book_id in (1, 2, 3):
+        shared.delete_book(book_id, max_tombstones=1)
+    assert shared.book_delta(start)["reset"] is True
+    latest = shared.book_delta(shared.catalogue()[0] - 1)
+    assert latest["reset"] is False and latest["deleted"] == [3]
+
+
+def test_batch_runner_starts_with_the_app(monkeypatch):
+    monkeypatch.setattr(archive_batches, "process_item", lambda item_id: False)
+    with TestClient(create_app(["archives"])) as client:
+        assert archive_batches.runner._task is not None
+        batch_id = client.post("/archives/content/ingest", json={
+            "archive_id": "runner-test", "content_type": "document", "source": "test"}).json()["batch_process_id"]
+        deadline = time.monotonic() + 30
+        while client.get(f"/archives/content/status/{batch_id}").json()["status"] != "completed":
+            assert time.monotonic() < deadline
+            time.sleep(0.02)
+    assert archive_batches.runner._task is None
@@ -0,0 +1,42 @@
+import asyncio
+import os
+import threading
+
+import snapshots
+
+
+def table_section(rows, lock=None):
+    def load(payload):
+        rows[:] = snapshots.unpack_table("qs", payload)
+
+    return snapshots.Section("rows", lambda: snapshots.pack_table("qs", rows), load, lock=lock)
+
+
+def test_forked_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "state.snap")
+    rows = [(n, f"row {n}") for n in range(1000)]
+    lock = threading.RLock()
+    assert asyncio.run(snapshots.Snapshotter([table_section(rows, lock)], path=path).take())
+    assert lock.acquire(blocking=False)  # released again in the parent
+    restored = []
+    assert snapshots.Snapshotter([table_section(restored)], path=path).restore() == ["rows"]
+    assert restored == rows
+    assert os.listdir(tmp_path) == ["state.snap"]
+
+
+def test_failed_child_keeps_the_previous_snapshot_and_stays_silent(tmp_path, capfd):
+    path = str(tmp_path / "state.snap")
+    rows = [(1, "kept")]
+    assert asyncio.run(snapshots.Snapshotter([table_section(rows)], path=path).take())
+    capfd.readouterr()
+
+    def broken():
+        raise RuntimeError("cannot serialize")
+
+    snapshotter = snapshots.Snapshotter([snapshots.Section("rows", broken, lambda payload: None)], path=path)
+    assert not asyncio.run(snapshotter.take())
+    assert snapshotter.results == {"ok": 0, "failed": 1}
+    assert "Traceback" not in capfd.readouterr().err
+    restored = []
+    snapshots.Snapshotter([table_section(restored)], path=path).restore()
+    assert restored == rows and os.listdir(tmp_path) == ["state.snap"]
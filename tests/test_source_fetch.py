@@ -0,0 +1,154 @@
+import asyncio
+import os
+import re
+import socket
+
+import httpx
+import uvicorn
+from fastapi.testclient import TestClient
+
+import source_fetch
+from ai_dae import create_app
+from artifact_store import ArtifactStore
+
+_RANGE = re.compile(r"^bytes=(\d+)-$")
+
+
+class Origin:
+    """Stand-in media origin: ETag validators, Range/If-Range and If-None-Match; cuts off the first ``drops`` bodies halfway."""
+
+    def __init__(self, body: bytes, etag: str = '"v1"', max_age: int = 0, drops: int = 0):
+        self.body = body
+        self.etag = etag
+        self.max_age = max_age
+        self.drops = drops
+        self.requests = []
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        headers = {k.decode(): v.decode() for k, v in scope["headers"]}
+        self.requests.append(headers)
+        common = [(b"etag", self.etag.encode()), (b"cache-control", b"max-age=%d" % self.max_age)]
+        if headers.get("if-none-match") == self.etag:
+            await send({"type": "http.response.start", "status": 304, "headers": common})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        status, start = 200, 0
+        match = _RANGE.match(headers.get("range", ""))
+        if match and headers.get("if-range") == self.etag:
+            status, start = 206, int(match.group(1))
+            common.append((b"content-range", f"bytes {start}-{len(self.body) - 1}/{len(self.body)}".encode()))
+        payload = self.body[start:]
+        await send({"type": "http.response.start", "status": status, "headers": common + [
+            (b"content-type", b"video/mp4"), (b"content-length", str(len(payload)).encode())]})
+        if self.drops:
+            self.drops -= 1
+            await send({"type": "http.response.body", "body": payload[:len(payload) // 2], "more_body": True})
+            return  # body unfinished: the server drops the connection
+        await send({"type": "http.response.body", "body": payload})
+
+
+def serve(origin, tmp_path, scenario):
+    """Run ``scenario(fetcher, url)`` against ``origin`` on a loopback port; returns its result."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    fetcher = source_fetch.SourceFetcher(artifacts=ArtifactStore(str(tmp_path), fsync=False), base_backoff=0.001,
+                                         max_backoff=0.01)
+
+    async def run():
+        server = uvicorn.Server(uvicorn.Config(origin, host="127.0.0.1", port=port, log_level="critical",
+                                               access_log=False))
+        task = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.01)
+        try:
+            return await scenario(fetcher, f"http://127.0.0.1:{port}/media/1.mp4")
+        finally:
+            await fetcher.aclose()
+            server.should_exit = True
+            await task
+
+    return fetcher, asyncio.run(run())
+
+
+def read(fetcher, artifact_id):
+    with open(fetcher.artifacts.path(artifact_id), "rb") as f:
+        return f.read()
+
+
+def test_dropped_download_resumes_with_range(tmp_path):
+    body = os.urandom(300_000)
+    origin = Origin(body, drops=1)
+    fetcher, fetched = serve(origin, tmp_path, lambda fetcher, url: fetcher.fetch(url))
+    assert fetched.source == "resumed" and read(fetcher, fetched.artifact_id) == body
+    assert len(origin.requests) == 2 and fetcher.retries == 1
+    assert "range" not in origin.requests[0]
+    assert origin.requests[1]["range"] == "bytes=150000-" and origin.requests[1]["if-range"] == '"v1"'
+    assert fetcher.bytes_received == len(body)
+
+
+def test_changed_validator_restarts_the_download(tmp_path):
+    body = os.urandom(300_000)
+    origin = Origin(os.urandom(300_000), drops=1)
+
+    async def scenario(fetcher, url):
+        first = asyncio.create_task(fetcher.fetch(url))
+        while not origin.requests:
+            await asyncio.sleep(0.001)
+        origin.body, origin.etag = body, '"v2"'  # the file changes while the first response is cut off
+        return await first
+
+    fetcher, fetched = serve(origin, tmp_path, scenario)
+    assert origin.requests[1]["if-range"] == '"v1"'
+    assert read(fetcher, fetched.artifact_id) == body
+
+
+def test_expired_entry_is_revalidated_and_fresh_entry_is_reused(tmp_path):
+    body = os.urandom(100_000)
+    origin = Origin(body, max_age=0)
+
+    async def scenario(fetcher, url):
+        first = await fetcher.fetch(url)
+        second = await fetcher.fetch(url)
+        origin.max_age = 60
+        third = await fetcher.fetch(url)
+        fourth = await fetcher.fetch(url)
+        return first, second, third, fourth
+
+    fetcher, (first, second, third, fourth) = serve(origin, tmp_path, scenario)
+    assert [f.source for f in (first, second, third, fourth)] == ["network", "revalidated", "revalidated", "fresh"]
+    assert len({f.artifact_id for f in (first, second, third, fourth)}) == 1
+    assert len(origin.requests) == 3 and origin.requests[1]["if-none-match"] == '"v1"'
+    assert fetcher.bytes_received == len(body)
+
+
+def test_enhancement_and_archive_inputs_are_fetched(tmp_path, monkeypatch):
+    requested = []
+
+    def origin(request: httpx.Request) -> httpx.Response:
+        requested.append(request.url.path)
+        if request.url.path == "/missing.mp4":
+            return httpx.Response(404)
+        return httpx.Response(200, stream=httpx.ByteStream(request.url.path.encode() * 100),
+                              headers={"etag": '"v1"'})
+
+    fetcher = source_fetch.SourceFetcher(artifacts=ArtifactStore(str(tmp_path), fsync=False),
+                                         transport=httpx.MockTransport(origin))
+    monkeypatch.setattr(source_fetch, "FETCH_SOURCES", True)
+    monkeypatch.setattr(source_fetch, "fetcher", fetcher)
+    with TestClient(create_app(["enhancements", "archives"])) as client:
+        assert client.post("/enhancements/speech-to-text", json={
+            "audio_file_url": "https://media.example/talk.wav", "language": "en"}).status_code == 200
+        assert client.post("/enhancements/video-captioning", json={
+            "video_file_url": "https://media.example/lecture.mp4", "language": "English"}).status_code == 200
+        assert client.post("/archives/content/ingest", json={
+            "archive_id": "fetched", "content_type": "document",
+            "source": "https://archive.example/manifest.json"}).status_code == 200
+        assert client.post("/enhancements/video-captioning", json={
+            "video_file_url": "https://media.example/missing.mp4", "language": "English"}).status_code == 502
+        pool = fetcher._client
+    assert pool.is_closed  # closed at shutdown, on the loop its connections belong to
+    assert requested == ["/talk.wav", "/lecture.mp4", "/manifest.json", "/missing.mp4"]
+    assert fetcher.counts["network"] == 3 and fetcher.counts["failed"] == 1
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import threading
+
+import httpx
+
+import webhooks
+
+SECRET = "test-secret"
+
+
+class Receiver:
+    """Stand-in callback endpoint: answers with ``statuses`` in turn (then 200) and records every request."""
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.requests = []
+
+    async def __call__(self, scope, receive, send):
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        self.requests.append((dict(scope["headers"]), body))
+        status = self.statuses.pop(0) if self.statuses else 200
+        headers = [(b"retry-after", b"0")] if status == 503 else []
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
+
+
+def deliver(receiver, emit_count=1, urls=("http://receiver.test/hook",), allowed_hosts=("receiver.test",)):
+    dispatcher = webhooks.WebhookDispatcher(secret=SECRET, max_delay=0.01, base_backoff=0.001, max_backoff=0.01,
+                                            max_attempts=4, allowed_hosts=allowed_hosts,
+                                            transport=httpx.ASGITransport(app=receiver))
+
+    async def scenario():
+        events = [dispatcher.emit(url, "content.completed", {"content_id": n})
+                  for url in urls for n in range(emit_count)]
+        await dispatcher.drain()
+        await dispatcher.aclose()
+        return events
+
+    return dispatcher, asyncio.run(scenario())
+
+
+def test_burst_is_delivered_as_one_signed_batch():
+    receiver = Receiver()
+    dispatcher, events = deliver(receiver, emit_count=3)
+    assert len(receiver.requests) == 1 and dispatcher.counts["delivered"] == 3
+    headers, body = receiver.requests[0]
+    assert [e["id"] for e in json.loads(body)["events"]] == [e["id"] for e in events]
+    signature = headers[webhooks.SIGNATURE_HEADER.encode()].decode()
+    assert webhooks.verify_signature(SECRET, signature, body)
+    assert not webhooks.verify_signature("other-secret", signature, body)
+    assert not webhooks.verify_signature(SECRET, signature, body.replace(b"content_id", b"content_ID"))
+
+
+def test_stale_signature_is_rejected():
+    body = b'{"events":[]}'
+    signature = webhooks.sign(SECRET, 1_000_000, body)
+    assert webhooks.verify_signature(SECRET, signature, body, now=1_000_100)
+    assert not webhooks.verify_signature(SECRET, signature, body, now=1_000_000 + 301)
+
+
+def test_retryable_failures_are_retried_with_the_same_events():
+    receiver = Receiver(503, 500)
+    dispatcher, events = deliver(receiver)
+    assert len(receiver.requests) == 3
+    assert dispatcher.counts["retries"] == 2 and dispatcher.counts["delivered"] == 1
+    assert {json.loads(body)["events"][0]["id"] for _, body in receiver.requests} == {events[0]["id"]}
+    assert all(webhooks.verify_signature(SECRET, h[webhooks.SIGNATURE_HEADER.encode()].decode(), body)
+               for h, body in receiver.requests)
+
+
+def test_client_errors_drop_the_batch_and_retries_give_up():
+    receiver = Receiver(400)
+    dispatcher, _ = deliver(receiver)
+    assert len(receiver.requests) == 1 and dispatcher.counts["failed"] == 1
+
+    receiver = Receiver(500, 500, 500, 500)
+    dispatcher, _ = deliver(receiver)
+    assert len(receiver.requests) == 4 and dispatcher.counts["failed"] == 1 and dispatcher.counts["delivered"] == 0
+
+
+def test_internal_destinations_are_never_posted_to():
+    receiver = Receiver()
+    internal = ["http://127.0.0.1:8000/admin", "http://169.254.169.254/latest/meta-data/", "http://10.0.0.5/hook",
+                "http://[::1]/hook", "http://[::ffff:127.0.0.1]/hook", "http://0.0.0.0/hook", "http://localhost/hook",
+                "file:///etc/passwd", "ftp://93.184.216.34/hook"]
+    dispatcher, _ = deliver(receiver, urls=internal + ["http://93.184.216.34/hook"], allowed_hosts=())
+    assert len(receiver.requests) == 1 and dispatcher.counts["delivered"] == 1
+    assert dispatcher.counts["rejected"] == len(internal) and dispatcher.counts["requests"] == 1
+
+
+def test_allowlist_names_the_only_permitted_hosts():
+    receiver = Receiver()
+    dispatcher, _ = deliver(receiver, urls=["http://Receiver.test/hook", "http://93.184.216.34/hook",
+                                            "http://127.0.0.1/hook"])
+    assert len(receiver.requests) == 1 and dispatcher.counts["rejected"] == 2
+
+
+def test_rebinding_closes_the_previous_client():
+    dispatcher = webhooks.WebhookDispatcher(allowed_hosts=("receiver.test",),
+                                            transport=httpx.ASGITransport(app=Receiver()))
+    first = asyncio.new_event_loop()
+    worker = threading.Thread(target=first.run_forever)
+    worker.start()
+    try:
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0), first).result()
+        first.call_soon_threadsafe(dispatcher.emit, "http://receiver.test/hook", "content.completed", {})
+        asyncio.run_coroutine_threadsafe(dispatcher.drain(), first).result(timeout=5)
+        old_client = dispatcher._client
+
+        async def second():
+            dispatcher.emit("http://receiver.test/hook", "content.completed", {})
+            await dispatcher.drain()
+            await dispatcher.aclose()
+
+        asyncio.run(second())
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0.01), first).result(timeout=5)
+        assert old_client.is_closed and dispatcher.counts["delivered"] == 2
+    finally:
+        first.call_soon_threadsafe(first.stop)
+        worker.join()
+        first.close()
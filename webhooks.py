@@ -0,0 +1,300 @@
+"""
+Completion callbacks: POST an event to a client's ``callback_url`` when
+its ingest, archive batch or enhancement job finishes, instead of the client
+polling the status endpoints.
+
+Events are queued per callback URL and delivered in batches: a delivery
+task per endpoint waits ``max_delay`` after the first queued event so a
+burst goes out as one request, ``{"events": [...]}``, of up to
+``max_batch`` events. A failed delivery (connection error, timeout, 408,
+429, 5xx) is retried with exponential backoff and full jitter, honouring
+``Retry-After``; other 4xx answers drop the batch. Delivery is at least
+once, so every event carries an ``id`` for the receiver to deduplicate on.
+
+With ``AI_DAE_WEBHOOK_SECRET`` set, each request is signed:
+
+    X-AIDAE-Signature: t=<unix time>,v1=<hex HMAC-SHA256 of "<t>." + body>
+
+``verify_signature`` checks one on the receiving side. All deliveries share
+one pooled ``httpx.AsyncClient`` capped at ``max_connections``.
+
+Callback URLs come from clients, so a delivery is only made to an http(s)
+URL whose host is in ``AI_DAE_WEBHOOK_ALLOWED_HOSTS`` (comma-separated)
+or, without that list, whose host resolves to public addresses only:
+loopback, private, link-local (cloud metadata), reserved and multicast
+destinations are refused and their events counted as rejected. The host is
+resolved again when the request connects, so deployments that must rule out
+DNS rebinding set the allowlist.
+"""
+import asyncio
+import collections
+import email.utils
+import hashlib
+import hmac
+import ipaddress
+import json
+import os
+import random
+import socket
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Deque, Dict, Iterable, List, Optional
+
+import httpx
+
+DEFAULT_SECRET = os.environ.get("AI_DAE_WEBHOOK_SECRET")
+DEFAULT_MAX_CONNECTIONS = int(os.environ.get("AI_DAE_WEBHOOK_MAX_CONNECTIONS", "32"))
+SIGNATURE_HEADER = "x-aidae-signature"
+DEFAULT_ALLOWED_HOSTS = tuple(host.strip().lower() for host in
+                              os.environ.get("AI_DAE_WEBHOOK_ALLOWED_HOSTS", "").split(",") if host.strip())
+RETRYABLE_STATUS = frozenset((408, 425, 429, 500, 502, 503, 504))
+
+
+# Signing
+def sign(secret: str, timestamp: int, body: bytes) -> str:
+    digest = hmac.new(secret.encode(), b"%d." % timestamp + body, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def verify_signature(secret: str, header: Optional[str], body: bytes, tolerance: float = 300.0,
+                     now: Optional[float] = None) -> bool:
+    """True if ``header`` is a valid signature of ``body`` made within ``tolerance`` seconds."""
+    try:
+        parts = dict(item.split("=", 1) for item in (header or "").split(","))
+        timestamp = int(parts["t"])
+    except (KeyError, ValueError):
+        return False
+    if abs((time.time() if now is None else now) - timestamp) > tolerance:
+        return False
+    return hmac.compare_digest(sign(secret, timestamp, body), f"t={timestamp},v1={parts.get('v1', '')}")
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+# Destinations
+def _public(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])  # drop an IPv6 scope id
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def permitted(url: str, allowed_hosts=frozenset()) -> bool:
+    """
+    Whether a callback may be POSTed to ``url``: http(s), and its host in
+    ``allowed_hosts`` or, with no allowlist, resolving to public addresses
+    only. A failed lookup raises ``OSError`` (worth retrying).
+    """
+    try:
+        parsed = httpx.URL(url)
+    except httpx.InvalidURL:
+        return False
+    host = parsed.host.lower()
+    if parsed.scheme not in ("http", "https") or not host:
+        return False
+    if allowed_hosts:
+        return host in allowed_hosts
+    try:
+        return _public(host)
+    except ValueError:  # a name, not an address literal
+        pass
+    infos = await asyncio.get_running_loop().getaddrinfo(host, parsed.port or 0, type=socket.SOCK_STREAM)
+    return bool(infos) and all(_public(info[4][0]) for info in infos)
+
+
+# Delivery
+@dataclass
+class Endpoint:
+    url: str
+    pending: Deque[dict] = field(default_factory=collections.deque)
+    wake: asyncio.Event = field(default_factory=asyncio.Event)
+    task: Optional[asyncio.Task] = None
+
+
+class WebhookDispatcher:
+    def __init__(self, secret: Optional[str] = DEFAULT_SECRET, max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_batch: int = 100, max_delay: float = 0.05, max_attempts: int = 8, base_backoff: float = 0.5,
+                 max_backoff: float = 60.0, max_pending: int = 10000, timeout: float = 10.0,
+                 idle_timeout: float = 30.0, allowed_hosts: Iterable[str] = DEFAULT_ALLOWED_HOSTS,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.secret = secret
+        self.max_connections = max_connections
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.allowed_hosts = frozenset(host.lower() for host in allowed_hosts)
+        self.transport = transport
+        self.endpoints: Dict[str, Endpoint] = {}
+        self.counts = dict.fromkeys(("emitted", "delivered", "failed", "rejected", "overflowed", "requests",
+                                     "retries"), 0)
+        self.sending = 0
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # A new event loop (e.g. a test client's): the old client and delivery tasks belong to the old one.
+            self._close_client()
+            self._loop = loop
+            self.endpoints = {}
+            self._client = httpx.AsyncClient(
+                transport=self.transport, timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections))
+
+    def _close_client(self):
+        """Stop the delivery tasks and close the client on the loop they belong to, if it is still open."""
+        client, loop = self._client, self._loop
+        self._client = self._loop = None
+        if loop is None or loop.is_closed():
+            return
+        for endpoint in self.endpoints.values():
+            if endpoint.task is not None:
+                loop.call_soon_threadsafe(endpoint.task.cancel)
+        if client is not None and not client.is_closed:
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+    def emit(self, callback_url: Optional[Any], event_type: str, data: Dict[str, Any]) -> Optional[dict]:
+        """Queue an event for ``callback_url`` (no-op without one); returns the event."""
+        if not callback_url:
+            return None
+        self._bind_loop()
+        url = str(callback_url)
+        event = {"id": uuid.uuid4().hex, "type": event_type, "created": time.time(), "data": data}
+        endpoint = self.endpoints.get(url)
+        if endpoint is None:
+            endpoint = self.endpoints[url] = Endpoint(url)
+        if len(endpoint.pending) >= self.max_pending:
+            endpoint.pending.popleft()
+            self.counts["overflowed"] += 1
+        endpoint.pending.append(event)
+        self.counts["emitted"] += 1
+        if endpoint.task is None:
+            endpoint.task = asyncio.get_running_loop().create_task(self._deliver(endpoint))
+        endpoint.wake.set()
+        return event
+
+    async def run_with_callback(self, callback_url: Optional[Any], event_type: str, data: Dict[str, Any],
+                                work: Awaitable) -> Any:
+        """
+        Await ``work`` and return its result; if ``callback_url`` is set, emit
+        ``event_type`` with ``data`` plus the result (or error) when it
+        finishes, even if this caller is cancelled first.
+        """
+        task = asyncio.ensure_future(work)
+        if callback_url:
+            def completed(done: asyncio.Task):
+                if done.cancelled():
+                    return
+                error = done.exception()
+                payload = {**data, "status": "failed" if error else "completed"}
+                if error is not None:
+                    payload["error"] = str(error) or type(error).__name__
+                else:
+                    payload["result"] = done.result()
+                self.emit(callback_url, event_type, payload)
+            task.add_done_callback(completed)
+        return await asyncio.shield(task)
+
+    async def _deliver(self, endpoint: Endpoint):
+        try:
+            while True:
+                if not endpoint.pending:
+                    endpoint.wake.clear()
+                    try:
+                        await asyncio.wait_for(endpoint.wake.wait(), self.idle_timeout)
+                    except asyncio.TimeoutError:
+                        if not endpoint.pending:
+                            return
+                if len(endpoint.pending) < self.max_batch:
+                    await asyncio.sleep(self.max_delay)  # let a burst accumulate into one request
+                batch = [endpoint.pending.popleft() for _ in range(min(self.max_batch, len(endpoint.pending)))]
+                self.sending += 1
+                try:
+                    await self._send(endpoint.url, batch)
+                finally:
+                    self.sending -= 1
+        finally:
+            if self.endpoints.get(endpoint.url) is endpoint:
+                del self.endpoints[endpoint.url]
+
+    async def _send(self, url: str, batch: List[dict]):
+        body = json.dumps({"events": batch}, separators=(",", ":")).encode()
+        for attempt in range(1, self.max_attempts + 1):
+            headers = {"content-type": "application/json", "user-agent": "AI-DAE-Webhooks/1.0"}
+            if self.secret:
+                headers[SIGNATURE_HEADER] = sign(self.secret, int(time.time()), body)
+            retry_after = None
+            try:
+                if not await permitted(url, self.allowed_hosts):
+                    self.counts["rejected"] += len(batch)
+                    return
+                self.counts["requests"] += 1
+                response = await self._client.post(url, content=body, headers=headers)
+            except (OSError, httpx.HTTPError):  # OSError: the callback host did not resolve
+                pass
+            else:
+                if response.is_success:
+                    self.counts["delivered"] += len(batch)
+                    return
+                if response.status_code not in RETRYABLE_STATUS:
+                    break
+                retry_after = _retry_after(response)
+            if attempt == self.max_attempts:
+                break
+            self.counts["retries"] += 1
+            delay = random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** (attempt - 1)))
+            await asyncio.sleep(max(delay, min(retry_after or 0.0, self.max_backoff)))
+        self.counts["failed"] += len(batch)
+
+    @property
+    def pending(self) -> int:
+        return sum(len(e.pending) for e in self.endpoints.values())
+
+    async def drain(self, poll_interval: float = 0.01):
+        """Wait until every queued event has been delivered or given up on."""
+        while self.pending or self.sending:
+            await asyncio.sleep(poll_interval)
+
+    async def aclose(self):
+        for endpoint in list(self.endpoints.values()):
+            if endpoint.task is not None:
+                endpoint.task.cancel()
+        client, self._client, self._loop = self._client, None, None
+        if client is not None:
+            await client.aclose()
+
+
+dispatcher = WebhookDispatcher()
+
+
+def metric_samples():
+    counts = dispatcher.counts
+    return [
+        ("aidae_webhook_events_total", "counter", "Completion events, by outcome.",
+         [({"outcome": outcome}, counts[outcome]) for outcome in ("emitted", "delivered", "failed", "rejected",
+                                                                               "overflowed")]),
+        ("aidae_webhook_requests_total", "counter", "Webhook POSTs made, including retries.",
+         [({}, counts["requests"])]),
+        ("aidae_webhook_retries_total", "counter", "Webhook POSTs retried after a failure.", [({}, counts["retries"])]),
+        ("aidae_webhook_pending_events", "gauge", "Events queued for delivery.", [({}, dispatcher.pending)]),
+        ("aidae_webhook_endpoints", "gauge", "Callback URLs with a delivery task.", [({}, len(dispatcher.endpoints))]),
+    ]